@@ -19,6 +19,9 @@ logger = logging.getLogger('OPCUA_SERVER')
 # --- 전역 설정 ---
 node_id_type = ua.NodeIdType.String
 
+# OPC UA 서버 Endpoint
+SERVER_ENDPOINT = "opc.tcp://172.30.1.61:0630/freeopcua/server/"
+
 # --- Modbus TCP 설정 ---
 # PLC_002 결과를 저장할 Modbus Holding Register. 주소는 80 (인덱스 0)
 MODBUS_REGISTERS = {
@@ -1196,16 +1199,18 @@ def start_modbus_server():
     except Exception as e:
         print(f"[{current_time}] [MODBUS] Modbus TCP Server Failed to Start: {e}")
 
-async def main():
+async def init_server(server_ip: str = SERVER_ENDPOINT):
+    """
+    OPC UA 서버를 초기화하고 노드/메소드를 등록한 뒤 (server, methods)를 반환합니다. (server.start()는 호출하지 않음)
+    벤치마크 등에서 같은 서버 구성을 다른 Endpoint로 띄울 때 사용합니다.
+    """
     # -----------------------------------------------------
     # 1. OPC UA Server 설정
     # -----------------------------------------------------
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] [MAIN] main() start")  # ✅ main 진입 확인용
 
     server = Server()
 
-    server_ip = "opc.tcp://172.30.1.61:0630/freeopcua/server/"
     print(f"[{current_time}] [OPCUA] init server...")
     await server.init()
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1337,6 +1342,15 @@ async def main():
         methods.call_send_arm_img,
     )
 
+    return server, methods
+
+
+async def main():
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{current_time}] [MAIN] main() start")  # ✅ main 진입 확인용
+    server_ip = SERVER_ENDPOINT
+    server, methods = await init_server(server_ip)
+
     # -----------------------------------------------------
     # 10. 서버 실행
     # -----------------------------------------------------
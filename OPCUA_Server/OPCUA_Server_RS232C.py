@@ -19,6 +19,9 @@ logger = logging.getLogger('OPCUA_SERVER')
 # --- 전역 설정 ---
 node_id_type = ua.NodeIdType.String
 
+# OPC UA 서버 Endpoint
+SERVER_ENDPOINT = "opc.tcp://172.30.1.61:4840/freeopcua/server/"
+
 # --- Modbus TCP 설정 ---
 # PLC_002 결과를 저장할 Modbus Holding Register. 주소는 80 (인덱스 0)
 MODBUS_REGISTERS = {
@@ -1043,12 +1046,14 @@ def define_img_001_arguments():
     
     return [input_arg], [output_arg_1, output_arg_2]
 
-async def main():
+async def init_server(server_ip: str = SERVER_ENDPOINT):
+    """
+    OPC UA 서버를 초기화하고 노드/메소드를 등록한 뒤 (server, methods)를 반환합니다. (server.start()는 호출하지 않음)
+    벤치마크 등에서 같은 서버 구성을 다른 Endpoint로 띄울 때 사용합니다.
+    """
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{current_time}] [MAIN] 🚀 main() 함수 실행 시작")
 
     server = Server()
-    server_ip = "opc.tcp://172.30.1.61:4840/freeopcua/server/"
     
     print(f"[{current_time}] [OPCUA] 서버 초기화 진행...")
     await server.init()
@@ -1125,6 +1130,14 @@ async def main():
         "write_send_arm_img", 
         methods.call_send_arm_img)
 
+    return server, methods
+
+
+async def main():
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{current_time}] [MAIN] 🚀 main() 함수 실행 시작")
+    server, methods = await init_server()
+
     # 🚨 서버 실행부 보강
     try:
         # 서버 시작 시도
@@ -0,0 +1,72 @@
+# PLC_AdaptivePoll.py
+"""
+변화 기반(report-by-exception) 적응형 폴링 주기 관리.
+
+상태 변화 직후나 컨베이어가 동작 중(RUN/MOVE 등)일 때는 최소 주기로 빠르게 폴링하고,
+아무 변화가 없고 컨베이어가 정지(STOP)해 있으면 주기를 backoff 배수로 늘려
+최대 주기까지 물러납니다. 유휴 상태의 버스/CPU 부하를 줄이면서 물건이 실제로
+움직일 때의 감지 지연은 줄이는 것이 목적입니다.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AdaptivePoller:
+    """
+    폴링 루프의 다음 대기 시간을 결정하는 객체.
+
+    사용법:
+        poller = AdaptivePoller(min_interval=0.05, max_interval=1.0)
+        while True:
+            ... 스캔 ...
+            poller.record(changed=센서 변화 여부, active=컨베이어 동작 여부)
+            await poller.sleep()
+
+    외부 이벤트(예: OPC UA 명령 수신)로 곧바로 빠른 폴링이 필요하면 kick()을 호출합니다.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float,
+                 backoff: float = 2.0, fast_hold: float = 1.0):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(f"잘못된 폴링 주기 설정: min={min_interval}, max={max_interval}")
+        if backoff < 1.0:
+            raise ValueError(f"backoff는 1.0 이상이어야 합니다: {backoff}")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # 마지막 변화 후 이 시간(초) 동안은 최소 주기 유지
+        self.fast_hold = fast_hold
+        self.interval = min_interval
+        self._last_change = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def record(self, changed: bool, active: bool) -> float:
+        """이번 스캔 결과를 반영하여 다음 폴링 주기(초)를 계산해 반환합니다."""
+        now = time.monotonic()
+        if changed:
+            self._last_change = now
+
+        if changed or active or now - self._last_change < self.fast_hold:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
+
+    def kick(self):
+        """즉시 빠른 폴링으로 전환하고, 대기 중인 sleep()을 깨웁니다."""
+        self._last_change = time.monotonic()
+        self.interval = self.min_interval
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def sleep(self):
+        """현재 주기만큼 대기합니다. kick()이 호출되면 즉시 반환합니다."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,157 @@
+# PLC_AsyncTransport.py
+"""
+asyncio 네이티브 Modbus 전송 계층.
+
+pymodbus의 비동기 클라이언트(AsyncModbusSerialClient / AsyncModbusTcpClient)를 감싸서
+asyncio.to_thread 스레드 전환 없이 이벤트 루프 위에서 바로 Modbus 요청을 보냅니다.
+모든 요청에는 개별 타임아웃이 적용되며, 반환 규칙은 기존 동기 헬퍼와 동일합니다.
+    - 읽기: 성공 시 비트/레지스터 리스트, 실패 시 None
+    - 쓰기: 성공 시 0, 실패 시 -1
+"""
+import asyncio
+import sys
+from typing import List, Optional
+
+from pymodbus.client import AsyncModbusSerialClient, AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+# 요청 하나당 기본 타임아웃 (초)
+DEFAULT_REQUEST_TIMEOUT = 1.0
+
+
+class AsyncModbusTransport:
+    """
+    pymodbus 비동기 클라이언트 하나(버스 하나)를 소유하는 전송 객체.
+
+    RTU 시리얼 버스는 한 번에 하나의 트랜잭션만 가능하므로 serialize=True일 때
+    내부 Lock으로 요청을 직렬화합니다. (TCP는 transaction id로 다중 요청 가능)
+    """
+
+    def __init__(self, client, slave: int = 1, timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 serialize: bool = True, name: str = "MODBUS"):
+        self.client = client
+        self.slave = slave
+        self.timeout = timeout
+        self.name = name
+        self._lock = asyncio.Lock() if serialize else None
+
+    @classmethod
+    def serial(cls, port: str, baudrate: int, parity: str = 'N', stopbits: int = 1,
+               slave: int = 1, timeout: float = DEFAULT_REQUEST_TIMEOUT, name: str = "MODBUS"):
+        """Modbus RTU(시리얼) 전송 객체를 만듭니다."""
+        client = AsyncModbusSerialClient(
+            port=port,
+            baudrate=baudrate,
+            parity=parity,
+            stopbits=stopbits,
+            timeout=timeout,
+        )
+        return cls(client, slave=slave, timeout=timeout, serialize=True, name=name)
+
+    @classmethod
+    def tcp(cls, host: str, port: int = 502, slave: int = 1,
+            timeout: float = DEFAULT_REQUEST_TIMEOUT, name: str = "MODBUS"):
+        """Modbus TCP 전송 객체를 만듭니다."""
+        client = AsyncModbusTcpClient(host, port=port, timeout=timeout)
+        return cls(client, slave=slave, timeout=timeout, serialize=False, name=name)
+
+    # --- 연결 관리 ---
+    async def connect(self) -> bool:
+        """버스에 연결합니다. 성공 시 True."""
+        try:
+            await asyncio.wait_for(self.client.connect(), timeout=max(self.timeout, 3.0))
+        except Exception as e:
+            print(f"[{self.name}] ❌ 연결 실패: {e.__class__.__name__} - {e}", file=sys.stderr)
+            return False
+        return bool(self.client.connected)
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.client.connected)
+
+    def close(self):
+        self.client.close()
+
+    # --- 공통 요청 실행 ---
+    async def _execute(self, desc: str, request, timeout: Optional[float]):
+        """요청 coroutine을 타임아웃과 함께 실행하고, 오류 시 None을 반환합니다."""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            if self._lock is None:
+                result = await asyncio.wait_for(request(), timeout=timeout)
+            else:
+                async with self._lock:
+                    result = await asyncio.wait_for(request(), timeout=timeout)
+
+            if result.isError():
+                print(f"[{self.name}] ❌ {desc} 통신 오류: {result}", file=sys.stderr)
+                return None
+            return result
+
+        except asyncio.TimeoutError:
+            print(f"[{self.name}] ❌ {desc} 타임아웃 ({timeout}s)", file=sys.stderr)
+            return None
+        except ModbusException as e:
+            print(f"[{self.name}] ❌ {desc} Modbus 예외 발생 (연결 끊김 예상): {e}", file=sys.stderr)
+            return None
+        except Exception as e:
+            print(f"[{self.name}] ❌ {desc} 예기치 않은 오류: {e}", file=sys.stderr)
+            return None
+
+    # --- 읽기 ---
+    async def read_coils(self, address: int, count: int = 1, slave: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Optional[List[bool]]:
+        """연속 코일 count개를 읽어 비트 리스트를 반환합니다. 오류 시 None."""
+        slave = self.slave if slave is None else slave
+        result = await self._execute(
+            f"코일 읽기 (S: {slave}, A: {address}, N: {count})",
+            lambda: self.client.read_coils(address, count=count, slave=slave),
+            timeout,
+        )
+        return None if result is None else list(result.bits[:count])
+
+    async def read_holding_registers(self, address: int, count: int = 1, slave: Optional[int] = None,
+                                     timeout: Optional[float] = None) -> Optional[List[int]]:
+        """연속 Holding Register count개를 읽어 값 리스트를 반환합니다. 오류 시 None."""
+        slave = self.slave if slave is None else slave
+        result = await self._execute(
+            f"HR 읽기 (S: {slave}, A: {address}, N: {count})",
+            lambda: self.client.read_holding_registers(address, count=count, slave=slave),
+            timeout,
+        )
+        return None if result is None else list(result.registers[:count])
+
+    # --- 쓰기 ---
+    async def write_coil(self, address: int, value: bool, slave: Optional[int] = None,
+                         timeout: Optional[float] = None) -> int:
+        """코일 하나를 설정합니다 (FC05). 성공 시 0, 실패 시 -1."""
+        slave = self.slave if slave is None else slave
+        result = await self._execute(
+            f"코일 쓰기 (S: {slave}, A: {address}, V: {int(bool(value))})",
+            lambda: self.client.write_coil(address, bool(value), slave=slave),
+            timeout,
+        )
+        return -1 if result is None else 0
+
+    async def write_register(self, address: int, value: int, slave: Optional[int] = None,
+                             timeout: Optional[float] = None) -> int:
+        """Holding Register 하나를 설정합니다 (FC06). 성공 시 0, 실패 시 -1."""
+        slave = self.slave if slave is None else slave
+        result = await self._execute(
+            f"Register 쓰기 (S: {slave}, A: {address}, V: {value})",
+            lambda: self.client.write_register(address, int(value), slave=slave),
+            timeout,
+        )
+        return -1 if result is None else 0
+
+    async def write_registers(self, address: int, values: List[int], slave: Optional[int] = None,
+                              timeout: Optional[float] = None) -> int:
+        """연속 Holding Register들을 한 프레임으로 설정합니다 (FC16). 성공 시 0, 실패 시 -1."""
+        slave = self.slave if slave is None else slave
+        values = [int(v) for v in values]
+        result = await self._execute(
+            f"Registers 쓰기 (S: {slave}, A: {address}, V: {values})",
+            lambda: self.client.write_registers(address, values, slave=slave),
+            timeout,
+        )
+        return -1 if result is None else 0
@@ -0,0 +1,208 @@
+# PLC_Bench_DB.py
+"""
+DB 백엔드 벤치마크: pymysql + asyncio.to_thread (thread) vs aiomysql (async).
+
+센서 이벤트 --events개를 --burst초 동안 몰아서 발생시키고, 이벤트마다 로그 기록 1회와 제어 상태 조회 1회를
+수행합니다. 동시에 다음을 측정합니다.
+    - executor 점유율 : 1ms마다 기본 실행기(스레드 풀)에서 일하고 있는 스레드 수를 샘플링 (평균/최대/포화 비율)
+    - executor 대기   : 같은 실행기에 --probe-interval초마다 짧은 작업을 넣어, 스레드를 얻기까지 기다린 시간
+                        (실행기를 함께 쓰는 다른 작업이 DB 호출 때문에 얼마나 밀리는지)
+    - 루프 지연       : 1ms sleep을 반복하는 틱 태스크의 초과 지연 (이벤트 루프가 얼마나 막히는지)
+    - 이벤트 처리 시간 : 이벤트 하나의 DB 작업(기록 + 조회) 완료까지 걸린 시간
+
+--db sim(기본)은 MySQL 없이 --db-latency초가 걸리는 가짜 DB로 측정합니다. 연결 풀 크기(--pool-size)만큼만
+동시에 처리되며, thread 모드는 연결을 기다리는 동안에도 실행기 스레드를 붙잡고 있는 점까지 재현합니다.
+--db real은 PLC_DataBase / PLC_DataBaseAsync로 실제 DB_HOST에 접속합니다.
+
+사용 예:
+    python PLC_Bench_DB.py --events 500 --burst 0.5 --db-latency 0.005
+    python PLC_Bench_DB.py --db real --events 200 --json bench_db.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PLC_Bench_Transport import summarize
+from PLC_DataBase import POOL_MAX_SIZE
+
+CONTROL_STATE_COLUMNS = ['run_mode', 'direction', 'frequency', 'acceleration', 'deceleration']
+
+
+class ExecutorGauge:
+    """실행기 스레드에서 돌고 있는 작업 수를 셉니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.busy = 0
+
+    def track(self, fn):
+        def run(*args):
+            with self._lock:
+                self.busy += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+        return run
+
+
+def sim_backends(latency: float, pool_size: int):
+    """MySQL 없이 latency초가 걸리는 (동기, 비동기) DB 함수 묶음을 만듭니다."""
+    pool = threading.BoundedSemaphore(pool_size)
+    async_pool = asyncio.Semaphore(pool_size)
+
+    def sync_call(*_):
+        with pool:      # 연결을 기다리는 동안에도 스레드를 점유 (ConnectionPool.acquire와 같음)
+            time.sleep(latency)
+        return True
+
+    async def async_call(*_):
+        async with async_pool:
+            await asyncio.sleep(latency)
+        return True
+
+    return {
+        "thread": {"insert_log": sync_call, "select": sync_call},
+        "async": {"insert_log": async_call, "select": async_call},
+    }
+
+
+async def real_backends(pool_size: int):
+    import PLC_DataBase
+    from PLC_DataBaseAsync import AsyncDatabase
+
+    PLC_DataBase.db_pool.max_size = pool_size
+    async_db = AsyncDatabase(max_size=pool_size)
+    await async_db.start()
+    backends = {
+        "thread": {"insert_log": PLC_DataBase.insert_log_sync, "select": PLC_DataBase.select_data_sync},
+        "async": {"insert_log": async_db.insert_log, "select": async_db.select_data},
+    }
+    return backends, async_db
+
+
+async def run_mode(mode: str, ops, args):
+    loop = asyncio.get_running_loop()
+    gauge = ExecutorGauge()
+    stop = asyncio.Event()
+    occupancy, probe_waits, loop_lags = [], [], []
+
+    async def call(name, *call_args):
+        fn = ops[name]
+        if mode == "async":
+            return await fn(*call_args)
+        return await asyncio.to_thread(gauge.track(fn), *call_args)
+
+    async def handle_event(index: int):
+        started = time.perf_counter()
+        await call("insert_log", "BENCH", "PLC", f"bench event {index}")
+        await call("select", "plc_control_state", CONTROL_STATE_COLUMNS, {"equipment_id": "CONVEYOR01"})
+        return time.perf_counter() - started
+
+    async def sample_occupancy():
+        while not stop.is_set():
+            occupancy.append(gauge.busy)
+            await asyncio.sleep(0.001)
+
+    async def probe_executor():
+        # 실행기를 함께 쓰는 다른 작업: 스레드를 얻을 때까지 기다린 시간만 측정
+        while not stop.is_set():
+            submitted = time.perf_counter()
+            started = await loop.run_in_executor(None, time.perf_counter)
+            probe_waits.append(started - submitted)
+            await asyncio.sleep(args.probe_interval)
+
+    async def tick():
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            loop_lags.append(max(0.0, time.perf_counter() - before - 0.001))
+
+    monitors = [asyncio.create_task(coro) for coro in (sample_occupancy(), probe_executor(), tick())]
+    await asyncio.sleep(0.05)   # 측정 태스크 안정화
+
+    started = time.perf_counter()
+    gap = args.burst / args.events if args.events else 0.0
+    events = []
+    for index in range(args.events):
+        events.append(asyncio.create_task(handle_event(index)))
+        if gap:
+            await asyncio.sleep(gap)
+    event_times = await asyncio.gather(*events)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*monitors)
+
+    workers = args.workers
+    return {
+        "elapsed_s": elapsed,
+        "events": summarize(event_times),
+        "executor_wait": summarize(probe_waits),
+        "loop_lag": summarize(loop_lags),
+        "occupancy": {
+            "workers": workers,
+            "mean": statistics.fmean(occupancy) if occupancy else 0.0,
+            "max": max(occupancy, default=0),
+            "saturated_pct": (100.0 * sum(1 for busy in occupancy if busy >= workers) / len(occupancy))
+            if occupancy else 0.0,
+        },
+    }
+
+
+def print_result(mode: str, r):
+    occ = r["occupancy"]
+    print(f"[BENCH] {mode:>6} | {r['elapsed_s']:.2f}s | executor 점유 mean {occ['mean']:.2f}/{occ['workers']} "
+          f"max {occ['max']} 포화 {occ['saturated_pct']:.1f}% | executor 대기 p95 {r['executor_wait']['p95_ms']:.2f}ms "
+          f"max {r['executor_wait']['max_ms']:.2f}ms | 루프 지연 p95 {r['loop_lag']['p95_ms']:.2f}ms "
+          f"max {r['loop_lag']['max_ms']:.2f}ms | 이벤트 p95 {r['events']['p95_ms']:.2f}ms")
+
+
+async def bench(args):
+    # 측정을 재현할 수 있도록 기본 실행기 크기를 고정
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.workers))
+
+    async_db = None
+    if args.db == "real":
+        backends, async_db = await real_backends(args.pool_size)
+    else:
+        backends = sim_backends(args.db_latency, args.pool_size)
+
+    results = {"config": vars(args), "modes": {}}
+    try:
+        for mode in args.modes:
+            r = await run_mode(mode, backends[mode], args)
+            results["modes"][mode] = r
+            print_result(mode, r)
+    finally:
+        if async_db is not None:
+            await async_db.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[BENCH] 결과 저장: {args.json}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DB 백엔드(thread/async) executor 점유율 및 루프 지연 벤치마크")
+    parser.add_argument("--events", type=int, default=500, help="발생시킬 센서 이벤트 수")
+    parser.add_argument("--burst", type=float, default=0.5, help="이벤트를 모두 발생시키는 데 걸리는 시간 (초)")
+    parser.add_argument("--db", choices=["sim", "real"], default="sim", help="가짜 DB(sim) 또는 실제 DB_HOST(real)")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="sim: DB 호출 하나의 처리 시간 (초)")
+    parser.add_argument("--pool-size", type=int, default=POOL_MAX_SIZE, help="DB 연결 풀 크기")
+    parser.add_argument("--workers", type=int, default=5, help="기본 실행기 스레드 수")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="executor 대기 측정 작업 간격 (초)")
+    parser.add_argument("--modes", nargs="+", choices=["thread", "async"], default=["thread", "async"])
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(parse_args()))
@@ -0,0 +1,171 @@
+# PLC_Bench_Decoder.py
+"""
+구독 알림 디코딩 마이크로벤치마크: 기존 핸들러 파싱 vs PLC_MessageDecoder.
+
+Anomaly/HMI 명령 노드로 들어오는 알림 값 묶음을 만들어, 알림 하나를 처리하는 CPU 시간을 비교합니다.
+    - legacy  : 기존 datachange_notification의 파싱 ('{'/'}' 탐색 -> 슬라이스 -> json.loads -> 키 확인)
+    - decoder : MessageDecoder.decode (빠른 경로 + 결과 캐시 + orjson/json)
+
+--rates로 준 알림 수(초당 알림 수에 해당)마다 같은 측정을 반복하여, 알림이 많아져도
+알림당 처리 시간이 일정하게 유지되는지 확인합니다. --unique를 주면 모든 JSON 알림에 일련번호를
+붙여 결과 캐시가 적중하지 않는 최악의 경우를 측정합니다.
+
+사용 예:
+    python PLC_Bench_Decoder.py --rates 100 1000 10000 --repeat 20
+    python PLC_Bench_Decoder.py --unique --backend json --json bench_decoder.json
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import PLC_MessageDecoder
+from PLC_MessageDecoder import MessageDecoder, ANOMALY_SCHEMA, COMMAND_SCHEMA
+
+ANOMALY_NODE = "ns=2;s=read_ok_ng_value"
+COMMAND_NODE = "ns=2;s=read_ready_state"
+
+# (노드, 알림 값 템플릿, 비중). {seq}는 --unique일 때 일련번호로 채움
+PAYLOAD_MIX = [
+    (ANOMALY_NODE, "Ready", 4),
+    (ANOMALY_NODE, "OK", 2),
+    (ANOMALY_NODE, "NG", 1),
+    (ANOMALY_NODE, '{{"Anomaly": "OK", "seq": {seq}}}', 3),
+    (ANOMALY_NODE, '{{"Anomaly": "NG", "seq": {seq}}}', 1),
+    (COMMAND_NODE, "Ready", 4),
+    (COMMAND_NODE, '{{"move_command": "conveyor_move", "seq": {seq}}}', 2),
+    (COMMAND_NODE, '{{"state": "conveyor_restart", "seq": {seq}}}', 1),
+]
+
+
+def legacy_anomaly(val):
+    """기존 AnomalyDataHandler의 파싱 부분."""
+    status_code = None
+    if isinstance(val, str):
+        status_str_raw = val.strip()
+        start_index = status_str_raw.find('{')
+        end_index = status_str_raw.rfind('}')
+        if start_index != -1 and end_index != -1 and end_index > start_index:
+            json_part = status_str_raw[start_index: end_index + 1]
+            try:
+                data_dict = json.loads(json_part)
+                status_code = data_dict.get("Anomaly", None)
+            except json.JSONDecodeError:
+                status_code = status_str_raw
+        else:
+            status_code = status_str_raw
+    elif isinstance(val, dict):
+        status_code = val.get("Anomaly", None)
+    return None if status_code is None else str(status_code).upper()
+
+
+def legacy_command(val):
+    """기존 CMoveDataHandler의 파싱 부분."""
+    command_key_value = None
+    if isinstance(val, str):
+        status_str_raw = val.strip()
+        start_index = status_str_raw.find('{')
+        end_index = status_str_raw.rfind('}')
+        if start_index != -1 and end_index != -1 and end_index > start_index:
+            json_part = status_str_raw[start_index: end_index + 1]
+            try:
+                data_dict = json.loads(json_part)
+                if "state" in data_dict:
+                    command_key_value = data_dict["state"].upper()
+                elif "move_command" in data_dict:
+                    command_key_value = data_dict["move_command"].upper()
+            except json.JSONDecodeError:
+                command_key_value = None
+    return command_key_value
+
+
+def make_stream(count: int, unique: bool, rng: random.Random):
+    weights = [weight for _, _, weight in PAYLOAD_MIX]
+    stream = []
+    for seq, (node, template, _) in enumerate(rng.choices(PAYLOAD_MIX, weights=weights, k=count)):
+        stream.append((node, template.format(seq=seq if unique else 0)))
+    return stream
+
+
+def run_legacy(stream):
+    parsers = {ANOMALY_NODE: legacy_anomaly, COMMAND_NODE: legacy_command}
+    for node, val in stream:
+        parsers[node](val)
+
+
+def run_decoder(stream, decoder: MessageDecoder):
+    decode = decoder.decode
+    for node, val in stream:
+        decode(node, val)
+
+
+def measure(runner, stream, repeat: int):
+    """알림 묶음을 repeat번 처리하여 알림당 처리 시간(초) 샘플을 반환합니다."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        runner(stream)
+        samples.append((time.perf_counter() - started) / len(stream))
+    return samples
+
+
+def summarize_us(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))] * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def bench(args):
+    if args.backend == "json":
+        PLC_MessageDecoder._json_loads = json.loads
+    rng = random.Random(args.seed)
+    results = {"config": vars(args), "backend": args.backend or PLC_MessageDecoder.JSON_BACKEND, "rates": {}}
+
+    for rate in args.rates:
+        stream = make_stream(rate, args.unique, rng)
+        # 스키마 결과 캐시가 이전 측정의 영향을 받지 않도록 측정마다 새 스키마/디코더 사용
+        decoder = MessageDecoder({
+            ANOMALY_NODE: PLC_MessageDecoder.MessageSchema(
+                "Anomaly", ANOMALY_SCHEMA.keys, ANOMALY_SCHEMA.plain_fallback, ("Ready", "OK", "NG")),
+            COMMAND_NODE: PLC_MessageDecoder.MessageSchema(
+                "command", COMMAND_SCHEMA.keys, COMMAND_SCHEMA.plain_fallback, ("Ready",)),
+        })
+        runners = {"legacy": run_legacy, "decoder": lambda s: run_decoder(s, decoder)}
+
+        results["rates"][rate] = {}
+        for mode in args.modes:
+            r = summarize_us(measure(runners[mode], stream, args.repeat))
+            results["rates"][rate][mode] = r
+            print(f"[BENCH] {rate:>6} 알림 | {mode:>7}: mean {r['mean_us']:.3f} us/알림 | "
+                  f"p50 {r['p50_us']:.3f} | p95 {r['p95_us']:.3f} | max {r['max_us']:.3f} ({r['runs']} runs)")
+
+    print(f"[BENCH] JSON 백엔드: {results['backend']}, unique={args.unique}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[BENCH] 결과 저장: {args.json}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OPC UA 구독 알림 디코딩 마이크로벤치마크")
+    parser.add_argument("--rates", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="측정할 알림 묶음 크기 (초당 알림 수)")
+    parser.add_argument("--repeat", type=int, default=20, help="묶음당 반복 측정 횟수")
+    parser.add_argument("--unique", action="store_true", help="JSON 알림마다 일련번호를 붙여 결과 캐시를 무력화")
+    parser.add_argument("--backend", choices=["orjson", "json"], default=None,
+                        help="decoder의 JSON 백엔드 강제 (기본: 설치된 것 자동 선택)")
+    parser.add_argument("--modes", nargs="+", choices=["legacy", "decoder"], default=["legacy", "decoder"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    bench(parse_args())
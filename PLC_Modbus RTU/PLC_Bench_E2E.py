@@ -0,0 +1,234 @@
+# PLC_Bench_E2E.py
+"""
+종단 간 지연 벤치마크: PLC 센서 에지 -> 클라이언트 스캔 -> OPC UA Method -> 서버 노드 갱신 -> 구독자 알림.
+
+한 프로세스 안에서 다음을 모두 띄웁니다.
+    - PLC_Simulator   : 로컬 PLC (Modbus TCP, --rtu 지정 시 pty 위의 Modbus RTU)
+    - OPCUA_Server_*  : init_server()로 만든 실제 서버 구성 (로컬 Endpoint)
+    - 클라이언트       : PLC_Client_*의 태그 맵과 handle_sensor_change를 그대로 사용하는 PlcFleet
+    - 구독자          : read_conveyor_sensor_check 노드를 구독하는 별도 OPC UA 클라이언트
+
+센서 태그를 --rate Hz로 반전시키며, 에지마다 구간별 지연을 기록합니다.
+    modbus_read  : 에지 주입 -> 스캐너가 변화 감지
+    method_call  : 변화 감지 -> OPC UA Method 호출 완료 (클라이언트 측 왕복)
+    node_write   : 변화 감지 -> 서버 Method 처리 완료 (노드 갱신 포함)
+    notification : 서버 노드 갱신 -> 구독자 알림 수신
+    total        : 에지 주입 -> 구독자 알림 수신
+
+결과는 JSON으로 저장하며, --baseline으로 이전 결과를 주면 구간별 p95 변화를 함께 출력합니다.
+
+사용 예:
+    python PLC_Bench_E2E.py --client ethernet --edges 200 --rate 5 --json e2e.json
+    python PLC_Bench_E2E.py --client rs232c --rtu --latency 0.002 --baseline e2e.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+
+from asyncua import Client
+
+from PLC_Bench_Transport import summarize
+from PLC_MultiLine import PlcFleet
+from PLC_Simulator import PlcMemory, PlcSimulator
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "OPCUA_Server")
+
+CLIENT_MODULES = {"rs232c": "PLC_Client_RS232C", "ethernet": "PLC_Client_Ethernet"}
+SERVER_MODULES = {"rs232c": "OPCUA_Server_RS232C", "ethernet": "OPCUA_Server_Ethernet"}
+
+HOPS = ("modbus_read", "method_call", "node_write", "notification", "total")
+
+# 구독 대상 노드와 센서 값 -> 노드 문자열
+SENSOR_NODE_ID = "ns=2;s=read_conveyor_sensor_check"
+SENSOR_NODE_VALUES = {1: "Check OK", 0: "Ready"}
+
+
+class EdgeTracker:
+    """주입한 에지 하나하나의 구간별 시각을 기록합니다. (에지는 한 번에 하나만 진행 중이라고 가정)"""
+
+    def __init__(self):
+        self.edges = []
+        self.current = None
+
+    def inject(self, value: int):
+        self.current = {"value": value, "injected": time.perf_counter()}
+        self.edges.append(self.current)
+
+    def mark(self, key: str, value=None):
+        edge = self.current
+        if edge is None or key in edge:
+            return
+        if value is not None and value != edge["value"]:
+            return
+        edge[key] = time.perf_counter()
+
+    def hop_samples(self):
+        spans = {
+            "modbus_read": ("injected", "detected"),
+            "method_call": ("detected", "called"),
+            "node_write": ("detected", "written"),
+            "notification": ("written", "notified"),
+            "total": ("injected", "notified"),
+        }
+        samples = {hop: [] for hop in HOPS}
+        for edge in self.edges:
+            for hop, (start, end) in spans.items():
+                if start in edge and end in edge:
+                    samples[hop].append(edge[end] - edge[start])
+        return samples
+
+
+class SubscriptionHandler:
+    def __init__(self, tracker: EdgeTracker):
+        self.tracker = tracker
+
+    def datachange_notification(self, node, val, data):
+        for value, text in SENSOR_NODE_VALUES.items():
+            if val == text:
+                self.tracker.mark("notified", value)
+
+
+def instrument_server(server_module, tracker: EdgeTracker):
+    """서버 Method 처리 완료(노드 갱신 직후) 시각을 기록하도록 call_conveyor_sensor_check를 감쌉니다."""
+    original = server_module.ServerMethods.call_conveyor_sensor_check
+
+    async def timed(self, parent_node, value):
+        result = await original(self, parent_node, value)
+        raw = value.Value if hasattr(value, "Value") else value
+        tracker.mark("written", 1 if raw else 0)
+        return result
+
+    server_module.ServerMethods.call_conveyor_sensor_check = timed
+
+
+async def bench(args):
+    sys.path.insert(0, SERVER_DIR)
+    client_module = importlib.import_module(CLIENT_MODULES[args.client])
+    server_module = importlib.import_module(SERVER_MODULES[args.client])
+    sensor_tag = args.tag or next(iter(client_module.SENSOR_EVENTS))[1]
+    tracker = EdgeTracker()
+
+    # 1. PLC 시뮬레이터
+    memory = PlcMemory(client_module.tag_plan)
+    simulator = PlcSimulator(memory, slave_id=client_module.SLAVE_ID, latency=args.latency,
+                             byte_time=args.byte_time)
+    if args.rtu:
+        line = {"name": "BENCH RTU", "type": "rtu", "port": simulator.start_rtu(), "timeout": args.timeout}
+    else:
+        line = {"name": "BENCH TCP", "type": "tcp", "host": "127.0.0.1",
+                "port": await simulator.start_tcp(port=0), "timeout": args.timeout}
+    line["slaves"] = [{
+        "name": "CONVEYOR01", "slave_id": client_module.SLAVE_ID,
+        "tag_plan": client_module.tag_plan, "scan_class": client_module.SENSOR_SCAN_CLASS,
+        "poll_min_interval": args.poll_min, "poll_max_interval": args.poll_max,
+    }]
+
+    # 2. OPC UA 서버 (실제 서버 구성, 로컬 Endpoint)
+    endpoint = f"opc.tcp://127.0.0.1:{args.opcua_port}/freeopcua/server/"
+    instrument_server(server_module, tracker)
+    server, _ = await server_module.init_server(endpoint)
+    await server.start()
+
+    # 3. 클라이언트 (PLC_Client_*의 변화 처리 로직) + 구독자
+    opcua_client = Client(url=endpoint)
+    subscriber = Client(url=endpoint)
+    await opcua_client.connect()
+    await subscriber.connect()
+    subscription = await subscriber.create_subscription(args.publish_interval, SubscriptionHandler(tracker))
+    await subscription.subscribe_data_change(subscriber.get_node(SENSOR_NODE_ID))
+
+    fleet = PlcFleet.from_config([line])
+    if not await fleet.connect():
+        raise SystemExit("[BENCH] ❌ 시뮬레이터 Modbus 연결 실패")
+
+    async def on_change(scanner, tag_name, value):
+        if tag_name != sensor_tag:
+            return
+        tracker.mark("detected", value)
+        await client_module.handle_sensor_change(opcua_client, scanner, tag_name, value)
+        tracker.mark("called", value)
+
+    fleet.start(on_change)
+
+    try:
+        await asyncio.sleep(args.warmup)
+        period = 1.0 / args.rate
+        for i in range(args.edges):
+            value = 0 if memory.get_tag(sensor_tag) else 1
+            tracker.inject(value)
+            memory.set_tag(sensor_tag, value)
+            await asyncio.sleep(period)
+        await asyncio.sleep(args.settle)
+    finally:
+        await fleet.stop()
+        await subscription.delete()
+        await subscriber.disconnect()
+        await opcua_client.disconnect()
+        await server.stop()
+        await simulator.stop()
+
+    samples = tracker.hop_samples()
+    results = {
+        "config": vars(args),
+        "sensor_tag": sensor_tag,
+        "edges": len(tracker.edges),
+        "completed": len(samples["total"]),
+        "hops": {hop: summarize(s) for hop, s in samples.items() if s},
+    }
+    report(results, args.baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[BENCH] 결과 저장: {args.json}")
+    return results
+
+
+def report(results, baseline_path=None):
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"[BENCH] 에지 {results['edges']}개 중 {results['completed']}개 완료 (태그 {results['sensor_tag']})")
+    for hop in HOPS:
+        r = results["hops"].get(hop)
+        if r is None:
+            print(f"[BENCH] {hop:>12}: 샘플 없음")
+            continue
+        line = (f"[BENCH] {hop:>12}: p50 {r['p50_ms']:.2f} ms | p95 {r['p95_ms']:.2f} | "
+                f"p99 {r['p99_ms']:.2f} | max {r['max_ms']:.2f} ({r['cycles']})")
+        base = baseline["hops"].get(hop) if baseline else None
+        if base:
+            line += f" | p95 변화 {r['p95_ms'] - base['p95_ms']:+.2f} ms"
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="PLC 에지 -> OPC UA 구독자 종단 간 지연 벤치마크")
+    parser.add_argument("--client", choices=sorted(CLIENT_MODULES), default="ethernet",
+                        help="변화 처리 로직/태그 맵을 가져올 클라이언트 (rs232c는 DB 로그도 기록 시도)")
+    parser.add_argument("--tag", default=None, help="에지를 주입할 센서 태그 (기본: SENSOR_EVENTS의 첫 태그)")
+    parser.add_argument("--rtu", action="store_true", help="Modbus TCP 대신 pty 위의 Modbus RTU 사용")
+    parser.add_argument("--latency", type=float, default=0.0, help="시뮬레이터 응답 지연 (초)")
+    parser.add_argument("--byte-time", type=float, default=None, help="시뮬레이터 RTU 바이트당 전송 시간 (초)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Modbus 요청 타임아웃 (초)")
+    parser.add_argument("--poll-min", type=float, default=0.05, help="스캐너 최소 폴링 주기 (초)")
+    parser.add_argument("--poll-max", type=float, default=0.5, help="스캐너 최대 폴링 주기 (초)")
+    parser.add_argument("--opcua-port", type=int, default=48401)
+    parser.add_argument("--publish-interval", type=int, default=100, help="구독자 publishing interval (ms)")
+    parser.add_argument("--edges", type=int, default=100, help="주입할 에지 수")
+    parser.add_argument("--rate", type=float, default=2.0, help="에지 주입 속도 (Hz)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="측정 전 대기 (초)")
+    parser.add_argument("--settle", type=float, default=1.0, help="마지막 에지 후 대기 (초)")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(parse_args()))
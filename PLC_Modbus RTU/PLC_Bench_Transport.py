@@ -0,0 +1,144 @@
+# PLC_Bench_Transport.py
+"""
+Modbus 스캔 주기 지연 벤치마크: asyncio.to_thread(스레드 전환) vs asyncio 네이티브 전송 계층.
+
+같은 작업(센서 코일 읽기 + D 레지스터 쓰기)을 두 방식으로 반복 실행하여 주기별 지연을 비교합니다.
+    - thread : 동기 ModbusTcpClient/ModbusSerialClient + 요청마다 asyncio.to_thread (기존 방식)
+    - async  : PLC_AsyncTransport.AsyncModbusTransport (현재 방식)
+
+--executor-load 옵션으로 기본 executor를 점유하는 가짜 DB 호출을 함께 돌려
+DB 호출과 스레드 풀을 나눠 쓰던 기존 구조의 경합을 재현할 수 있습니다.
+
+사용 예:
+    python PLC_Bench_Transport.py --host 127.0.0.1 --port 5020 --cycles 500 --executor-load 8
+    python PLC_Bench_Transport.py --serial /dev/pts/3 --cycles 200 --json bench_transport.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from pymodbus.client import ModbusSerialClient, ModbusTcpClient
+
+from PLC_AsyncTransport import AsyncModbusTransport
+
+
+def summarize(samples):
+    """지연 샘플(초) 리스트를 ms 단위 통계로 요약합니다."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "cycles": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def executor_load(stop: asyncio.Event, hold: float):
+    """기본 executor 스레드 하나를 hold초씩 계속 점유하는 가짜 DB 호출."""
+    while not stop.is_set():
+        await asyncio.to_thread(time.sleep, hold)
+
+
+async def run_thread_mode(args):
+    """기존 방식: 동기 클라이언트 + 요청마다 asyncio.to_thread."""
+    if args.serial:
+        client = ModbusSerialClient(port=args.serial, baudrate=args.baudrate, timeout=args.timeout)
+    else:
+        client = ModbusTcpClient(args.host, port=args.port, timeout=args.timeout)
+    if not client.connect():
+        raise SystemExit("[BENCH] ❌ Modbus 연결 실패 (thread 모드)")
+
+    samples = []
+    try:
+        for i in range(args.cycles):
+            start = time.perf_counter()
+            for offset in range(args.reads):
+                await asyncio.to_thread(client.read_coils, address=args.coil + offset, count=1, slave=args.slave)
+            for offset in range(args.writes):
+                await asyncio.to_thread(client.write_register, address=args.register + offset, value=i & 0xFFFF, slave=args.slave)
+            samples.append(time.perf_counter() - start)
+    finally:
+        client.close()
+    return samples
+
+
+async def run_async_mode(args):
+    """현재 방식: asyncio 네이티브 전송 계층."""
+    if args.serial:
+        transport = AsyncModbusTransport.serial(port=args.serial, baudrate=args.baudrate,
+                                                slave=args.slave, timeout=args.timeout, name="BENCH")
+    else:
+        transport = AsyncModbusTransport.tcp(args.host, port=args.port,
+                                             slave=args.slave, timeout=args.timeout, name="BENCH")
+    if not await transport.connect():
+        raise SystemExit("[BENCH] ❌ Modbus 연결 실패 (async 모드)")
+
+    samples = []
+    try:
+        for i in range(args.cycles):
+            start = time.perf_counter()
+            for offset in range(args.reads):
+                await transport.read_coils(args.coil + offset, 1)
+            for offset in range(args.writes):
+                await transport.write_register(args.register + offset, i & 0xFFFF)
+            samples.append(time.perf_counter() - start)
+    finally:
+        transport.close()
+    return samples
+
+
+async def bench(args):
+    results = {"config": vars(args), "modes": {}}
+    runners = {"thread": run_thread_mode, "async": run_async_mode}
+
+    for mode in args.modes:
+        stop = asyncio.Event()
+        loaders = [asyncio.create_task(executor_load(stop, args.load_hold)) for _ in range(args.executor_load)]
+        try:
+            samples = await runners[mode](args)
+        finally:
+            stop.set()
+            await asyncio.gather(*loaders, return_exceptions=True)
+
+        results["modes"][mode] = summarize(samples)
+        r = results["modes"][mode]
+        print(f"[BENCH] {mode:>6}: mean {r['mean_ms']:.2f} ms | p50 {r['p50_ms']:.2f} | "
+              f"p95 {r['p95_ms']:.2f} | p99 {r['p99_ms']:.2f} | max {r['max_ms']:.2f} ({r['cycles']} cycles)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"[BENCH] 결과 저장: {args.json}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Modbus 전송 계층 스캔 주기 지연 벤치마크")
+    parser.add_argument("--host", default="127.0.0.1", help="Modbus TCP 호스트")
+    parser.add_argument("--port", type=int, default=502, help="Modbus TCP 포트")
+    parser.add_argument("--serial", default=None, help="Modbus RTU 시리얼 포트 (지정 시 TCP 대신 사용)")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--slave", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--cycles", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=2, help="주기당 코일 읽기 횟수 (M0040/M0041)")
+    parser.add_argument("--writes", type=int, default=3, help="주기당 레지스터 쓰기 횟수 (D102/D104/D105)")
+    parser.add_argument("--coil", type=int, default=64, help="첫 번째 코일 주소")
+    parser.add_argument("--register", type=int, default=0, help="첫 번째 레지스터 주소")
+    parser.add_argument("--executor-load", type=int, default=0, help="동시에 기본 executor를 점유할 가짜 DB 호출 수")
+    parser.add_argument("--load-hold", type=float, default=0.02, help="가짜 DB 호출 하나의 점유 시간 (초)")
+    parser.add_argument("--modes", nargs="+", choices=["thread", "async"], default=["thread", "async"])
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(bench(parse_args()))
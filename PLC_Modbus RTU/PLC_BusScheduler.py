@@ -0,0 +1,207 @@
+# PLC_BusScheduler.py
+"""
+시리얼 Modbus 버스를 단독으로 소유하는 우선순위 트랜잭션 스케줄러.
+
+RTU 버스는 한 번에 하나의 트랜잭션만 가능하므로, 모든 Modbus 요청을 이 스케줄러의
+큐에 넣고 워커 태스크 하나가 우선순위 순서대로 실행합니다.
+
+우선순위 클래스 (숫자가 작을수록 먼저 실행)
+    PRIORITY_SAFETY   : 정지/재개/운전 등 제어 명령
+    PRIORITY_SORT     : OK/NG 분류 펄스
+    PRIORITY_POLL     : 센서 폴링
+    PRIORITY_SETPOINT : D 레지스터 설정값 갱신
+
+같은 클래스 안에서는 deadline이 빠른 요청이 먼저 실행되며, 실행 전에 deadline이 지난
+요청은 버스에 보내지 않고 실패(읽기 None / 쓰기 -1)로 돌려줍니다. (오래된 폴링 등)
+클래스별 대기 시간(큐 진입 ~ 실행 시작) 통계를 metrics()로 제공합니다.
+"""
+import asyncio
+import itertools
+import math
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+PRIORITY_SAFETY = 0
+PRIORITY_SORT = 1
+PRIORITY_POLL = 2
+PRIORITY_SETPOINT = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_SAFETY: "safety",
+    PRIORITY_SORT: "sort",
+    PRIORITY_POLL: "poll",
+    PRIORITY_SETPOINT: "setpoint",
+}
+
+# 대기 시간 백분위 계산에 사용할 최근 샘플 수
+WAIT_SAMPLE_WINDOW = 500
+
+
+class _ClassStats:
+    """우선순위 클래스 하나의 대기 시간/처리 건수 통계."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.executed = 0
+        self.expired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=WAIT_SAMPLE_WINDOW)
+
+    def record_wait(self, wait: float):
+        self.executed += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.recent_waits.append(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_waits)
+        p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "expired": self.expired,
+            "wait_mean_ms": (self.wait_total / self.executed * 1000) if self.executed else 0.0,
+            "wait_p95_ms": p95 * 1000,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class BusScheduler:
+    """
+    AsyncModbusTransport 하나를 감싸서 우선순위 큐를 통해서만 버스에 접근하도록 하는 스케줄러.
+
+    전송 객체와 같은 이름의 메서드(read_coils, write_coil, write_register, write_registers,
+    read_holding_registers)를 제공하며, 추가로 priority/deadline 키워드를 받습니다.
+    deadline은 '지금부터 몇 초 안에 실행되지 않으면 버린다'는 상대 시간(초)입니다.
+    """
+
+    def __init__(self, transport, name: str = "BUS",
+                 default_deadlines: Optional[Dict[int, float]] = None):
+        self.transport = transport
+        self.name = name
+        self.default_deadlines = default_deadlines or {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._seq = itertools.count()
+        self._stats = {p: _ClassStats() for p in PRIORITY_NAMES}
+
+    # --- 워커 관리 ---
+    def start(self):
+        """워커 태스크를 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.PriorityQueue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """워커를 멈추고 대기 중인 요청을 모두 취소합니다."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                *_, job = self._queue.get_nowait()
+                if not job[0].done():
+                    job[0].cancel()
+
+    async def _run(self):
+        while True:
+            priority, deadline_at, _, job = await self._queue.get()
+            future, func, args, kwargs, submitted_at, expired_result = job
+            if future.done():
+                # 호출 측에서 이미 취소된 요청
+                continue
+
+            now = time.monotonic()
+            stats = self._stats[priority]
+            if now > deadline_at:
+                stats.expired += 1
+                future.set_result(expired_result)
+                continue
+
+            stats.record_wait(now - submitted_at)
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                print(f"[{self.name}] ❌ 트랜잭션 실행 중 예기치 않은 오류: {e}", file=sys.stderr)
+                result = expired_result
+            # 실행 중에 호출 측이 취소했으면 결과를 버림 (set_result가 InvalidStateError를 내지 않도록)
+            if not future.done():
+                future.set_result(result)
+
+    # --- 요청 제출 ---
+    async def submit(self, priority: int, func: Callable[..., Awaitable[Any]], *args,
+                     deadline: Optional[float] = None, expired_result: Any = None, **kwargs) -> Any:
+        """
+        coroutine 함수 func(*args, **kwargs)를 버스 큐에 넣고 실행 결과를 기다립니다.
+
+        Args:
+            priority: PRIORITY_* 클래스.
+            deadline: 상대 deadline(초). None이면 클래스 기본값, 그것도 없으면 무기한.
+            expired_result: deadline 초과나 오류 시 돌려줄 값.
+        """
+        if priority not in self._stats:
+            raise ValueError(f"알 수 없는 우선순위 클래스: {priority}")
+        self.start()
+
+        if deadline is None:
+            deadline = self.default_deadlines.get(priority)
+        submitted_at = time.monotonic()
+        deadline_at = math.inf if deadline is None else submitted_at + deadline
+
+        future = asyncio.get_running_loop().create_future()
+        self._stats[priority].submitted += 1
+        job = (future, func, args, kwargs, submitted_at, expired_result)
+        self._queue.put_nowait((priority, deadline_at, next(self._seq), job))
+        return await future
+
+    # --- 전송 객체와 같은 형태의 편의 메서드 ---
+    async def read_coils(self, address: int, count: int = 1, priority: int = PRIORITY_POLL,
+                         deadline: Optional[float] = None, **kwargs):
+        return await self.submit(priority, self.transport.read_coils, address, count,
+                                 deadline=deadline, expired_result=None, **kwargs)
+
+    async def read_holding_registers(self, address: int, count: int = 1, priority: int = PRIORITY_POLL,
+                                     deadline: Optional[float] = None, **kwargs):
+        return await self.submit(priority, self.transport.read_holding_registers, address, count,
+                                 deadline=deadline, expired_result=None, **kwargs)
+
+    async def write_coil(self, address: int, value: bool, priority: int = PRIORITY_SAFETY,
+                         deadline: Optional[float] = None, **kwargs) -> int:
+        return await self.submit(priority, self.transport.write_coil, address, value,
+                                 deadline=deadline, expired_result=-1, **kwargs)
+
+    async def write_register(self, address: int, value: int, priority: int = PRIORITY_SETPOINT,
+                             deadline: Optional[float] = None, **kwargs) -> int:
+        return await self.submit(priority, self.transport.write_register, address, value,
+                                 deadline=deadline, expired_result=-1, **kwargs)
+
+    async def write_registers(self, address: int, values, priority: int = PRIORITY_SETPOINT,
+                              deadline: Optional[float] = None, **kwargs) -> int:
+        return await self.submit(priority, self.transport.write_registers, address, values,
+                                 deadline=deadline, expired_result=-1, **kwargs)
+
+    # --- 지표 ---
+    def queue_depth(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """우선순위 클래스 이름별 대기 시간/처리 건수 통계."""
+        return {PRIORITY_NAMES[p]: s.snapshot() for p, s in self._stats.items()}
+
+    def format_metrics(self) -> str:
+        parts = []
+        for name, m in self.metrics().items():
+            parts.append(f"{name}: n={m['executed']} exp={m['expired']} "
+                         f"wait(mean/p95/max)={m['wait_mean_ms']:.1f}/{m['wait_p95_ms']:.1f}/{m['wait_max_ms']:.1f}ms")
+        return f"[{self.name}] 큐={self.queue_depth()} | " + " | ".join(parts)
@@ -1,9 +1,16 @@
 import asyncio
 from asyncua import Client, ua
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
 import time
-import json 
+import os
+
+from PLC_TagMap import load_tag_map
+from PLC_PulseEngine import PulseEngine
+from PLC_MultiLine import PlcFleet
+from PLC_OutboundQueue import OutboundQueue, OVERFLOW_COALESCE
+from PLC_NodeCache import NodeCache
+from PLC_MethodBatcher import MethodCallBatcher
+from PLC_SubscriptionManager import SubscriptionManager
+from PLC_MessageDecoder import MessageDecoder, ANOMALY_SCHEMA
 # from asyncua.common.methods import call_method # OPC UA Method 호출 시 필요
 
 # --- 1. 설정 정보 (사용자 환경에 맞게 반드시 수정) ---
@@ -16,23 +23,96 @@ SENSOR2_METHOD_NODE_ID = "ns=2;s=write_robotarm_sensor_check"    # 로봇팔 Met
 # PLC Modbus 설정
 PLC_IP = '192.168.1.2'  # PLC의 실제 IP 주소로 변경
 PLC_PORT = 502          # Modbus TCP 기본 포트
-M0010_ADDRESS = 64      # M0010 접점의 Modbus Coil Address (컨베이어)
-M0011_ADDRESS = 65      # M0011 접점의 Modbus Coil Address (로봇팔)
 SLAVE_ID = 3            # Modbus Slave ID
 
+# 태그 맵: 코일 주소, 타입, 스캔 클래스, 방향은 PLC_TagMap_Ethernet.json에서 관리
+# 같은 스캔 클래스의 태그 중 주소 간격이 SCAN_MAX_GAP 이하인 것은 한 번의 Modbus 요청으로 읽음
+TAG_MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PLC_TagMap_Ethernet.json")
+SCAN_MAX_GAP = 8
+SENSOR_SCAN_CLASS = "fast"      # 센서 스캔 루프가 읽는 스캔 클래스
+tag_plan = load_tag_map(TAG_MAP_FILE, max_gap=SCAN_MAX_GAP)
+
 # Anomaly 처리 관련 설정
 # 🚨 ANOMALY 상태를 수신하는 OPC UA Node ID (AMR 구독 노드)
 ANOMALY_OPCUA_NODE_ID = "ns=2;s=read_ok_ng_value" 
 
+# OPC UA 노드 핸들 캐시: 연결 직후 한 번의 TranslateBrowsePathsToNodeIds로 해석 + RegisterNodes로 등록
+# 해석 결과는 NODE_CACHE_FILE에 저장되어 재시작/재연결 시 브라우징을 생략함
+NODE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opcua_nodes_ethernet.json")
+OPCUA_BROWSE_PATHS = {
+    OBJECT_NODE_ID: ["0:Objects", "2:PLC"],
+    SENSOR1_METHOD_NODE_ID: ["0:Objects", "2:PLC", "2:write_conveyor_sensor_check"],
+    SENSOR2_METHOD_NODE_ID: ["0:Objects", "2:PLC", "2:write_robotarm_sensor_check"],
+    ANOMALY_OPCUA_NODE_ID: ["0:Objects", "2:PLC", "2:read_ok_ng_value"],
+}
+node_cache = NodeCache(OPCUA_BROWSE_PATHS, cache_file=NODE_CACHE_FILE)
+
+# OPC UA 구독 설정 (Publish 주기 ms, 항목별 sampling_interval(ms)/queue_size)
+SUBSCRIPTION_PUBLISH_INTERVAL = 100
+ANOMALY_ITEM_OPTIONS = {"name": "Anomaly", "sampling_interval": 50, "queue_size": 10}
+# 구독 알림 값 디코더: 노드별 스키마 (JSON 키 조회, "Ready"/"OK"/"NG" 빠른 경로, 결과 캐시)
+message_decoder = MessageDecoder({ANOMALY_OPCUA_NODE_ID: ANOMALY_SCHEMA})
+
 # 코일 주소 정의 (M0020/M0021)
-PLC_WRITE_COIL_NG = 66      # M0020 코일 주소 (NG/불량 시 펄스)
-PLC_WRITE_COIL_OK = 68      # M0021 코일 주소 (OK/정상 시 펄스)
+PLC_WRITE_COIL_NG = tag_plan.address("M0020")      # NG/불량 시 펄스
+PLC_WRITE_COIL_OK = tag_plan.address("M0021")      # OK/정상 시 펄스
+
+# OK/NG 코일 펄스 유지 시간 (초)
+ANOMALY_PULSE_SECONDS = 1.0
+
+# 적응형 폴링 주기 (초): 센서 변화 직후에는 최소 주기, 변화가 없으면 POLL_BACKOFF 배씩 늘려 최대 주기까지 (슬레이브별)
+POLL_MIN_INTERVAL = 0.05
+POLL_MAX_INTERVAL = 0.5
+POLL_BACKOFF = 2.0
+POLL_FAST_HOLD = 2.0     # 마지막 변화 후 최소 주기를 유지하는 시간
 
 # OPC UA 연결 재시도 횟수 설정
 MAX_RETRY = 5
 
-# Modbus 클라이언트 객체 초기화
-modbus_client = ModbusTcpClient(PLC_IP, port=PLC_PORT)
+# Modbus 요청 하나당 타임아웃 (초)
+MODBUS_REQUEST_TIMEOUT = 1.0
+
+# 센서 변화 -> OPC UA 보고 송신 큐: 스캔 루프는 큐에 넣기만 하고 송신 워커가 Method를 호출
+# 큐가 가득 차면 같은 태그의 대기 항목을 최신 값으로 합침 (OVERFLOW_BLOCK이면 스캐너가 대기)
+OUTBOUND_QUEUE_SIZE = 64
+# 워커들이 동시에 낸 Method 호출은 METHOD_BATCH_WINDOW 동안 모여 Call 요청 하나로 전송되므로
+# 한 스캔에서 여러 센서가 바뀌어도 OPC UA 왕복은 한 번 (워커 수 = 한 요청에 담길 수 있는 최대 호출 수)
+OUTBOUND_WORKERS = 4
+OUTBOUND_OVERFLOW = OVERFLOW_COALESCE
+METHOD_BATCH_WINDOW = 0.005
+method_batcher = MethodCallBatcher(window=METHOD_BATCH_WINDOW)
+
+# 다중 PLC/슬레이브 구성: TCP 엔드포인트(라인)마다 슬레이브 목록을 정의합니다.
+# 라인마다 독립 버스 스케줄러가, 슬레이브마다 독립 스캔 루프가 동작합니다.
+PLC_LINES = [
+    {
+        "name": "TCP CELL1",
+        "type": "tcp",
+        "host": PLC_IP,
+        "port": PLC_PORT,
+        "timeout": MODBUS_REQUEST_TIMEOUT,
+        "slaves": [
+            {"name": "CONVEYOR01", "slave_id": SLAVE_ID, "tag_plan": tag_plan, "scan_class": SENSOR_SCAN_CLASS,
+             "poll_min_interval": POLL_MIN_INTERVAL, "poll_max_interval": POLL_MAX_INTERVAL,
+             "poll_backoff": POLL_BACKOFF, "poll_fast_hold": POLL_FAST_HOLD},
+        ],
+    },
+    # 추가 셀 예:
+    # {"name": "TCP CELL2", "type": "tcp", "host": "192.168.1.3", "port": 502,
+    #  "slaves": [{"name": "CONVEYOR02", "slave_id": 1, "tag_plan": load_tag_map("PLC_TagMap_CELL2.json")}]},
+]
+
+# 센서 태그 변화 시 호출할 OPC UA Method: (설비 이름, 태그) -> (Method Node ID, 표시 이름)
+SENSOR_EVENTS = {
+    ("CONVEYOR01", "M0010"): (SENSOR1_METHOD_NODE_ID, "컨베이어"),
+    ("CONVEYOR01", "M0011"): (SENSOR2_METHOD_NODE_ID, "로봇팔"),
+}
+
+# PLC 라인/슬레이브 구동 객체 (asyncio 네이티브 TCP 전송 계층 + 라인별 우선순위 버스 스케줄러)
+plc_fleet = PlcFleet.from_config(PLC_LINES)
+
+# 첫 번째 라인의 버스: OK/NG 펄스 등 이 클라이언트의 단발성 요청도 같은 큐를 거침
+modbus_client = plc_fleet.lines[0].bus
 
 # -----------------------------------------------------------------------------
 # 🚨 5. OPC UA Subscription Handler 클래스 (OK/NG 기반 JSON 파싱 로직 적용)
@@ -47,44 +127,15 @@ class AnomalyDataHandler:
         print(f"\n*** [{current_time}] 🔴 OPC UA 구독 변화 감지: 수신된 값='{val}' ***")
         
         is_anomaly = None
-        status_code = None
-        raw_val = val
+        # 1~3. JSON 부분({...})의 "Anomaly" 값, JSON이 아니면 문자열 자체를 상태 코드로 간주 (예: "Ready")
+        status_code = message_decoder.decode(ANOMALY_OPCUA_NODE_ID, val)
 
-        if isinstance(raw_val, str):
-            status_str_raw = raw_val.strip()
-            
-            # 1. 수신된 문자열에서 JSON 부분 ({...})만 강제로 추출 시도
-            start_index = status_str_raw.find('{')
-            end_index = status_str_raw.rfind('}')
-            
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                json_part = status_str_raw[start_index : end_index + 1]
-                
-                try:
-                    # 2. 추출된 JSON 부분 파싱
-                    data_dict = json.loads(json_part)
-                    status_code = data_dict.get("Anomaly", None)
-                    print(f"[ANOMALY_SUB] ❗ 상태 문자열에서 JSON 부분만 추출하여 파싱 성공: {json_part}")
-                except json.JSONDecodeError:
-                    # 3. 추출된 부분도 JSON이 아닌 경우, 원본 문자열을 상태 코드로 간주 (예: "Ready")
-                    status_code = status_str_raw
-            else:
-                # 3. JSON 구조가 전혀 없는 경우, 문자열 자체를 상태 코드로 간주 (예: "Ready")
-                status_code = status_str_raw
-
-        elif isinstance(raw_val, dict):
-            # 딕셔너리로 수신된 경우
-            status_code = raw_val.get("Anomaly", None)
-        
         # 4. 상태 코드 (OK/NG)를 불량(True) 또는 정상(False)으로 형 변환
-        if status_code is not None:
-            status_str_upper = str(status_code).upper()
-            
-            if status_str_upper == 'OK':
-                is_anomaly = False  # OK는 정상 (M0021 펄스)
-            elif status_str_upper == 'NG':
-                is_anomaly = True   # NG는 불량 (M0020 펄스)
-            # 다른 문자열(예: 'Ready', 'Error')은 처리하지 않음
+        if status_code == 'OK':
+            is_anomaly = False  # OK는 정상 (M0021 펄스)
+        elif status_code == 'NG':
+            is_anomaly = True   # NG는 불량 (M0020 펄스)
+        # 다른 문자열(예: 'READY', 'ERROR')은 처리하지 않음
         
         
         # 최종 Anomaly 상태 확인 및 펄스 실행
@@ -98,52 +149,17 @@ class AnomalyDataHandler:
              print(f"[ANOMALY_SUB] 유효한 상태 값('OK', 'NG')을 찾지 못했습니다. 최종 상태: {status_code}. 처리 생략.")
 
 
-# --- 2. Modbus TCP 통신 헬퍼 함수 ---
-def _modbus_read_coil(address: int) -> int:
-    """
-    Modbus 코일의 상태를 읽어 1 또는 0을 반환하는 내부 헬퍼 함수.
-    """
-    try:
-        result = modbus_client.read_coils(address=address, count=1, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] 코일 읽기 통신 오류 (A:{address}): {result}")
-            return -1 
-        
-        return 1 if result.bits[0] else 0 
-
-    except ModbusException as e:
-        print(f"[MODBUS] 코일 Modbus 예외 발생 (A:{address}, 연결 끊김 예상): {e}")
-        return -1
-    except Exception as e:
-        print(f"[MODBUS] 코일 예기치 않은 오류 발생 (A:{address}): {e}")
-        return -1
-
-
-def _modbus_read_holding_register(address: int) -> int:
+# --- 2. Modbus TCP 통신 헬퍼 함수 (asyncio 네이티브 전송 계층 사용) ---
+async def _modbus_read_holding_register(address: int) -> int:
     """
     Modbus TCP를 사용하여 Holding Register의 값을 읽어 반환합니다.
     """
-    try:
-        # Holding Register (HR)를 읽습니다.
-        result = modbus_client.read_holding_registers(address=address, count=1, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] HR 읽기 통신 오류 (A:{address}): {result}")
-            return -1 
-        
-        # 읽은 값을 반환
-        return result.registers[0] if result.registers else -1
-
-    except ModbusException as e:
-        print(f"[MODBUS] HR Modbus 예외 발생 (A:{address}, 연결 끊김 예상): {e}")
-        return -1
-    except Exception as e:
-        print(f"[MODBUS] HR 예기치 않은 오류 발생 (A:{address}): {e}")
-        return -1
+    registers = await modbus_client.read_holding_registers(address, 1)
+    # 읽은 값을 반환
+    return registers[0] if registers else -1
 
 
-def _modbus_write_coil(address: int, value: int) -> int:
+async def _modbus_write_coil(address: int, value: int) -> int:
     """
     Modbus 코일의 상태를 1 또는 0으로 설정하는 내부 헬퍼 함수.
     """
@@ -151,38 +167,11 @@ def _modbus_write_coil(address: int, value: int) -> int:
         print(f"[MODBUS] 쓰기 실패 (A:{address}): 유효하지 않은 값 ({value}). 0 또는 1만 허용됩니다.")
         return -1
 
-    try:
-        write_value = True if value == 1 else False
-        # FIX: pymodbus ModbusTcpClient에서 write_single_coil 대신 write_coil을 사용하도록 수정
-        result = modbus_client.write_coil(address=address, value=write_value, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] 코일 쓰기 통신 오류 (A:{address}): {result}")
-            return -1
-        
-        return 0 # 성공
-
-    except ModbusException as e:
-        print(f"[MODBUS] 코일 Modbus 예외 발생 (A:{address}, 연결 끊김 예상): {e}")
-        return -1
-    except Exception as e:
-        # 이 예외는 ModbusTcpClient 객체에 해당 메서드가 없을 때도 발생합니다.
-        print(f"[MODBUS] 코일 예기치 않은 오류 발생 (A:{address}): {e}")
-        return -1
-
+    return await modbus_client.write_coil(address, value == 1)
 
-# --- 3. PLC Coil Read 함수 (기존 함수 유지) ---
-def read_plc_m0010() -> int:
-    """
-    Modbus TCP를 사용하여 M0010 (Coil)의 상태를 읽어 1 또는 0을 반환합니다.
-    """
-    return _modbus_read_coil(M0010_ADDRESS)
 
-def read_plc_m0011() -> int:
-    """
-    Modbus TCP를 사용하여 M0011 (Coil)의 상태를 읽어 1 또는 0을 반환합니다.
-    """
-    return _modbus_read_coil(M0011_ADDRESS)
+# 코일 펄스 엔진 (ON 후 OFF 엣지를 이벤트 루프 타이머로 예약, 스레드/블로킹 없음)
+pulse_engine = PulseEngine(_modbus_write_coil, name="ANOMALY_PULSE")
 
 
 # --- 4. Anomaly 펄스 제어 로직 ---
@@ -200,24 +189,10 @@ async def pulse_coil_on_anomaly(is_anomaly: bool):
         
     print(f"\n[ANOMALY_PULSE] 🚨 {target_name} 코일에 1초 펄스 명령 실행 시작.")
 
-    # ON (1) 설정 및 1초 대기 로직을 별도의 스레드에서 실행하는 래퍼 함수
-    def blocking_pulse():
-        # 1. ON (1) 설정
-        if _modbus_write_coil(target_address, 1) != 0:
-            return -1 # 쓰기 실패
-
-        # 2. 1초 대기 (이 부분이 메인 루프를 블록하지 않도록 to_thread로 감싸짐)
-        time.sleep(1) 
-
-        # 3. OFF (0) 설정
-        if _modbus_write_coil(target_address, 0) != 0:
-            return -1 # 쓰기 실패
-            
-        return 0
-
     try:
-        # Modbus 통신과 time.sleep()이 포함된 blocking_pulse를 별도 스레드에서 실행
-        result = await asyncio.to_thread(blocking_pulse)
+        # ON (1) 설정 후 1초 뒤 OFF (0) - OFF 엣지는 펄스 엔진이 이벤트 루프에서 예약 처리
+        # 펄스 도중 같은 판정이 다시 오면 기존 펄스를 연장합니다.
+        result = await pulse_engine.pulse(target_address, ANOMALY_PULSE_SECONDS)
         
         if result == 0:
             print(f"[ANOMALY_PULSE] ✅ {target_name} 펄스 완료.")
@@ -235,16 +210,17 @@ async def pulse_coil_on_anomaly(is_anomaly: bool):
 async def call_method_with_plc_data(client: Client, method_node_id: str, sensor_check: bool):
     """M0010/M0011 상태를 OPC UA 서버에 Method로 전송합니다."""
     try:
-        obj_node = client.get_node(OBJECT_NODE_ID)
-        method_node = client.get_node(method_node_id) 
+        # 연결 시 해석/등록해 둔 노드 핸들 사용 (캐시에 없으면 설정 NodeId)
+        obj_node = node_cache.get(client, OBJECT_NODE_ID)
+        method_node = node_cache.get(client, method_node_id)
 
         # Method 호출을 위한 입력 인자 설정 (Boolean 값)
         arguments = [
             ua.Variant(sensor_check, ua.VariantType.Boolean) 
         ]
         
-        # Method 호출
-        result = await obj_node.call_method(method_node, *arguments)
+        # Method 호출 (같은 수집 창의 다른 호출과 함께 Call 요청 하나로 전송)
+        result = await method_batcher.call(client, obj_node, method_node, *arguments)
         
         # 성공 시: Method Node ID와 서버 응답 결과 반환
         return method_node_id, result
@@ -256,15 +232,40 @@ async def call_method_with_plc_data(client: Client, method_node_id: str, sensor_
         return method_node_id, (False, error_message)
 
 
+# --- 6-1. 센서 상태 변화 처리 (슬레이브 스캐너 콜백) ---
+async def handle_sensor_change(client: Client, scanner, tag_name: str, value: int):
+    """슬레이브 스캐너가 감지한 센서 태그 변화를 OPC UA Method로 전송합니다."""
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    state_desc = "ON (True)" if value == 1 else "OFF (False)"
+
+    event = SENSOR_EVENTS.get((scanner.name, tag_name))
+    if event is None:
+        print(f"\n*** [{current_time}] 🔔 {scanner.name} 상태 변화 감지: {tag_name} -> {state_desc} ***")
+        return
+    method_node_id, label = event
+
+    print(f"\n*** [{current_time}] 🔔 {label} 상태 변화 감지: {tag_name} -> {state_desc} ***")
+
+    # Method 호출 및 결과 수신
+    method_node_id, result = await call_method_with_plc_data(client, method_node_id, value == 1)
+
+    is_success, status_message = result
+    method_name = method_node_id.split(';')[-1]
+
+    if is_success:
+        print(f"✅ {tag_name} -> OPC UA 호출 성공 ({method_name})")
+        print(f"   -> 서버 응답: Success={is_success}, Message='{status_message}'")
+    else:
+        print(f"❌ {tag_name} -> OPC UA 호출 실패 ({method_node_id})")
+        print(f"   -> 오류 상세: {status_message}")
+
+
 # --- 7. 메인 실행 함수 (OPC UA 구독 로직 적용) ---
 async def main():
     opcua_client = Client(url=SERVER_URL)
     
     print(f"OPC UA 서버 접속 시도: {SERVER_URL}")
 
-    last_m0010_value = -2  # 이전 M0010 값을 저장 (컨베이어)
-    last_m0011_value = -2  # 이전 M0011 값을 저장 (로봇팔)
-
     try:
         # 1. OPC UA 연결 시도 (재시도 로직 추가)
         connected = False
@@ -286,8 +287,9 @@ async def main():
         if not connected:
             return # 연결 실패 시 종료
 
-        # 2. Modbus 클라이언트 연결 시도 
-        if not modbus_client.connect():
+        # 2. Modbus 클라이언트 연결 시도 (모든 라인, 첫 번째 라인은 필수)
+        await plc_fleet.connect()
+        if not plc_fleet.lines[0].transport.connected:
             print(f"🚨 Modbus 연결 실패: {PLC_IP}:{PLC_PORT}를 확인하세요.")
             return  # 연결 실패 시 메인 함수 종료
         print(f"🎉 Modbus 연결 성공: {PLC_IP}:{PLC_PORT}")
@@ -295,107 +297,29 @@ async def main():
         # ---------------------------------------------------------------------
         # 🚨 3. OPC UA Anomaly 상태 구독 시작 (비동기 데이터 수신)
         # ---------------------------------------------------------------------
-        handler = AnomalyDataHandler()
-        sub = await opcua_client.create_subscription(100, handler) # 100ms 샘플링 간격
-        
-        # AMR 구독 노드 가져오기
-        try:
-            # amr_subscriber에서 사용된 경로를 직접 탐색하는 방식
-            anomaly_node = await opcua_client.nodes.root.get_child([
-                "0:Objects",
-                "2:PLC",
-                "2:read_ok_ng_value"
-            ])
-            print(f"✅ AMR 노드 경로 탐색 성공: {await anomaly_node.read_browse_name()}")
-            
-        except Exception as e:
-            # 예시 ID를 사용하여 노드 가져오기 시도
-            try:
-                 anomaly_node = opcua_client.get_node(ANOMALY_OPCUA_NODE_ID)
-                 print(f"✅ ANOMALY_OPCUA_NODE_ID ({ANOMALY_OPCUA_NODE_ID})로 노드 가져오기 성공.")
-            except Exception:
-                 print(f"❌ AMR 노드 탐색 실패: AMR 경로 및 ANOMALY_OPCUA_NODE_ID ({ANOMALY_OPCUA_NODE_ID}) 모두 유효하지 않습니다.")
-                 print(f"   오류 상세: {e.__class__.__name__} - {e}")
-                 # 구독을 시작하지 않고 메인 루프 계속
-                 anomaly_node = None
-
-
-        if anomaly_node:
-            await sub.subscribe_data_change(anomaly_node)
-            # FIX: read_node_id 대신 .nodeid 속성 사용 (AttributeError 해결)
-            print(f"✅ OPC UA 구독 시작: {anomaly_node.nodeid}")
-        else:
+        # AMR 구독 노드: 노드 캐시가 "0:Objects/2:PLC/2:read_ok_ng_value" 경로를 다른 노드와 함께
+        # 한 번에 해석해 둠 (경로 해석 실패 시 ANOMALY_OPCUA_NODE_ID 사용)
+        await node_cache.resolve(opcua_client)
+
+        sub = SubscriptionManager(opcua_client, SUBSCRIPTION_PUBLISH_INTERVAL, node_resolver=node_cache.get)
+        sub.add(ANOMALY_OPCUA_NODE_ID, AnomalyDataHandler(), **ANOMALY_ITEM_OPTIONS)
+        if not await sub.start():
             print("⚠️ OPC UA 구독을 시작할 유효한 노드를 찾지 못했습니다. Anomaly 펄스 기능이 작동하지 않습니다.")
         # ---------------------------------------------------------------------
 
-        # 0.2초마다 PLC 데이터 읽기 (M0010/M0011 폴링 유지)
-        while True:
-            # 1. PLC 데이터 읽기
-            current_m0010_value = await asyncio.to_thread(read_plc_m0010)
-            current_m0011_value = await asyncio.to_thread(read_plc_m0011)
-            
-            current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-
-            # =================================================================
-            # 2. M0010 상태 변화 감지 로직 (컨베이어 센서)
-            # =================================================================
-            if current_m0010_value != -1 and current_m0010_value != last_m0010_value:
-                
-                sensor_check_conveyor = current_m0010_value == 1
-                state_desc = "ON (True)" if current_m0010_value == 1 else "OFF (False)"
-                
-                print(f"\n*** [{current_time}] 🔔 컨베이어 상태 변화 감지: M0010 -> {state_desc} ***")
-                
-                # Method 호출 및 결과 수신
-                method_node_id, result = await call_method_with_plc_data(opcua_client, SENSOR1_METHOD_NODE_ID, sensor_check_conveyor)
-                
-                # M0010 전용 출력 로직
-                is_success, status_message = result
-                method_name = SENSOR1_METHOD_NODE_ID.split(';')[-1]
-                
-                if is_success:
-                    print(f"✅ M0010 -> OPC UA 호출 성공 ({method_name})")
-                    print(f"   -> 서버 응답: Success={is_success}, Message='{status_message}'")
-                else:
-                    print(f"❌ M0010 -> OPC UA 호출 실패 ({method_node_id})")
-                    print(f"   -> 오류 상세: {status_message}")
-
-                # 이전 상태 업데이트
-                last_m0010_value = current_m0010_value
-                
-            # =================================================================
-            # 3. M0011 상태 변화 감지 로직 (로봇팔 센서)
-            # =================================================================
-            if current_m0011_value != -1 and current_m0011_value != last_m0011_value:
-                
-                sensor_check_robotarm = current_m0011_value == 1
-                state_desc = "ON (True)" if current_m0011_value == 1 else "OFF (False)"
-
-                print(f"\n*** [{current_time}] 🔔 로봇팔 상태 변화 감지: M0011 -> {state_desc} ***")
-                
-                # Method 호출 및 결과 수신
-                method_node_id, result = await call_method_with_plc_data(opcua_client, SENSOR2_METHOD_NODE_ID, sensor_check_robotarm) 
-                
-                # M0011 전용 출력 로직
-                is_success, status_message = result
-                method_name = SENSOR2_METHOD_NODE_ID.split(';')[-1]
-                
-                if is_success:
-                    print(f"✅ M0011 -> OPC UA 호출 성공 ({method_name})")
-                    print(f"   -> 서버 응답: Success={is_success}, Message='{status_message}'")
-                else:
-                    print(f"❌ M0011 -> OPC UA 호출 실패 ({method_node_id})")
-                    print(f"   -> 오류 상세: {status_message}")
-                
-                # 이전 상태 업데이트
-                last_m0011_value = current_m0011_value
-            
-            # =================================================================
-            # 4. Anomaly 상태 감지 로직 (Modbus 폴링 제거됨 - 이제 구독이 처리)
-            # =================================================================
-
-            # 짧은 대기 시간 설정 (0.2초)
-            await asyncio.sleep(0.1)
+        # 슬레이브별 독립 스캔 루프 (적응형 주기, 블록 스캔: 인접 코일은 한 번의 Modbus 프레임으로 읽음)
+        # Anomaly 상태 감지는 Modbus 폴링 대신 OPC UA 구독이 처리
+        # 스캐너는 변화를 송신 큐에 넣기만 하므로 OPC UA 왕복이 스캔 주기를 늦추지 않음
+        outbound = OutboundQueue(
+            lambda key, value: handle_sensor_change(opcua_client, *key, value),
+            maxsize=OUTBOUND_QUEUE_SIZE, workers=OUTBOUND_WORKERS, overflow=OUTBOUND_OVERFLOW, name="SENSOR OUT",
+        )
+        outbound.start()
+        scan_tasks = plc_fleet.start(
+            lambda scanner, tag_name, value: outbound.put((scanner, tag_name), value)
+        )
+        print(f"--- 센서 스캔 루프 시작: 슬레이브 {len(plc_fleet.scanners)}개 ---")
+        await asyncio.gather(*scan_tasks)
 
     except ConnectionRefusedError:
         print(f"🚨 OPC UA 연결 거부: 서버 주소 {SERVER_URL}를 확인하세요.")
@@ -403,19 +327,24 @@ async def main():
         print(f"🚨 예상치 못한 오류 발생: {e.__class__.__name__} - {e}")
     finally:
         # 연결 종료
+        if 'outbound' in locals():
+            # 남은 센서 보고를 OPC UA 연결이 살아 있는 동안 전송
+            await outbound.stop()
         try:
             # 구독 해지
             if 'sub' in locals():
-                await sub.delete()
+                await sub.stop()
                 print("\nOPC UA 구독 해지.")
-            
+
+            await node_cache.release(opcua_client)
             await opcua_client.disconnect()
             print("OPC UA 연결 종료.")
         except Exception:
             pass
             
         try:
-            modbus_client.close()
+            await pulse_engine.stop()
+            await plc_fleet.stop()
             print("Modbus 연결 종료.")
         except Exception:
             pass
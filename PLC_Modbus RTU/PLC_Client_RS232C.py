@@ -1,15 +1,35 @@
 import asyncio
+import functools
 from asyncua import Client, ua
-from pymodbus.client import ModbusSerialClient
-from pymodbus.exceptions import ModbusException
 from pymodbus.payload import BinaryPayloadBuilder, Endian
 import time
-import json 
+import os
 import sys
 
 
 # 🚨 1. DB 인서터 Import (PLC_DateBase.py 파일이 같은 폴더에 있어야 합니다)
-from PLC_DataBase import insert_log_sync, select_data_sync
+from PLC_DataBase import db_pool, statement_cache
+from PLC_DataBaseAsync import async_db, ASYNC_DB_AVAILABLE
+from PLC_ControlState import ControlStateRepository
+from PLC_LogWriter import LogWriter
+from PLC_LogSpool import LogSpool, SpooledDatabaseWriter, CircuitBreaker
+from PLC_LogRollup import LogRollupJob
+from PLC_Telemetry import (
+    TelemetryRecorder, TELEMETRY_TABLE, TELEMETRY_COLUMNS, ensure_telemetry_schema, insert_telemetry_sync,
+)
+from PLC_TagMap import load_tag_map
+from PLC_WriteCache import RegisterWriteCache
+from PLC_PulseEngine import PulseEngine
+from PLC_AdaptivePoll import AdaptivePoller
+from PLC_MultiLine import PlcFleet
+from PLC_OutboundQueue import OutboundQueue, OVERFLOW_COALESCE
+from PLC_NodeCache import NodeCache
+from PLC_MethodBatcher import MethodCallBatcher
+from PLC_SubscriptionManager import SubscriptionManager
+from PLC_MessageDecoder import MessageDecoder, ANOMALY_SCHEMA, COMMAND_SCHEMA
+from PLC_BusScheduler import (
+    PRIORITY_SAFETY, PRIORITY_SORT, PRIORITY_POLL, PRIORITY_SETPOINT,
+)
 
 # --- 1. 설정 정보 (사용자 환경에 맞게 반드시 수정) ---
 # OPC UA 서버 설정 (기존 설정 유지)
@@ -26,42 +46,212 @@ SERIAL_PORT = 'COM6'
 BAUDRATE = 115200
 PARITY = 'N'
 STOPBITS = 1
-CONVEYOR_SENSOR_ADDRESS = 64      # M0040 Coil Address (컨베이어 센서 - Read)
-ROBOTARM_SENSOR_ADDRESS = 65      # M0041 Coil Address (로봇팔 센서 - Read)
 SLAVE_ID = 3            
 
-# Anomaly 처리 관련 설정 (기존 설정 유지)
-ANOMALY_OPCUA_NODE_ID = "ns=2;s=read_ok_ng_value" 
-PLC_WRITE_COIL_NG = 66      # M0042 코일 주소 (NG/불량 시 펄스)
-PLC_WRITE_COIL_OK = 67      # M0043 코일 주소 (OK/정상 시 펄스)
+# 💡 태그 맵: M 코일/D 레지스터 주소, 타입, 스캔 클래스, 방향은 PLC_TagMap_RS232C.json에서 관리
+# 같은 스캔 클래스의 태그 중 주소 간격이 SCAN_MAX_GAP 이하인 것은 한 번의 Modbus 요청으로 읽음
+TAG_MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PLC_TagMap_RS232C.json")
+SCAN_MAX_GAP = 8
+SENSOR_SCAN_CLASS = "fast"      # 센서 스캔 루프가 읽는 스캔 클래스
+tag_plan = load_tag_map(TAG_MAP_FILE, max_gap=SCAN_MAX_GAP)
 
-# conveyor_move 명령 송신용 코일 (PLC Write) (기존 설정 유지)
-PLC_WRITE_COIL_CONVEYOR_MOVE = 68 # M0081 Coil Address (conveyor_move 요청 신호 - Write)
+CONVEYOR_SENSOR_ADDRESS = tag_plan.address("M0040")      # 컨베이어 센서 (Read)
+ROBOTARM_SENSOR_ADDRESS = tag_plan.address("M0041")      # 로봇팔 센서 (Read)
 
-# 💡 [핵심] 컨베이어 벨트 제어 D 레지스터 및 M 코일 주소
-# D 레지스터 주소 (Word/정수형 하나만 사용)
-D102_FREQ_ADDR_WORD = 0         # D102 주소 (Frequency, 예시: 101)
-D104_ACCEL_ADDR = 2             # D104 주소 (Acceleration, 예시: 103)
-D105_DECEL_ADDR = 3             # D105 주소 (Deceleration, 예시: 104)
+# 이 클라이언트가 제어(D 레지스터/정지·재개 코일)하는 주 설비 이름 (PLC_LINES의 첫 번째 슬레이브)
+PRIMARY_EQUIPMENT_ID = 'CONVEYOR01'
+
+# Anomaly 처리 관련 설정 (기존 설정 유지)
+ANOMALY_OPCUA_NODE_ID = "ns=2;s=read_ok_ng_value" 
+PLC_WRITE_COIL_NG = tag_plan.address("M0042")      # NG/불량 시 펄스
+PLC_WRITE_COIL_OK = tag_plan.address("M0043")      # OK/정상 시 펄스
+
+# conveyor_move 명령 송신용 코일 (PLC Write)
+PLC_WRITE_COIL_CONVEYOR_MOVE = tag_plan.address("M0081")   # conveyor_move 요청 신호 (Write)
+
+# 💡 OPC UA 노드 핸들 캐시: 아래 노드들을 연결 직후 한 번의 TranslateBrowsePathsToNodeIds로 해석하고
+#    RegisterNodes로 등록. 해석 결과는 NODE_CACHE_FILE에 저장되어 재시작/재연결 시 브라우징을 생략함
+NODE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opcua_nodes_rs232c.json")
+OPCUA_BROWSE_PATHS = {
+    OBJECT_NODE_ID: ["0:Objects", "2:PLC"],
+    SENSOR1_METHOD_NODE_ID: ["0:Objects", "2:PLC", "2:write_conveyor_sensor_check"],
+    SENSOR2_METHOD_NODE_ID: ["0:Objects", "2:PLC", "2:write_robotarm_sensor_check"],
+    ANOMALY_OPCUA_NODE_ID: ["0:Objects", "2:PLC", "2:read_ok_ng_value"],
+    CMOVE_COMMAND_NODE_ID: ["0:Objects", "2:PLC", "2:read_ready_state"],
+}
+node_cache = NodeCache(OPCUA_BROWSE_PATHS, cache_file=NODE_CACHE_FILE)
+
+# 💡 OPC UA 구독: Anomaly/HMI 명령 항목을 Subscription 하나에 담음 (Publish 주기 ms)
+#    항목별 sampling_interval(ms)/queue_size: Publish 사이에 여러 번 바뀐 값도 서버 큐에 보관되어 순서대로 전달
+SUBSCRIPTION_PUBLISH_INTERVAL = 100
+ANOMALY_ITEM_OPTIONS = {"name": "Anomaly", "sampling_interval": 50, "queue_size": 10}
+CMOVE_ITEM_OPTIONS = {"name": "HMI 명령", "sampling_interval": 50, "queue_size": 5}
+# 구독 알림 값 디코더: 노드별 스키마 (JSON 키 조회, "Ready"/"OK"/"NG" 빠른 경로, 결과 캐시)
+message_decoder = MessageDecoder({
+    ANOMALY_OPCUA_NODE_ID: ANOMALY_SCHEMA,
+    CMOVE_COMMAND_NODE_ID: COMMAND_SCHEMA,
+})
+
+# 💡 [핵심] 컨베이어 벨트 제어 D 레지스터 태그 (Word/정수형 하나만 사용)
+CONVEYOR_PARAM_TAGS = ("D102", "D104", "D105")      # 주파수 / 가속 / 감속
+
+# D 레지스터 쓰기 캐시: 값이 바뀐 경우에만 쓰고, 이 주기(초)마다 같은 값이라도 강제 재기록
+REGISTER_REFRESH_INTERVAL = 30.0
+
+# 컨베이어 파라미터 세트는 실제로 연속된 주소끼리만 FC16 한 프레임으로 씁니다 (D102 / D104~D105 두 프레임).
+# D103은 건드리지 않으며, PLC 프로그램에서 미사용임을 확인한 경우에만 태그 맵의 register_gap_values로 채울 수 있습니다.
+
+# 코일 펄스 유지 시간 (초)
+ANOMALY_PULSE_SECONDS = 1.0     # OK/NG 펄스 (M0042/M0043)
+DIRECTION_PULSE_SECONDS = 0.05  # 방향 명령 펄스 (M202/M203)
 
 # M 코일 주소 (정지 및 방향 명령)
-M200_STOP_CMD_ADDR = 0      # M200 (정지 명령 코일)
-M201_RESTART_CMD_ADDR = 3   # 💡 M201 (운행 재개 명령 코일) - M203 다음 주소로 가정
-M202_FORWARD_CMD_ADDR = 1   # M202 (정방향 명령 코일)
-M203_REVERSE_CMD_ADDR = 2   # M203 (역방향 명령 코일)
+M200_STOP_CMD_ADDR = tag_plan.address("M200")       # 정지 명령 코일
+M201_RESTART_CMD_ADDR = tag_plan.address("M201")    # 💡 운행 재개 명령 코일
+M202_FORWARD_CMD_ADDR = tag_plan.address("M202")    # 정방향 명령 코일
+M203_REVERSE_CMD_ADDR = tag_plan.address("M203")    # 역방향 명령 코일
+
+# 적응형 폴링 주기 (초): 변화 직후/컨베이어 동작 중에는 최소 주기,
+# 변화 없이 정지(STOP) 상태가 이어지면 POLL_BACKOFF 배씩 늘려 최대 주기까지 물러남
+POLL_MIN_INTERVAL = 0.05
+POLL_MAX_INTERVAL = 1.0
+POLL_BACKOFF = 2.0
+POLL_FAST_HOLD = 2.0                # 마지막 변화 후 최소 주기를 유지하는 시간
+POLL_IDLE_RUN_MODES = {"STOP"}      # 이 run_mode에서만 backoff 허용
+
+# plc_control_state 감시: PLC_LINES의 모든 설비를 IN (...) 쿼리 하나로 함께 조회 (버전 컬럼만 먼저 조회하고,
+# 바뀐 설비의 행만 다시 조회). 메인 루프와 pulse_coil_on_conveyor_move*는 DB 대신 control_state 캐시를 읽음
+CONTROL_STATE_VERSION_COLUMN = "updated_at"
+CONTROL_STATE_FULL_REFRESH = 30.0   # 버전과 무관하게 전체 행을 다시 읽는 주기 (초)
+CONTROL_STATE_TTL = POLL_MIN_INTERVAL   # 이 시간(초) 안의 갱신 요청은 공유 스냅샷을 그대로 사용
 
 # OPC UA 연결 재시도 횟수 설정
 MAX_RETRY = 5
 
-# Modbus 클라이언트 객체 초기화 (기존 코드 유지)
-modbus_client = ModbusSerialClient(
-    port=SERIAL_PORT, 
-    baudrate=BAUDRATE,
-    parity=PARITY,
-    stopbits=STOPBITS,
-    timeout=1 
+# Modbus 요청 하나당 타임아웃 (초)
+MODBUS_REQUEST_TIMEOUT = 1.0
+
+# 센서 변화 -> OPC UA 보고 송신 큐: 스캔 루프는 큐에 넣기만 하고 송신 워커가 Method를 호출
+# 큐가 가득 차면 같은 태그의 대기 항목을 최신 값으로 합침 (OVERFLOW_BLOCK이면 스캐너가 대기)
+OUTBOUND_QUEUE_SIZE = 64
+# 워커들이 동시에 낸 Method 호출은 METHOD_BATCH_WINDOW 동안 모여 Call 요청 하나로 전송되므로
+# 한 스캔에서 여러 센서가 바뀌어도 OPC UA 왕복은 한 번 (워커 수 = 한 요청에 담길 수 있는 최대 호출 수)
+OUTBOUND_WORKERS = 4
+OUTBOUND_OVERFLOW = OVERFLOW_COALESCE
+METHOD_BATCH_WINDOW = 0.005
+method_batcher = MethodCallBatcher(window=METHOD_BATCH_WINDOW)
+
+# mission_plc_logs 일괄 기록: 로그는 버퍼에 쌓였다가 LOG_FLUSH_ROWS행 또는 LOG_FLUSH_INTERVAL초마다
+# 한 트랜잭션(executemany)으로 기록됨. 포착 시각이 기록 순서대로 증가하므로 순서를 위한 sleep 불필요
+LOG_FLUSH_ROWS = 100
+LOG_FLUSH_INTERVAL = 0.5
+# MySQL 기록 실패/장애 시 로그는 로컬 SQLite 스풀에 보관되고, 복구되면 재전송기가 순서대로 옮김
+# (MySQL이 데이터 오류로 거부한 행은 스풀 파일의 log_dead_letter 테이블로 옮김)
+# MySQL이 LOG_BREAKER_FAILURES회 연속 실패하면 LOG_BREAKER_RESET초 동안 시도하지 않고 바로 스풀에 기록
+LOG_SPOOL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plc_log_spool.db")
+LOG_BREAKER_FAILURES = 3
+LOG_BREAKER_RESET = 10.0
+# DB 접근 방식: True면 aiomysql 비동기 풀로 제어 상태 조회/로그 기록 (기본 스레드 풀을 점유하지 않음)
+# aiomysql이 설치되어 있지 않으면 pymysql + asyncio.to_thread로 동작
+DB_ASYNC = True
+USE_ASYNC_DB = DB_ASYNC and ASYNC_DB_AVAILABLE
+log_sink = SpooledDatabaseWriter(
+    LogSpool(LOG_SPOOL_FILE),
+    CircuitBreaker(failure_threshold=LOG_BREAKER_FAILURES, reset_timeout=LOG_BREAKER_RESET),
+    insert_async=async_db.insert_logs_status if USE_ASYNC_DB else None,
+)
+log_writer = LogWriter(flush_rows=LOG_FLUSH_ROWS, flush_interval=LOG_FLUSH_INTERVAL, writer=log_sink.write_async)
+
+# mission_plc_logs 분/시간 롤업 (대시보드 조회용): LOG_ROLLUP_INTERVAL초마다 새 로그만 증분 반영
+# (여러 클라이언트에서 켜도 최고 수위 행 잠금으로 중복 반영되지 않음)
+LOG_ROLLUP_ENABLED = True
+LOG_ROLLUP_INTERVAL = 60.0
+log_rollup = LogRollupJob(interval=LOG_ROLLUP_INTERVAL)
+
+# 태그 시계열 텔레메트리 (plc_telemetry): 센서(M0040/M0041), 설정값(D102/D104/D105), run_mode를
+# 값이 바뀔 때 + TELEMETRY_KEYFRAME초마다 기록. TELEMETRY_FLUSH_ROWS행 또는 TELEMETRY_FLUSH_INTERVAL초마다 다중 행 INSERT
+TELEMETRY_KEYFRAME = 60.0
+TELEMETRY_FLUSH_ROWS = 2000
+TELEMETRY_FLUSH_INTERVAL = 2.0
+telemetry = TelemetryRecorder(
+    keyframe_interval=TELEMETRY_KEYFRAME,
+    flush_rows=TELEMETRY_FLUSH_ROWS,
+    flush_interval=TELEMETRY_FLUSH_INTERVAL,
+    writer=(functools.partial(async_db.insert_rows, TELEMETRY_TABLE, TELEMETRY_COLUMNS)
+            if USE_ASYNC_DB else insert_telemetry_sync),
 )
 
+# 센서 폴링 요청이 이 시간(초) 안에 버스를 잡지 못하면 오래된 요청으로 보고 버림
+POLL_DEADLINE = 0.5
+# 버스 스케줄러 클래스별 대기 시간 통계 출력 주기 (초)
+BUS_METRICS_INTERVAL = 60.0
+
+# 다중 PLC/슬레이브 구성: 물리 버스(라인)마다 슬레이브 목록을 정의합니다.
+# 라인마다 독립 버스 스케줄러가, 슬레이브마다 독립 스캔 루프가 동작합니다.
+# 첫 번째 라인의 첫 번째 슬레이브가 이 클라이언트의 주 설비(PRIMARY_EQUIPMENT_ID)입니다.
+PLC_LINES = [
+    {
+        "name": "RTU BUS",
+        "type": "rtu",
+        "port": SERIAL_PORT,
+        "baudrate": BAUDRATE,
+        "parity": PARITY,
+        "stopbits": STOPBITS,
+        "timeout": MODBUS_REQUEST_TIMEOUT,
+        "slaves": [
+            {"name": PRIMARY_EQUIPMENT_ID, "slave_id": SLAVE_ID, "tag_plan": tag_plan, "scan_class": SENSOR_SCAN_CLASS,
+             "poll_min_interval": POLL_MIN_INTERVAL, "poll_max_interval": POLL_MAX_INTERVAL,
+             "poll_backoff": POLL_BACKOFF, "poll_fast_hold": POLL_FAST_HOLD},
+            # 같은 RTU 라인의 추가 슬레이브 예:
+            # {"name": "CONVEYOR02", "slave_id": 4, "tag_plan": tag_plan, "timeout": 0.3},
+        ],
+    },
+    # 추가 TCP 셀 예:
+    # {"name": "TCP CELL2", "type": "tcp", "host": "192.168.1.3", "port": 502,
+    #  "slaves": [{"name": "CONVEYOR03", "slave_id": 1, "tag_plan": load_tag_map("PLC_TagMap_CELL2.json")}]},
+]
+
+# 센서 태그 변화 시 처리 내용: (설비 이름, 태그) -> OPC UA Method / DB 로그 설정
+SENSOR_EVENTS = {
+    (PRIMARY_EQUIPMENT_ID, "M0040"): {
+        "label": "컨베이어",
+        "method_node_id": SENSOR1_METHOD_NODE_ID,
+        "log_equipment_id": 'SENSER01',
+        "log_desc": "Conveyor_Sensor_Check OK",
+    },
+    (PRIMARY_EQUIPMENT_ID, "M0041"): {
+        "label": "로봇팔",
+        "method_node_id": SENSOR2_METHOD_NODE_ID,
+        "log_equipment_id": 'SENSER02',
+        "log_desc": "RobotArm_Sensor_Check OK",
+    },
+}
+
+# 폴링 루프가 갱신하는 현재 제어 상태 (스캐너의 적응형 주기 판단에 사용)
+conveyor_state = {"run_mode": "STOP"}
+
+# PLC 라인/슬레이브 구동 객체 (asyncio 네이티브 전송 계층 + 라인별 우선순위 버스 스케줄러)
+plc_fleet = PlcFleet.from_config(
+    PLC_LINES,
+    default_deadlines={PRIORITY_POLL: POLL_DEADLINE},
+    is_active=lambda: conveyor_state["run_mode"] not in POLL_IDLE_RUN_MODES,
+)
+
+# 모든 라인/슬레이브 설비의 제어 상태를 함께 관리하는 저장소와 주 설비 뷰
+control_repo = ControlStateRepository(
+    [slave["name"] for line in PLC_LINES for slave in line["slaves"]],
+    version_column=CONTROL_STATE_VERSION_COLUMN,
+    ttl=CONTROL_STATE_TTL,
+    full_refresh_interval=CONTROL_STATE_FULL_REFRESH,
+    select=async_db.select_data if USE_ASYNC_DB else None,
+)
+control_state = control_repo.watcher(PRIMARY_EQUIPMENT_ID)
+
+# 주 설비 라인의 RTU 버스 소유 스케줄러: 모든 Modbus 요청은 우선순위 큐를 거쳐 하나씩 실행됨
+# (정지/재개 명령 > OK/NG 펄스 > 센서 폴링 > 설정값 갱신)
+modbus_transport = plc_fleet.lines[0].transport
+modbus_client = plc_fleet.lines[0].bus
+
 # -----------------------------------------------------------------------------
 # 🚨 5. OPC UA Subscription Handler 클래스 (Anomaly)
 # -----------------------------------------------------------------------------
@@ -69,43 +259,18 @@ class AnomalyDataHandler:
     def datachange_notification(self, node, val, data):
         current_time = time.strftime("%Y-%m-%d %H:%M:%S")
         
-        # 1. 수신 로그 및 파싱
+        # 1. 수신 로그 및 디코딩
         print(f"\n--- ## OPC UA: Anomaly 상태 변화 감지 ## ---")
         print(f"[{current_time}] [OPC UA] 🔔 Anomaly 데이터 수신: {val}")
         
         is_anomaly = None
-        status_code = None
-        raw_val = val
+        status_code = message_decoder.decode(ANOMALY_OPCUA_NODE_ID, val)
 
-        if isinstance(raw_val, str):
-            status_str_raw = val.strip()
-            start_index = status_str_raw.find('{')
-            end_index = status_str_raw.rfind('}')
-            
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                json_part = status_str_raw[start_index : end_index + 1]
-                
-                try:
-                    data_dict = json.loads(json_part)
-                    status_code = data_dict.get("Anomaly", None)
-                    print(f"[OPC UA] ➡️ JSON 파싱 성공: {json_part}")
-                except json.JSONDecodeError:
-                    status_code = status_str_raw
-            else:
-                status_code = status_str_raw
-
-        elif isinstance(raw_val, dict):
-            status_code = raw_val.get("Anomaly", None)
-        
-        
         # 2. 상태 코드 확인 및 펄스 명령 준비
-        if status_code is not None:
-            status_str_upper = str(status_code).upper()
-            
-            if status_str_upper == 'OK':
-                is_anomaly = False
-            elif status_str_upper == 'NG':
-                is_anomaly = True
+        if status_code == 'OK':
+            is_anomaly = False
+        elif status_code == 'NG':
+            is_anomaly = True
         
         
         # 3. 최종 Anomaly 상태 확인 및 펄스 실행
@@ -142,31 +307,15 @@ class CMoveDataHandler:
         # print(f"\n--- ## OPC UA: HMI 명령 수신 ## ---")
         # print(f"[{current_time}] [HMI SUB] 🔔 명령 데이터 수신: {val}")
         
-        command_key_value = None
-        
-        # 1. 수신된 문자열에서 JSON 부분 추출 및 파싱
-        if isinstance(val, str):
-            status_str_raw = val.strip()
-            start_index = status_str_raw.find('{')
-            end_index = status_str_raw.rfind('}')
-            
-            if start_index != -1 and end_index != -1 and end_index > start_index:
-                json_part = status_str_raw[start_index : end_index + 1]
-                
-                try:
-                    data_dict = json.loads(json_part)
-                    
-                    if "state" in data_dict:
-                        command_key_value = data_dict["state"].upper()
-                    elif "move_command" in data_dict:
-                        command_key_value = data_dict["move_command"].upper()
-                    else:
-                        command_key_value = None 
-
-                except json.JSONDecodeError:
-                    command_key_value = None
-        
+        # 1. 수신된 문자열에서 "state" 또는 "move_command" 값 추출 (JSON이 아니면 None)
+        command_key_value = message_decoder.decode(CMOVE_COMMAND_NODE_ID, val)
+
         # 2. 명령 종류 확인 및 처리
+        if command_key_value is not None:
+            # 명령 수신 직후에는 센서 변화가 뒤따르므로 빠른 폴링으로 전환
+            poller.kick()
+            plc_fleet.kick()
+
         if command_key_value == 'CONVEYOR_MOVE':
             # 🚨 [수정된 핵심 로직 1] '정지' 상태일 때 '수동 시작' 무시 로직 적용
             # print(f"[HMI SUB] ➡️ 명령 인식: CONVEYOR_MOVE (수동 시작). 조건부 실행.")
@@ -189,73 +338,29 @@ class CMoveDataHandler:
             pass
 
 
-# --- 2. Modbus RTU 통신 헬퍼 함수 (가독성 수정) ---
-def _modbus_read_coil(address: int) -> int:
-    """Modbus 코일의 상태를 읽어 1 또는 0을 반환합니다."""
-    try:
-        result = modbus_client.read_coils(address=address, count=1, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] ❌ 코일 읽기 통신 오류 (A: {address}): {result}", file=sys.stderr)
-            return -1 
-        
-        return 1 if result.bits[0] else 0 
-
-    except ModbusException as e:
-        print(f"[MODBUS] ❌ Modbus 예외 발생 (A: {address}, 연결 끊김 예상): {e}", file=sys.stderr)
-        return -1
-    except Exception as e:
-        print(f"[MODBUS] ❌ 코일 읽기 예기치 않은 오류 (A: {address}): {e}", file=sys.stderr)
-        return -1
-
-
-def _modbus_write_coil(address: int, value: int) -> int:
-    """Modbus 코일의 상태를 1 또는 0으로 설정합니다."""
+# --- 2. Modbus RTU 통신 헬퍼 함수 (asyncio 네이티브 전송 계층 사용) ---
+async def _modbus_write_coil(address: int, value: int, priority: int = PRIORITY_SAFETY) -> int:
+    """Modbus 코일의 상태를 1 또는 0으로 설정합니다. (기본: 제어 명령 우선순위)"""
     if value not in [0, 1]:
         print(f"[MODBUS] ❌ 쓰기 실패 (A: {address}): 유효하지 않은 값 ({value}). 0 또는 1만 허용됩니다.", file=sys.stderr)
         return -1
 
-    try:
-        write_value = True if value == 1 else False
-        result = modbus_client.write_coil(address=address, value=write_value, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] ❌ 코일 쓰기 통신 오류 (A: {address}): {result}", file=sys.stderr)
-            return -1
-        
-        return 0 # 성공
+    return await modbus_client.write_coil(address, value == 1, priority=priority)
 
-    except ModbusException as e:
-        print(f"[MODBUS] ❌ Modbus 예외 발생 (A: {address}, 연결 끊김 예상): {e}", file=sys.stderr)
-        return -1
-    except Exception as e:
-        print(f"[MODBUS] ❌ 코일 쓰기 예기치 않은 오류 (A: {address}): {e}", file=sys.stderr)
-        return -1
-
-def _modbus_write_float(address: int, value: float) -> int:
+async def _modbus_write_float(address: int, value: float, priority: int = PRIORITY_SETPOINT) -> int:
     """Modbus Holding Register에 Float(실수) 값을 2개 워드(D 레지스터 2개)로 설정합니다."""
     try:
         builder = BinaryPayloadBuilder(byteorder=Endian.LITTLE, wordorder=Endian.LITTLE)
         builder.add_32bit_float(value)
         registers = builder.to_registers()
-        
-        result = modbus_client.write_registers(address=address, values=registers, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] ❌ Float 쓰기 통신 오류 (A: {address}, V: {value}): {result}", file=sys.stderr)
-            return -1
-        
-        return 0 # 성공
-
-    except ModbusException as e:
-        print(f"[MODBUS] ❌ Float Modbus 예외 발생 (A: {address}): {e}", file=sys.stderr)
-        return -1
     except Exception as e:
-        print(f"[MODBUS] ❌ Float 쓰기 예기치 않은 오류 (A: {address}): {e}", file=sys.stderr)
+        print(f"[MODBUS] ❌ Float 변환 오류 (A: {address}, V: {value}): {e}", file=sys.stderr)
         return -1
 
+    return await modbus_client.write_registers(address, registers, priority=priority)
+
 
-def _modbus_write_register(address: int, value: int) -> int:
+async def _modbus_write_register(address: int, value: int, priority: int = PRIORITY_SETPOINT) -> int:
     """Modbus Holding Register에 16비트 정수(Word) 값을 설정합니다."""
     if not isinstance(value, int):
         try:
@@ -264,31 +369,34 @@ def _modbus_write_register(address: int, value: int) -> int:
             print(f"[MODBUS] ❌ Register 쓰기 실패 (A: {address}): 정수로 변환 불가능한 값 ({value}).", file=sys.stderr)
             return -1
 
-    try:
-        result = modbus_client.write_register(address=address, value=value, slave=SLAVE_ID)
-        
-        if result.isError():
-            print(f"[MODBUS] ❌ Register 쓰기 통신 오류 (A: {address}, V: {value}): {result}", file=sys.stderr)
-            return -1
-        
-        return 0 # 성공
+    return await modbus_client.write_register(address, value, priority=priority)
 
-    except ModbusException as e:
-        print(f"[MODBUS] ❌ Register Modbus 예외 발생 (A: {address}): {e}", file=sys.stderr)
-        return -1
-    except Exception as e:
-        print(f"[MODBUS] ❌ Register 쓰기 예기치 않은 오류 (A: {address}): {e}", file=sys.stderr)
+
+async def _modbus_write_registers(address: int, values, priority: int = PRIORITY_SETPOINT) -> int:
+    """연속된 Holding Register에 16비트 정수(Word) 값들을 FC16 한 프레임으로 설정합니다."""
+    try:
+        values = [int(v) for v in values]
+    except (TypeError, ValueError):
+        print(f"[MODBUS] ❌ Registers 쓰기 실패 (A: {address}): 정수로 변환 불가능한 값 ({values}).", file=sys.stderr)
         return -1
 
+    return await modbus_client.write_registers(address, values, priority=priority)
+
+
+# D 레지스터 설정값 쓰기 캐시 (변경된 값만 RTU 버스로 전송)
+register_cache = RegisterWriteCache(
+    _modbus_write_register,
+    refresh_interval=REGISTER_REFRESH_INTERVAL,
+    write_registers=_modbus_write_registers,
+)
+
+
+# 코일 펄스 엔진 (ON 후 OFF 엣지를 이벤트 루프 타이머로 예약, 스레드/블로킹 없음)
+pulse_engine = PulseEngine(_modbus_write_coil, name="PULSE")
 
-# --- 3. PLC Read 함수 (기존과 동일) ---
-def read_plc_m0040() -> int:
-    """M0040 (Coil)의 상태를 읽습니다."""
-    return _modbus_read_coil(CONVEYOR_SENSOR_ADDRESS)
 
-def read_plc_m0041() -> int:
-    """M0041 (Coil)의 상태를 읽습니다."""
-    return _modbus_read_coil(ROBOTARM_SENSOR_ADDRESS)
+# DB 제어 상태 폴링 루프의 적응형 주기 (센서 스캔 주기는 슬레이브 스캐너별로 따로 관리)
+poller = AdaptivePoller(POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, backoff=POLL_BACKOFF, fast_hold=POLL_FAST_HOLD)
 
 
 # --- 4. Anomaly 펄스 제어 로직 (가독성 수정) ---
@@ -305,19 +413,10 @@ async def pulse_coil_on_anomaly(is_anomaly: bool):
         
     print(f"[PULSE] 🚨 {target_name} 코일에 1초 펄스 명령 실행 시작.")
 
-    def blocking_pulse():
-        # 1. ON (1) 설정
-        if _modbus_write_coil(target_address, 1) != 0:
-            return -1
-        # 2. 1초 대기
-        time.sleep(1) 
-        # 3. OFF (0) 설정
-        if _modbus_write_coil(target_address, 0) != 0:
-            return -1
-        return 0
-
     try:
-        result = await asyncio.to_thread(blocking_pulse)
+        # ON -> 1초 후 OFF (OFF 엣지는 펄스 엔진이 이벤트 루프에서 예약 처리)
+        # 펄스 도중 같은 판정이 다시 오면 기존 펄스를 연장합니다.
+        result = await pulse_engine.pulse(target_address, ANOMALY_PULSE_SECONDS, priority=PRIORITY_SORT)
         
         if result == 0:
             print(f"[PULSE] ✅ {target_name} 펄스 완료.")
@@ -347,29 +446,20 @@ async def pulse_coil_on_conveyor_move():
         
     # print(f"[CONVEYOR] ➡️ {target_name} 코일에 ON 명령 실행 시작.")
     
-    # --- DB에서 현재 direction 값 조회 ---
-    TARGET_EQ_ID = 'CONVEYOR01' 
-    select_success, control_state = await asyncio.to_thread(
-        select_data_sync, 'plc_control_state', ['direction'], f"equipment_id = '{TARGET_EQ_ID}'"
-    )
-    
-    current_direction = None
-    if select_success and control_state and control_state[0]:
-        current_direction = control_state[0][0].upper()
-        # print(f"[CONVEYOR] 🔍 DB 조회 Direction: {current_direction}")
+    # --- 제어 상태 캐시에서 현재 direction 값 조회 (DB 왕복 없음) ---
+    current_direction = control_state.get('direction')
+    if current_direction is not None:
+        current_direction = current_direction.upper()
+        # print(f"[CONVEYOR] 🔍 캐시 Direction: {current_direction}")
     
     # --- 방향 코일 제어 로직 (M202/M203) ---
     if current_direction == 'FORWARD':
-        # 정방향 (M202) 펄스
-        await asyncio.to_thread(_modbus_write_coil, M202_FORWARD_CMD_ADDR, 1)
-        time.sleep(0.05) # 짧은 펄스 유지 시간
-        await asyncio.to_thread(_modbus_write_coil, M202_FORWARD_CMD_ADDR, 0)
+        # 정방향 (M202) 펄스 (짧은 펄스 유지 시간, 이벤트 루프 논블로킹)
+        await pulse_engine.pulse(M202_FORWARD_CMD_ADDR, DIRECTION_PULSE_SECONDS)
         # print(f"[CONVEYOR] ✅ FORWARD 명령 (M{M202_FORWARD_CMD_ADDR}) 펄스 전송 완료.")
     elif current_direction == 'REVERSE':
-        # 역방향 (M203) 펄스
-        await asyncio.to_thread(_modbus_write_coil, M203_REVERSE_CMD_ADDR, 1)
-        time.sleep(0.05) # 짧은 펄스 유지 시간
-        await asyncio.to_thread(_modbus_write_coil, M203_REVERSE_CMD_ADDR, 0)
+        # 역방향 (M203) 펄스 (짧은 펄스 유지 시간, 이벤트 루프 논블로킹)
+        await pulse_engine.pulse(M203_REVERSE_CMD_ADDR, DIRECTION_PULSE_SECONDS)
         # print(f"[CONVEYOR] ✅ REVERSE 명령 (M{M203_REVERSE_CMD_ADDR}) 펄스 전송 완료.")
     else:
         print("[CONVEYOR] ⚠️ 유효한 Direction 값을 찾지 못했습니다. 방향 제어 Skip.")
@@ -377,12 +467,12 @@ async def pulse_coil_on_conveyor_move():
 
     # --- 🟢 M0081 ON & STOP/RESTART 코일 OFF ---
     # 1. M0081 ON (수동 시작)
-    result = await asyncio.to_thread(_modbus_write_coil, target_address, 1)
+    result = await _modbus_write_coil(target_address, 1)
 
     # 2. M200 OFF (정지 해제)
-    await asyncio.to_thread(_modbus_write_coil, M200_STOP_CMD_ADDR, 0)
+    await _modbus_write_coil(M200_STOP_CMD_ADDR, 0)
     # 3. M201 OFF (운행 재개 명령 해제)
-    await asyncio.to_thread(_modbus_write_coil, M201_RESTART_CMD_ADDR, 0)
+    await _modbus_write_coil(M201_RESTART_CMD_ADDR, 0)
     
     if result == 0:
         # print(f"[CONVEYOR] ✅ {target_name} 코일 ON 명령 완료 (M{target_address}).")
@@ -400,15 +490,11 @@ async def pulse_coil_on_conveyor_move_conditional():
     HMI로부터 수동 시작 명령을 받았을 때, DB의 run_mode가 'STOP'이 아닌 경우에만 
     pulse_coil_on_conveyor_move 함수를 호출합니다.
     """
-    TARGET_EQ_ID = 'CONVEYOR01' 
-    select_success, control_state = await asyncio.to_thread(
-        select_data_sync, 'plc_control_state', ['run_mode'], f"equipment_id = '{TARGET_EQ_ID}'"
-    )
-    
-    current_run_mode = None
-    if select_success and control_state and control_state[0]:
-        current_run_mode = control_state[0][0].upper()
-        # print(f"[HMI CMOVE] 🔍 DB run_mode 확인: {current_run_mode}")
+    # 제어 상태 캐시에서 run_mode 확인 (DB 왕복 없음)
+    current_run_mode = control_state.get('run_mode')
+    if current_run_mode is not None:
+        current_run_mode = current_run_mode.upper()
+        # print(f"[HMI CMOVE] 🔍 캐시 run_mode 확인: {current_run_mode}")
         
     if current_run_mode == 'STOP':
         # 요청 1: '정지' 상태일 때 수동 시작 버튼 눌러도 작동 안 됨
@@ -431,13 +517,13 @@ async def pulse_coil_on_conveyor_stop():
     # print(f"[CONVEYOR] 🛑 STOP 명령 실행: M{M200_STOP_CMD_ADDR} ON, M{PLC_WRITE_COIL_CONVEYOR_MOVE}/M{M201_RESTART_CMD_ADDR} OFF")
 
     # 1. M200 (STOP) ON 상태로 유지
-    result_stop = await asyncio.to_thread(_modbus_write_coil, M200_STOP_CMD_ADDR, 1)
+    result_stop = await _modbus_write_coil(M200_STOP_CMD_ADDR, 1)
     
     # 2. PLC_WRITE_COIL_CONVEYOR_MOVE (M0081) OFF (conveyor_move 요청 해제)
-    result_move_off = await asyncio.to_thread(_modbus_write_coil, PLC_WRITE_COIL_CONVEYOR_MOVE, 0)
+    result_move_off = await _modbus_write_coil(PLC_WRITE_COIL_CONVEYOR_MOVE, 0)
     
     # 3. M201 (RESTART) OFF
-    result_restart_off = await asyncio.to_thread(_modbus_write_coil, M201_RESTART_CMD_ADDR, 0)
+    result_restart_off = await _modbus_write_coil(M201_RESTART_CMD_ADDR, 0)
 
     if result_stop == 0 and result_move_off == 0 and result_restart_off == 0:
         # print(f"[CONVEYOR] ✅ STOP 명령 완료.")
@@ -458,13 +544,13 @@ async def pulse_coil_on_restart():
     print(f"[CONVEYOR] 🔄 RESTART 명령 실행: M{M201_RESTART_CMD_ADDR} ON, M{M200_STOP_CMD_ADDR}/M{PLC_WRITE_COIL_CONVEYOR_MOVE} OFF")
 
     # 1. M201 (RESTART) ON 상태로 유지
-    result_restart = await asyncio.to_thread(_modbus_write_coil, M201_RESTART_CMD_ADDR, 1)
+    result_restart = await _modbus_write_coil(M201_RESTART_CMD_ADDR, 1)
     
     # 2. M200 (STOP) OFF (정지 상태 해제)
-    result_stop_off = await asyncio.to_thread(_modbus_write_coil, M200_STOP_CMD_ADDR, 0)
+    result_stop_off = await _modbus_write_coil(M200_STOP_CMD_ADDR, 0)
     
     # 3. M0081 (conveyor_move) OFF
-    result_move_off = await asyncio.to_thread(_modbus_write_coil, PLC_WRITE_COIL_CONVEYOR_MOVE, 0)
+    result_move_off = await _modbus_write_coil(PLC_WRITE_COIL_CONVEYOR_MOVE, 0)
 
     if result_restart == 0 and result_stop_off == 0 and result_move_off == 0:
         print(f"[CONVEYOR] ✅ RESTART 명령 완료.")
@@ -489,15 +575,16 @@ async def call_method_with_plc_data(client: Client, method_node_id: str, input_v
     method_name = method_node_id.split(';')[-1] # 메서드 이름 추출
 
     try:
-        obj_node = client.get_node(OBJECT_NODE_ID)
-        method_node = client.get_node(method_node_id) 
+        # 연결 시 해석/등록해 둔 노드 핸들 사용 (캐시에 없으면 설정 NodeId)
+        obj_node = node_cache.get(client, OBJECT_NODE_ID)
+        method_node = node_cache.get(client, method_node_id)
 
         # Method 호출을 위한 입력 인자 설정
         arguments = [
             ua.Variant(input_value, variant_type) 
         ]
         
-        result = await obj_node.call_method(method_node, *arguments)
+        result = await method_batcher.call(client, obj_node, method_node, *arguments)
         
         return method_node_id, result
 
@@ -506,6 +593,49 @@ async def call_method_with_plc_data(client: Client, method_node_id: str, input_v
         return method_node_id, (False, error_message)
 
 
+# --- 6-1. 센서 상태 변화 처리 (슬레이브 스캐너 콜백) ---
+async def handle_sensor_change(opcua_client: Client, scanner, tag_name: str, value: int):
+    """
+    슬레이브 스캐너가 감지한 센서 태그 변화를 처리합니다.
+    SENSOR_EVENTS에 등록된 태그는 DB 로그 기록 후 OPC UA Method로 상태(1이든 0이든)를 전송합니다.
+    """
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    event = SENSOR_EVENTS.get((scanner.name, tag_name))
+    sensor_check = (value == 1)
+    state_desc = "ON (감지)" if sensor_check else "OFF (대기)"
+
+    if event is None:
+        print(f"[{current_time}] [SENSOR] 🔔 {scanner.name} {tag_name} 상태 변화: {state_desc}")
+        return
+
+    print(f"\n--- ## 센서 감지: {tag_name} ({event['label']}) ## ---")
+    print(f"[{current_time}] [SENSOR] 🔔 {tag_name} 상태 변화: {state_desc}")
+
+    # DB 로그는 1(ON) 상태일 때만 기록하도록 유지 (선택 사항)
+    if sensor_check:
+        log_writer.log(event["log_equipment_id"], 'PLC', event["log_desc"])
+        # 🚨 DB 로그에 "Conveyor STOP" 기록: PLC 로직이 정지를 수행할 때를 대비
+        log_writer.log(PRIMARY_EQUIPMENT_ID, 'PLC', "Conveyor STOP")
+
+    # Method 호출 및 결과 수신 (True/False 값 전송)
+    method_node_id, result = await call_method_with_plc_data(opcua_client, event["method_node_id"], sensor_check)
+
+    is_success, status_message = result
+    method_name = method_node_id.split(';')[-1]
+
+    if is_success:
+        print(f"[OPC UA] ✅ {tag_name} 상태 OPC UA 호출 성공 ({method_name})")
+    else:
+        print(f"[OPC UA] ❌ {tag_name} 상태 OPC UA 호출 실패 ({method_name})")
+        print(f"         -> 오류 상세: {status_message}", file=sys.stderr)
+
+
+def handle_scan_failure(scanner):
+    """주 설비 읽기 실패(-1)는 연결 끊김/재연결 가능성이 있으므로 레지스터 쓰기 캐시를 무효화합니다."""
+    if scanner.name == PRIMARY_EQUIPMENT_ID:
+        register_cache.invalidate()
+
+
 # --- 7. 메인 실행 함수 (가독성 수정) ---
 async def main():
     opcua_client = Client(url=SERVER_URL)
@@ -513,10 +643,6 @@ async def main():
     print(f"--- ## 시스템 초기화 시작 ## ---")
     print(f"[CONNECT] OPC UA 서버 접속 시도: {SERVER_URL}")
 
-    # 🚨 센서 상태 변화 감지를 위한 last_value 변수 초기화
-    last_m0040_value = -1 
-    last_m0041_value = -1 
-
     # 🚨 [요청 반영] 프로그램 시작 시 run_mode의 초기값은 'STOP'으로 간주하여 자동 실행 방지
     last_run_mode = "STOP" 
     last_direction = ""
@@ -544,63 +670,83 @@ async def main():
         if not connected:
             return
 
-        # 2. Modbus 클라이언트 연결 시도 
-        if not modbus_client.connect():
+        # 1-1. Method/구독 노드 핸들 준비 (캐시 파일 확인 또는 일괄 해석 + 등록)
+        await node_cache.resolve(opcua_client)
+
+        # 2. Modbus 클라이언트 연결 시도 (모든 라인, 주 설비 라인은 필수)
+        await plc_fleet.connect()
+        if not modbus_transport.connected:
             print("[CONNECT] ❌ Modbus 연결 실패: PLC 연결를 확인하세요.", file=sys.stderr)
             return  
         print("[CONNECT] ✅ Modbus 연결 성공.")
+        # 새 연결에서는 PLC 레지스터 상태를 알 수 없으므로 쓰기 캐시를 비움
+        register_cache.invalidate()
 
         # ---------------------------------------------------------------------
         # 3. OPC UA 구독 시작: Anomaly 상태 및 HMI 명령
         # ---------------------------------------------------------------------
         
-        # 3-1. Anomaly 상태 구독 (기존 로직 유지)
-        handler_anomaly = AnomalyDataHandler()
-        sub_anomaly = await opcua_client.create_subscription(100, handler_anomaly)
-        try:
-            anomaly_node = opcua_client.get_node(ANOMALY_OPCUA_NODE_ID)
-            await sub_anomaly.subscribe_data_change(anomaly_node)
-            print(f"[OPC UA] ✅ Anomaly 구독 시작: {anomaly_node.nodeid}")
-                    
-        except Exception as e:
-             print(f"[OPC UA] ❌ Anomaly 구독 실패: {e.__class__.__name__}", file=sys.stderr)
-
-        # 3-2. HMI 명령 (conveyor_move, STOP, RESTART) 구독 추가
-        handler_move = CMoveDataHandler()
-        conveyor_move = await opcua_client.create_subscription(100, handler_move)
-        
+        # Anomaly 상태(3-1)와 HMI 명령(conveyor_move, STOP, RESTART)(3-2)를 Subscription 하나로 구독
+        subscriptions = SubscriptionManager(opcua_client, SUBSCRIPTION_PUBLISH_INTERVAL,
+                                            node_resolver=node_cache.get)
+        subscriptions.add(ANOMALY_OPCUA_NODE_ID, AnomalyDataHandler(), **ANOMALY_ITEM_OPTIONS)
+        subscriptions.add(CMOVE_COMMAND_NODE_ID, CMoveDataHandler(), **CMOVE_ITEM_OPTIONS)
         try:
-             conveyor_move_node = opcua_client.get_node(CMOVE_COMMAND_NODE_ID)
-             await conveyor_move.subscribe_data_change(conveyor_move_node)
-             print(f"[OPC UA] ✅ HMI 명령 구독 시작: {conveyor_move_node.nodeid}")
+            await subscriptions.start()
         except Exception as e:
-             print(f"[OPC UA] ❌ HMI 명령 구독 실패: {e.__class__.__name__}", file=sys.stderr)
-
-        print(f"--- ## PLC/DB 폴링 루프 시작 (0.2초 주기) ## ---")
+            print(f"[OPC UA] ❌ 구독 실패: {e.__class__.__name__}", file=sys.stderr)
+
+        # 4. 센서 변화 송신 큐와 슬레이브별 독립 센서 스캔 루프 시작
+        #    (스캐너는 변화를 큐에 넣기만 하므로 OPC UA 왕복이 스캔 주기를 늦추지 않음)
+        outbound = OutboundQueue(
+            lambda key, value: handle_sensor_change(opcua_client, *key, value),
+            maxsize=OUTBOUND_QUEUE_SIZE, workers=OUTBOUND_WORKERS, overflow=OUTBOUND_OVERFLOW, name="SENSOR OUT",
+        )
+        if USE_ASYNC_DB:
+            try:
+                await async_db.start()
+            except Exception as e:
+                # 첫 쿼리 때 다시 시도하며, 그동안 로그는 스풀에 보관됨
+                print(f"[DB ASYNC] ⚠️ 연결 풀 생성 실패: {e}", file=sys.stderr)
+        await asyncio.to_thread(ensure_telemetry_schema)
+        log_sink.start()
+        log_writer.start()
+        telemetry.start()
+        if LOG_ROLLUP_ENABLED:
+            log_rollup.start()
+        outbound.start()
+
+        async def on_sensor_change(scanner, tag_name, value):
+            # 텔레메트리는 송신 큐의 병합과 무관하게 스캐너가 본 모든 변화를 기록
+            telemetry.record(scanner.name, tag_name, value)
+            await outbound.put((scanner, tag_name), value)
+
+        plc_fleet.start(on_sensor_change, on_failure=handle_scan_failure)
+        print(f"--- ## 센서 스캔 루프 시작: 슬레이브 {len(plc_fleet.scanners)}개 ## ---")
+
+        print(f"--- ## DB 제어 상태 폴링 루프 시작 (적응형 {POLL_MIN_INTERVAL}~{POLL_MAX_INTERVAL}초 주기) ## ---")
+        last_metrics_print = time.monotonic()
         
-        # 0.2초마다 PLC 데이터 읽기 (폴링 루프 시작)
+        # 적응형 주기로 DB 제어 상태 읽기 (폴링 루프 시작)
         while True:
             current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+            state_changed = False   # 이번 주기에 run_mode 변화가 있었는지
 
             # =================================================================
-            # 0. 🚨 PLC 제어 상태 (패널 설정값) DB에서 SELECT
+            # 0. 🚨 PLC 제어 상태 (패널 설정값): 버전 프로브 후 바뀌었을 때만 DB에서 전체 SELECT
             # =================================================================
-            TARGET_EQ_ID = 'CONVEYOR01' 
-            target_columns = ['run_mode', 'direction', 'frequency', 'acceleration', 'deceleration']
-            select_condition = f"equipment_id = '{TARGET_EQ_ID}'"
-
-            # **select_data_sync 함수 호출**
-            select_success, control_state = await asyncio.to_thread(
-                select_data_sync, 'plc_control_state', target_columns, select_condition
-            )
+            TARGET_EQ_ID = PRIMARY_EQUIPMENT_ID
+            select_success = await control_state.poll()
+            state_rows = control_state.rows()   # ['run_mode', 'direction', 'frequency', 'acceleration', 'deceleration']
 
             # 1. 조회된 상태 데이터 처리
-            if select_success and control_state:
-                state_data = control_state[0] 
+            if select_success and state_rows:
+                state_data = state_rows[0] 
                                 
                 current_run_mode = state_data[0].upper()   # run_mode (인덱스 0)
                 current_direction = state_data[1].upper()  # direction (인덱스 1)
                 current_frequency = state_data[2]          # frequency (인덱스 2)
+                telemetry.record(TARGET_EQ_ID, "run_mode", current_run_mode)
                 
                 if len(state_data) >= 5:
                     current_accelerate = state_data[3]     # acceleration (인덱스 3 -> D104)
@@ -621,6 +767,7 @@ async def main():
                     if is_first_run:
                         # print(f"[{current_time}] [DB AUTO] ℹ️ 초기 실행 감지. DB run_mode({current_run_mode})를 무시하고 상태만 갱신.")
                         last_run_mode = current_run_mode # 상태만 갱신하고 명령 실행은 건너뜀
+                        conveyor_state["run_mode"] = current_run_mode
                         is_first_run = False
                         continue # 다음 루프로 이동
 
@@ -639,14 +786,14 @@ async def main():
                         # print(f"[{current_time}] [DB AUTO] 🚀 RUN/MOVE 감지. CONVEYOR_MOVE 명령 자동 실행.")
 
                         log_desc = "Conveyor START"
-                        asyncio.create_task(
-                            asyncio.to_thread(insert_log_sync, 'CONVEYOR01', 'PLC', log_desc)
-                        )
+                        log_writer.log(TARGET_EQ_ID, 'PLC', log_desc)
                         
                         asyncio.create_task(pulse_coil_on_conveyor_move()) 
                         
                     # 엣지 감지를 위해 현재 상태 업데이트
                     last_run_mode = current_run_mode
+                    conveyor_state["run_mode"] = current_run_mode
+                    state_changed = True
                 
                 # (예시 2) DB에 설정된 주파수/가감속 값을 PLC D 레지스터에 상시 적용
                 
@@ -660,102 +807,41 @@ async def main():
                 scaled_decelerate = current_decelerate
                 int_decelerate = int(scaled_decelerate)
                 
-                # **Modbus D 레지스터에 쓰기**
-                await asyncio.to_thread(_modbus_write_register, D102_FREQ_ADDR_WORD, int_frequency)
-                await asyncio.to_thread(_modbus_write_register, D104_ACCEL_ADDR, int_accelerate)
-                await asyncio.to_thread(_modbus_write_register, D105_DECEL_ADDR, int_decelerate)
+                # **Modbus D 레지스터에 쓰기** (파라미터 세트 커밋)
+                # 하나라도 바뀌면 세트 전체를 연속 구간별 FC16 프레임(D102 / D104~D105)으로 쓰고, 변경이 없으면 전송하지 않음
+                conveyor_params = tag_plan.encode_writes(
+                    dict(zip(CONVEYOR_PARAM_TAGS, (int_frequency, int_accelerate, int_decelerate)))
+                )
+                await register_cache.commit(conveyor_params, tag_plan.register_gap_values)
+                for tag_name, value in zip(CONVEYOR_PARAM_TAGS, (int_frequency, int_accelerate, int_decelerate)):
+                    telemetry.record(TARGET_EQ_ID, tag_name, value)
                 
                 # print(f"[{current_time}] [DB CONTROL] ➡️ 주파수/가감속 D 레지스터 ({int_frequency}/{int_accelerate}/{int_decelerate}) 업데이트.")
 
             elif select_success:
                 pass # DB에 데이터가 없거나 조회 실패
 
-            # =================================================================
-            # 2. M0040 상태 변화 감지 로직 (컨베이어 센서)
-            # =================================================================    
-            # 1. PLC 데이터 읽기
-            current_m0040_value = await asyncio.to_thread(read_plc_m0040)
-            current_m0041_value = await asyncio.to_thread(read_plc_m0041)
-            
-            current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-
-            if current_m0040_value != -1 and current_m0040_value != last_m0040_value:
-                
-                # 🚨 [수정된 핵심 로직: 1이든 0이든 Method 호출]
-                sensor_check_conveyor = (current_m0040_value == 1)
-                state_desc = "ON (감지)" if sensor_check_conveyor else "OFF (대기)"
-                
-                print(f"\n--- ## 센서 감지: M0040 (컨베이어) ## ---")
-                print(f"[{current_time}] [SENSOR] 🔔 M0040 상태 변화: {state_desc}")
-                
-                # DB 로그는 1(ON) 상태일 때만 기록하도록 유지 (선택 사항)
-                if sensor_check_conveyor:
-                    log_desc = "Conveyor_Sensor_Check OK"
-                    asyncio.create_task(
-                        asyncio.to_thread(insert_log_sync, 'SENSER01', 'PLC', log_desc)
-                    )
-                    time.sleep(0.05)
-                    # 🚨 DB 로그에 "Conveyor STOP" 기록: PLC 로직이 정지를 수행할 때를 대비
-                    log_desc = "Conveyor STOP"
-                    asyncio.create_task(
-                        asyncio.to_thread(insert_log_sync, 'CONVEYOR01', 'PLC', log_desc)
-                    )
-                
-                # Method 호출 및 결과 수신 (True/False 값 전송)
-                method_node_id, result = await call_method_with_plc_data(opcua_client, SENSOR1_METHOD_NODE_ID, sensor_check_conveyor)
-                
-                is_success, status_message = result
-                method_name = SENSOR1_METHOD_NODE_ID.split(';')[-1]
-                
-                if is_success:
-                    print(f"[OPC UA] ✅ M0040 상태 OPC UA 호출 성공 ({method_name})")
-                else:
-                    print(f"[OPC UA] ❌ M0040 상태 OPC UA 호출 실패 ({method_name})")
-                    print(f"         -> 오류 상세: {status_message}", file=sys.stderr)
-
-                last_m0040_value = current_m0040_value
-                
-            # =================================================================
-            # 3. M0041 상태 변화 감지 로직 (로봇팔 센서)
-            # =================================================================
-            if current_m0041_value != -1 and current_m0041_value != last_m0041_value:
-                
-                # 🚨 [수정된 핵심 로직: 1이든 0이든 Method 호출]
-                sensor_check_robotarm = (current_m0041_value == 1)
-                state_desc = "ON (감지)" if sensor_check_robotarm else "OFF (대기)"
-
-                print(f"\n--- ## 센서 감지: M0041 (로봇팔) ## ---")
-                print(f"[{current_time}] [SENSOR] 🔔 M0041 상태 변화: {state_desc}")
-                
-                # DB 로그는 1(ON) 상태일 때만 기록하도록 유지 (선택 사항)
-                if sensor_check_robotarm:
-                    log_desc = "RobotArm_Sensor_Check OK"
-                    asyncio.create_task(
-                        asyncio.to_thread(insert_log_sync, 'SENSER02', 'PLC', log_desc)
-                    )
-                    time.sleep(0.05)
-                    # 🚨 DB 로그에 "Conveyor STOP" 기록: PLC 로직이 정지를 수행할 때를 대비
-                    log_desc = "Conveyor STOP"
-                    asyncio.create_task(
-                        asyncio.to_thread(insert_log_sync, 'CONVEYOR01', 'PLC', log_desc)
-                    )
-
-                # Method 호출 및 결과 수신 (True/False 값 전송)
-                method_node_id, result = await call_method_with_plc_data(opcua_client, SENSOR2_METHOD_NODE_ID, sensor_check_robotarm) 
-                
-                is_success, status_message = result
-                method_name = SENSOR2_METHOD_NODE_ID.split(';')[-1]
-                
-                if is_success:
-                    print(f"[OPC UA] ✅ M0041 상태 OPC UA 호출 성공 ({method_name})")
-                else:
-                    print(f"[OPC UA] ❌ M0041 상태 OPC UA 호출 실패 ({method_name})")
-                    print(f"         -> 오류 상세: {status_message}", file=sys.stderr)
-                
-                last_m0041_value = current_m0041_value
-
-            # 짧은 대기 시간 설정 (0.2초)
-            await asyncio.sleep(0.2)
+            # 버스 스케줄러 클래스별 대기 시간 통계 주기 출력
+            if time.monotonic() - last_metrics_print >= BUS_METRICS_INTERVAL:
+                print(plc_fleet.format_metrics())
+                print(outbound.format_metrics())
+                print(method_batcher.format_metrics())
+                print(subscriptions.format_metrics())
+                print(db_pool.format_metrics())
+                if USE_ASYNC_DB:
+                    print(async_db.format_metrics())
+                print(statement_cache.format_metrics())
+                print(log_writer.format_metrics())
+                print(log_sink.format_metrics())
+                print(telemetry.format_metrics())
+                if LOG_ROLLUP_ENABLED:
+                    print(log_rollup.format_metrics())
+                print(control_state.format_metrics())
+                last_metrics_print = time.monotonic()
+
+            # 적응형 대기: run_mode 변화 직후/동작 중에는 빠르게, 정지 상태에서 변화가 없으면 점점 느리게
+            poller.record(changed=state_changed, active=last_run_mode not in POLL_IDLE_RUN_MODES)
+            await poller.sleep()
 
     except ConnectionRefusedError:
         print(f"--- ## 프로그램 종료 ## ---")
@@ -766,25 +852,38 @@ async def main():
     finally:
         # 연결 종료
         print(f"--- ## 연결 해제 및 종료 ## ---")
+        if 'outbound' in locals():
+            # 남은 센서 보고를 OPC UA 연결이 살아 있는 동안 전송
+            await outbound.stop()
         try:
-            if 'sub_anomaly' in locals():
-                await sub_anomaly.delete()
-                print("[CLEANUP] OPC UA Anomaly 구독 해지.")
-            if 'conveyor_move' in locals():
-                await conveyor_move.delete()
-                print("[CLEANUP] OPC UA HMI 명령 구독 해지.")
-            
+            if 'subscriptions' in locals():
+                await subscriptions.stop()
+                print("[CLEANUP] OPC UA 구독 해지 (Anomaly/HMI 명령).")
+
+            await node_cache.release(opcua_client)
             await opcua_client.disconnect()
             print("[CLEANUP] OPC UA 연결 종료.")
         except Exception:
             pass
             
         try:
-            modbus_client.close()
+            await pulse_engine.stop()
+            await plc_fleet.stop()
             print("[CLEANUP] Modbus 연결 종료.")
         except Exception:
             pass
 
+        # 버퍼에 남은 DB 로그/텔레메트리를 모두 기록한 뒤 연결 풀 정리
+        await log_rollup.stop()
+        await telemetry.stop()
+        print(f"[CLEANUP] {telemetry.format_metrics()}")
+        await log_writer.stop()
+        await log_sink.stop()
+        print(f"[CLEANUP] DB 로그 기록 종료. {log_writer.format_metrics()}")
+        print(f"[CLEANUP] {log_sink.format_metrics()}")
+        await async_db.close()
+        db_pool.close_all()
+
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,279 @@
+# PLC_ControlState.py
+"""
+plc_control_state 저장소 (여러 설비 일괄 조회 + 버전 프로브 + 공유 스냅샷).
+
+ControlStateRepository는 설정된 모든 설비(equipment_id)의 제어 상태 행을 한 번에 관리합니다.
+    - 갱신 한 번에 버전 컬럼만 IN (...) 쿼리 하나로 조회(프로브)하고, 버전이 바뀐 설비의 행만
+      다시 IN (...) 쿼리 하나로 전체 조회
+    - 조회 결과는 공유 스냅샷으로 보관하며, ttl초 안의 갱신 요청은 DB에 가지 않고 스냅샷을 사용
+    - 동시에 들어온 갱신 요청은 진행 중인 조회 하나에 합류 (같은 행을 여러 번 조회하지 않음)
+
+ControlStateWatcher는 설비 하나에 대한 뷰(poll/rows/get)이며, 메인 루프와 pulse_coil_on_conveyor_move*는
+DB 대신 이 뷰로 캐시를 읽습니다.
+
+버전 컬럼(기본 updated_at)은 행이 바뀔 때마다 값이 바뀌어야 합니다. 없으면 마이그레이션으로 추가합니다.
+    python PLC_ControlState.py      (migrate_control_state_version: VERSION_COLUMN_MIGRATION 실행)
+(초 단위 TIMESTAMP는 같은 초 안의 두 번째 변경을 놓칠 수 있으므로 (6) 정밀도를 사용합니다.
+ 버전 카운터 컬럼이나 트리거로 갱신되는 컬럼도 사용할 수 있습니다.)
+
+안전장치
+    - full_refresh_interval초마다 버전과 무관하게 모든 설비의 행을 다시 읽음 (버전 컬럼이 갱신되지 않는 경우 대비)
+    - 전체 조회는 버전 프로브가 한 번 성공하기 전까지 버전 컬럼 없이 함
+      (버전 컬럼이 없는 스키마에서도 제어 상태 행은 항상 읽힘)
+    - 버전 프로브가 probe_failure_limit회 연속 실패하는데 전체 조회는 성공하면(버전 컬럼 없음)
+      프로브를 끄고 매 갱신마다 전체 조회로 동작
+"""
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PLC_DataBase import db_pool, select_data_sync
+
+CONTROL_STATE_TABLE = "plc_control_state"
+CONTROL_STATE_COLUMNS = ('run_mode', 'direction', 'frequency', 'acceleration', 'deceleration')
+DEFAULT_VERSION_COLUMN = "updated_at"
+DEFAULT_TTL = 0.1
+DEFAULT_FULL_REFRESH_INTERVAL = 30.0
+DEFAULT_PROBE_FAILURE_LIMIT = 3
+
+# 버전 컬럼 추가 마이그레이션 (migrate_control_state_version)
+VERSION_COLUMN_MIGRATION = (
+    f"ALTER TABLE {CONTROL_STATE_TABLE} ADD COLUMN {DEFAULT_VERSION_COLUMN} TIMESTAMP(6) NOT NULL "
+    f"DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)"
+)
+
+
+def migrate_control_state_version() -> bool:
+    """plc_control_state에 버전 컬럼이 없으면 추가합니다. 이미 있거나 추가했으면 True."""
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+                """,
+                (CONTROL_STATE_TABLE, DEFAULT_VERSION_COLUMN),
+            )
+            if cursor.fetchone()[0]:
+                print(f"[CONTROL STATE] ✅ {CONTROL_STATE_TABLE}.{DEFAULT_VERSION_COLUMN} 컬럼이 이미 있습니다.")
+                return True
+            print(f"[CONTROL STATE] 🔧 {CONTROL_STATE_TABLE}에 {DEFAULT_VERSION_COLUMN} 컬럼 추가 중...")
+            cursor.execute(VERSION_COLUMN_MIGRATION)
+            return True
+    except Exception as e:
+        print(f"[CONTROL STATE] ❌ 버전 컬럼 마이그레이션 실패: {e}", file=sys.stderr)
+        return False
+
+
+class ControlStateRepository:
+    """
+    여러 설비의 제어 상태 행을 IN (...) 쿼리로 일괄 조회하고 공유 스냅샷으로 보관하는 저장소.
+    select(table, columns, where) -> (성공 여부, 행 리스트) 는 스레드에서 실행됩니다.
+    select가 async 함수(예: PLC_DataBaseAsync.async_db.select_data)이면 스레드 없이 바로 await 합니다.
+    """
+
+    def __init__(self, equipment_ids: Sequence[str], columns: Sequence[str] = CONTROL_STATE_COLUMNS,
+                 table: str = CONTROL_STATE_TABLE, version_column: Optional[str] = DEFAULT_VERSION_COLUMN,
+                 ttl: float = DEFAULT_TTL, full_refresh_interval: float = DEFAULT_FULL_REFRESH_INTERVAL,
+                 probe_failure_limit: int = DEFAULT_PROBE_FAILURE_LIMIT,
+                 select: Optional[Callable[..., Any]] = None,
+                 name: str = "CONTROL STATE"):
+        self.equipment_ids = tuple(dict.fromkeys(equipment_ids))
+        if not self.equipment_ids:
+            raise ValueError("equipment_ids가 비어 있습니다.")
+        self.columns = tuple(columns)
+        self.table = table
+        self.version_column = version_column
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        self.probe_failure_limit = probe_failure_limit
+        self.select = select or select_data_sync
+        self.name = name
+
+        self._rows: Dict[str, Tuple[Any, ...]] = {}     # 설비 -> columns 순서의 행
+        self._versions: Dict[str, Any] = {}
+        self.refreshed_at: Optional[float] = None       # 마지막 갱신(프로브 포함) 성공 시각 (monotonic)
+        self.fetched_at: Optional[float] = None         # 마지막 전체(모든 설비) 조회 시각
+        self.last_success = False
+        self._inflight: Optional[asyncio.Task] = None
+        self._probe_failures = 0
+        self._version_confirmed = False                 # 버전 프로브가 한 번이라도 성공했는지
+
+        # 지표
+        self.refreshes = 0          # 실제로 DB에 간 갱신 수
+        self.cache_hits = 0         # ttl 안이라 스냅샷을 그대로 쓴 요청 수
+        self.coalesced = 0          # 진행 중인 갱신에 합류한 요청 수
+        self.probes = 0
+        self.probe_hits = 0         # 버전이 모두 같아 전체 조회를 생략한 횟수
+        self.full_fetches = 0
+        self.failures = 0
+
+    # --- 갱신 ---
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        스냅샷을 갱신합니다. ttl 안이면 DB에 가지 않고, 진행 중인 갱신이 있으면 그 결과를 기다립니다.
+        마지막 갱신 성공 여부를 반환합니다. (실패 시 스냅샷은 이전 값을 유지)
+        """
+        if self._inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight)
+        if not force and self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.ttl:
+            self.cache_hits += 1
+            return self.last_success
+
+        task = asyncio.create_task(self._refresh())
+        self._inflight = task
+        task.add_done_callback(lambda _: setattr(self, "_inflight", None))
+        return await asyncio.shield(task)
+
+    async def _refresh(self) -> bool:
+        self.refreshes += 1
+        ok = await self._refresh_once()
+        self.last_success = ok
+        if ok:
+            self.refreshed_at = time.monotonic()
+        else:
+            self.failures += 1
+        return ok
+
+    async def _refresh_once(self) -> bool:
+        due = self.fetched_at is None or time.monotonic() - self.fetched_at >= self.full_refresh_interval
+        if self.version_column is None or due:
+            return await self._fetch(self.equipment_ids)
+
+        versions = await self._probe()
+        if versions is not None:
+            changed = [eq for eq in self.equipment_ids if versions.get(eq) != self._versions.get(eq)]
+            if not changed:
+                self.probe_hits += 1
+                return True
+            return await self._fetch(changed)
+
+        if self._probe_failures < self.probe_failure_limit:
+            # 버전 컬럼이 있는지 아직 모르면 이번 갱신은 버전 없이 전체 조회
+            return False if self._version_confirmed else await self._fetch(self.equipment_ids)
+        # 전체 조회까지 실패하면 DB 장애, 성공하면 버전 컬럼이 없는 것으로 판단
+        version_column, self.version_column = self.version_column, None
+        if await self._fetch(self.equipment_ids):
+            print(f"[{self.name}] ⚠️ 버전 컬럼 '{version_column}' 조회가 계속 실패합니다. "
+                  f"버전 프로브를 끄고 매 갱신마다 전체 조회합니다.", file=sys.stderr)
+            return True
+        self.version_column = version_column
+        return False
+
+    async def _probe(self) -> Optional[Dict[str, Any]]:
+        self.probes += 1
+        success, rows = await self._select(["equipment_id", self.version_column], self.equipment_ids)
+        if not success:
+            self._probe_failures += 1
+            return None
+        self._probe_failures = 0
+        self._version_confirmed = True
+        return {record[0]: record[1] for record in rows}
+
+    async def _fetch(self, equipment_ids: Sequence[str]) -> bool:
+        columns = ["equipment_id", *self.columns]
+        # 버전 컬럼이 있는지 모르는 동안에는 빼고 조회 (없는 컬럼 때문에 제어 상태까지 못 읽지 않도록)
+        with_version = self.version_column is not None and self._version_confirmed
+        if with_version:
+            columns.append(self.version_column)
+        success, rows = await self._select(columns, equipment_ids)
+        if not success:
+            return False
+
+        self.full_fetches += 1
+        found = set()
+        for record in rows:
+            eq = record[0]
+            found.add(eq)
+            self._rows[eq] = tuple(record[1:1 + len(self.columns)])
+            self._versions[eq] = record[1 + len(self.columns)] if with_version else None
+        for eq in equipment_ids:
+            if eq not in found:
+                # 행이 삭제되었거나 아직 없는 설비
+                self._rows.pop(eq, None)
+                self._versions.pop(eq, None)
+        if len(equipment_ids) == len(self.equipment_ids):
+            self.fetched_at = time.monotonic()
+        return True
+
+    async def _select(self, columns: List[str], equipment_ids: Sequence[str]) -> Tuple[bool, list]:
+        where = {"equipment_id": tuple(equipment_ids)}
+        if asyncio.iscoroutinefunction(self.select):
+            return await self.select(self.table, columns, where)
+        return await asyncio.to_thread(self.select, self.table, columns, where)
+
+    # --- 스냅샷 읽기 ---
+    def snapshot(self) -> Dict[str, Tuple[Any, ...]]:
+        """설비 -> 행(columns 순서) 딕셔너리 사본을 반환합니다."""
+        return dict(self._rows)
+
+    def row(self, equipment_id: str) -> Optional[Tuple[Any, ...]]:
+        return self._rows.get(equipment_id)
+
+    def get(self, equipment_id: str, column: str, default: Any = None) -> Any:
+        row = self._rows.get(equipment_id)
+        if row is None:
+            return default
+        return row[self.columns.index(column)]
+
+    def age(self) -> Optional[float]:
+        """마지막 갱신 성공 후 지난 시간(초)."""
+        return None if self.refreshed_at is None else time.monotonic() - self.refreshed_at
+
+    def watcher(self, equipment_id: str) -> "ControlStateWatcher":
+        if equipment_id not in self.equipment_ids:
+            raise KeyError(f"저장소에 없는 설비: {equipment_id}")
+        return ControlStateWatcher(self, equipment_id)
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "equipment": len(self.equipment_ids),
+            "refreshes": self.refreshes,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "probes": self.probes,
+            "probe_hits": self.probe_hits,
+            "full_fetches": self.full_fetches,
+            "failures": self.failures,
+            "version_column": self.version_column,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        probe = m["version_column"] or "끔"
+        return (f"[{self.name}] 설비 {m['equipment']}개 | 갱신={m['refreshes']} (캐시 {m['cache_hits']}, "
+                f"합류 {m['coalesced']}) | 버전 프로브({probe})={m['probes']} (변경 없음 {m['probe_hits']}) "
+                f"전체 조회={m['full_fetches']} 실패={m['failures']}")
+
+
+class ControlStateWatcher:
+    """저장소의 설비 하나에 대한 뷰. (poll()은 저장소 갱신, rows()/get()은 스냅샷 읽기)"""
+
+    def __init__(self, repository: ControlStateRepository, equipment_id: str):
+        self.repository = repository
+        self.equipment_id = equipment_id
+
+    async def poll(self) -> bool:
+        """저장소를 갱신(ttl/합류 규칙 적용)하고 성공 여부를 반환합니다."""
+        return await self.repository.refresh()
+
+    def rows(self) -> List[Tuple[Any, ...]]:
+        """select_data_sync 결과와 같은 형태([행] 또는 [])로 스냅샷을 반환합니다."""
+        row = self.repository.row(self.equipment_id)
+        return [row] if row is not None else []
+
+    def get(self, column: str, default: Any = None) -> Any:
+        """스냅샷의 컬럼 값을 반환합니다. (아직 조회 전이거나 행이 없으면 default)"""
+        return self.repository.get(self.equipment_id, column, default)
+
+    def format_metrics(self) -> str:
+        return self.repository.format_metrics()
+
+
+if __name__ == "__main__":
+    # 버전 컬럼 마이그레이션을 한 번 실행
+    sys.exit(0 if migrate_control_state_version() else 1)
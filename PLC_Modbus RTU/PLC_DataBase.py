@@ -1,7 +1,11 @@
 # DB_INSERTER.py
 import pymysql
+import re
+import threading
 import time
-from typing import List, Tuple, Any
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import List, Tuple, Any, Callable, Deque, Dict, Hashable, Iterable, NamedTuple, Optional, Sequence
 
 # --- 데이터베이스 연결 정보 설정 (반드시 수정하세요) ---
 DB_HOST = '172.30.1.29'
@@ -9,128 +13,634 @@ DB_USER = 'root'
 DB_PASSWORD = '1234'
 DB_NAME = 'SynchroBots'
 DB_PORT = 3306
+DB_CONNECT_TIMEOUT = 3          # 연결 타임아웃 (초)
+
+# --- 연결 풀 설정 ---
+POOL_MIN_SIZE = 1               # 유휴 정리 후에도 유지할 최소 연결 수
+POOL_MAX_SIZE = 4               # 동시에 열 수 있는 최대 연결 수 (to_thread 동시 호출 수 이상 권장)
+POOL_CHECKOUT_TIMEOUT = 5.0     # 빈 연결을 기다리는 최대 시간 (초)
+POOL_IDLE_TIMEOUT = 300.0       # 이 시간(초) 이상 쓰지 않은 연결은 닫음 (MySQL wait_timeout보다 짧게)
+POOL_HEALTH_CHECK_AFTER = 30.0  # 이 시간(초) 이상 쉬었던 연결은 꺼낼 때 ping으로 확인 (끊겼으면 재연결)
+
+# 대기 시간 통계에 사용할 최근 샘플 수
+POOL_WAIT_SAMPLE_WINDOW = 500
+
+# --- 쿼리 빌더 설정 ---
+# 쿼리에 쓸 수 있는 테이블/컬럼 허용 목록. 식별자는 값처럼 바인딩할 수 없으므로 여기에 있는 이름만 SQL에 들어감
+# (새 테이블은 register_table()로 추가)
+ALLOWED_TABLES: Dict[str, frozenset] = {
+    "plc_control_state": frozenset({
+        "equipment_id", "run_mode", "direction", "frequency", "acceleration", "deceleration", "updated_at",
+    }),
+    "synchrobots.mission_plc_logs": frozenset({
+        "id", "equipment_id", "source", "description", "created_at",
+    }),
+    "mission_plc_log_rollup_minute": frozenset({
+        "equipment_id", "bucket", "description", "event_count", "first_at", "last_at",
+    }),
+    "mission_plc_log_rollup_hour": frozenset({
+        "equipment_id", "bucket", "description", "event_count", "first_at", "last_at",
+    }),
+}
+STATEMENT_CACHE_SIZE = 128      # 캐시할 SQL 문장 모양 수 (LRU)
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class PoolTimeoutError(Exception):
+    """POOL_CHECKOUT_TIMEOUT 안에 연결을 얻지 못했을 때 발생합니다."""
+
+
+class QueryError(ValueError):
+    """허용 목록에 없는 테이블/컬럼이나 잘못된 조건으로 쿼리를 만들려고 할 때 발생합니다."""
+
+
+# 일괄 기록 결과 (insert_logs_status_sync / AsyncDatabase.insert_logs_status)
+INSERT_OK = "ok"
+INSERT_UNAVAILABLE = "unavailable"     # 연결/풀 장애, 테이블/스키마 문제 등: 나중에 다시 시도하면 성공할 수 있음
+INSERT_REJECTED = "rejected"           # DataError / IntegrityError: 행 자체가 거부됨 (같은 행은 다시 시도해도 실패)
+
+
+class Between(NamedTuple):
+    """where 조건 값으로 쓰는 반열린 구간 start <= 컬럼 < end. (None인 쪽은 제한 없음)"""
+    start: Any
+    end: Any
+
+
+class ConnectionPool:
+    """
+    스레드 안전 MySQL 연결 풀. (asyncio.to_thread로 호출되는 여러 스레드가 함께 사용)
+
+    - 꺼낼 때(checkout) 오래 쉬었던 연결은 ping(reconnect=True)으로 확인하고 끊겼으면 다시 연결
+    - 쿼리 중 연결 오류(OperationalError/InterfaceError)가 난 연결은 풀에 돌려놓지 않고 버림
+    - idle_timeout 이상 쓰지 않은 연결은 min_size개만 남기고 닫음
+    - 연결은 autocommit으로 열어 재사용 시 이전 트랜잭션 스냅샷을 보지 않도록 함
+      (여러 문장을 한 트랜잭션으로 묶을 때는 conn.begin() / conn.commit() 사용)
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 checkout_timeout: float = POOL_CHECKOUT_TIMEOUT, idle_timeout: float = POOL_IDLE_TIMEOUT,
+                 health_check_after: float = POOL_HEALTH_CHECK_AFTER, name: str = "DB POOL"):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"잘못된 풀 크기: min={min_size}, max={max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[Any, float]] = deque()     # (연결, 마지막 반납 시각)
+        self._size = 0                                     # 열려 있는 연결 수 (사용 중 포함)
+
+        # 지표
+        self.checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.evicted = 0
+        self.discarded = 0
+        self.reconnects = 0
+        self.recent_waits: Deque[float] = deque(maxlen=POOL_WAIT_SAMPLE_WINDOW)
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        # 가장 오래 쉰 연결이 왼쪽 끝에 있음 (반납은 오른쪽, 꺼내기도 오른쪽)
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self.evicted += 1
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _open(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self.created += 1
+        return conn
+
+    def acquire(self):
+        """연결 하나를 꺼냅니다. 사용 후 반드시 release()로 돌려놓아야 합니다. (connection() 권장)"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        with self._cond:
+            while True:
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError(f"[{self.name}] {self.checkout_timeout}초 안에 DB 연결을 얻지 못했습니다.")
+                self._cond.wait(remaining)
+            self.checkouts += 1
+            self.recent_waits.append(time.monotonic() - started)
+
+        if conn is None:
+            return self._open()
+
+        if time.monotonic() - last_used > self.health_check_after:
+            try:
+                # 서버가 연결을 끊었으면 같은 연결 객체로 다시 연결
+                if not conn.open:
+                    self.reconnects += 1
+                conn.ping(reconnect=True)
+            except Exception:
+                self._close_quietly(conn)
+                self.reconnects += 1
+                return self._open()
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        """연결을 풀에 돌려놓습니다. broken이면 닫고 버립니다."""
+        if broken or not getattr(conn, "open", True):
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self.discarded += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """with db_pool.connection() as conn: 형태로 연결을 빌려 씁니다."""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def close_all(self):
+        """유휴 연결을 모두 닫습니다. (사용 중인 연결은 반납 시 풀에 남음)"""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            idle, size = len(self._idle), self._size
+            recent = sorted(self.recent_waits)
+        p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "created": self.created,
+            "evicted": self.evicted,
+            "discarded": self.discarded,
+            "reconnects": self.reconnects,
+            "wait_p95_ms": p95 * 1000,
+            "wait_max_ms": (recent[-1] * 1000) if recent else 0.0,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 연결={m['size']}/{self.max_size} (사용중 {m['in_use']}, 유휴 {m['idle']}) | "
+                f"checkouts={m['checkouts']} timeouts={m['timeouts']} created={m['created']} "
+                f"evicted={m['evicted']} discarded={m['discarded']} reconnects={m['reconnects']} | "
+                f"wait(p95/max)={m['wait_p95_ms']:.1f}/{m['wait_max_ms']:.1f}ms")
+
+
+def _connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        port=DB_PORT,
+        charset='utf8',
+        autocommit=True,
+        connect_timeout=DB_CONNECT_TIMEOUT,
+    )
+
+
+# 모듈 공용 연결 풀 (첫 사용 시 연결)
+db_pool = ConnectionPool(_connect)
+
+
+# --- 쿼리 빌더 ---
+def register_table(table: str, columns: Iterable[str]):
+    """허용 목록에 테이블과 컬럼을 추가합니다. (이미 있으면 컬럼을 합침)"""
+    for part in table.split("."):
+        if not _IDENTIFIER_RE.match(part):
+            raise QueryError(f"잘못된 테이블 이름: {table!r}")
+    columns = frozenset(columns)
+    for column in columns:
+        if not _IDENTIFIER_RE.match(column):
+            raise QueryError(f"잘못된 컬럼 이름: {column!r}")
+    ALLOWED_TABLES[table] = ALLOWED_TABLES.get(table, frozenset()) | columns
+
+
+def _quote_table(table: str) -> str:
+    if table not in ALLOWED_TABLES:
+        raise QueryError(f"허용 목록에 없는 테이블: {table!r}")
+    return ".".join(f"`{part}`" for part in table.split("."))
+
+
+def _quote_column(table: str, column: str) -> str:
+    if column not in ALLOWED_TABLES[table]:
+        raise QueryError(f"허용 목록에 없는 컬럼: {table}.{column}")
+    return f"`{column}`"
+
+
+def _where_shape(where: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str, int], ...]:
+    """조건 딕셔너리의 모양(컬럼, 종류, 값 개수). 값 자체는 포함하지 않으므로 문장 캐시 키로 사용합니다."""
+    shape = []
+    for column, value in (where or {}).items():
+        if value is None:
+            shape.append((column, "null", 0))
+        elif isinstance(value, Between):
+            bounds = ("ge" if value.start is not None else "") + ("lt" if value.end is not None else "")
+            shape.append((column, bounds or "any", len(bounds) // 2))
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            shape.append((column, "in", len(value)))
+        else:
+            shape.append((column, "eq", 1))
+    return tuple(shape)
+
+
+def _where_params(where: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    params = []
+    for value in (where or {}).values():
+        if value is None:
+            continue
+        if isinstance(value, Between):
+            params.extend(bound for bound in value if bound is not None)
+            continue
+        if isinstance(value, (list, tuple, set, frozenset)):
+            params.extend(value)
+        else:
+            params.append(value)
+    return tuple(params)
+
+
+class StatementCache:
+    """
+    검증과 조립을 마친 SQL 문장을 모양(테이블, 컬럼, 조건 모양) 기준으로 보관하는 LRU 캐시. (스레드 안전)
+    같은 모양의 쿼리는 식별자 검증과 문자열 조립 없이 캐시된 문장에 값만 바인딩합니다.
+    """
+
+    def __init__(self, max_size: int = STATEMENT_CACHE_SIZE, name: str = "DB STMT"):
+        self.max_size = max_size
+        self.name = name
+        self._lock = threading.Lock()
+        self._statements: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        with self._lock:
+            sql = self._statements.get(key)
+            if sql is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return sql
+        sql = build()
+        with self._lock:
+            self.misses += 1
+            self._statements[key] = sql
+            if len(self._statements) > self.max_size:
+                self._statements.popitem(last=False)
+        return sql
+
+    def clear(self):
+        with self._lock:
+            self._statements.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._statements)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 문장={m['size']}/{self.max_size} | hits={m['hits']} misses={m['misses']} "
+                f"(적중률 {m['hit_rate'] * 100:.1f}%)")
+
+
+# 모듈 공용 문장 캐시 (풀의 모든 연결이 함께 사용)
+statement_cache = StatementCache()
+
+
+def build_select(table: str, columns: Sequence[str], where: Optional[Dict[str, Any]] = None,
+                 order_by: Sequence[str] = ()) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    SELECT 문장과 바인딩 값을 만듭니다.
+
+    Args:
+        table: 허용 목록의 테이블 이름.
+        columns: 조회할 컬럼 이름 리스트.
+        where: {컬럼: 값} 조건 (AND로 결합). 값이 리스트/튜플이면 IN (...), None이면 IS NULL,
+               Between(start, end)이면 start <= 컬럼 < end.
+        order_by: 정렬 컬럼 이름 리스트. 이름 앞에 '-'를 붙이면 내림차순.
+
+    Returns:
+        (%s 자리표시자를 쓰는 SQL, 값 튜플). cursor.execute(sql, params)로 실행합니다.
+    """
+    shape = _where_shape(where)
+    columns = tuple(columns)
+    order_by = tuple(order_by)
+
+    def build() -> str:
+        if not columns:
+            raise QueryError("조회할 컬럼이 없습니다.")
+        table_sql = _quote_table(table)
+        columns_sql = ", ".join(_quote_column(table, column) for column in columns)
+        clauses = []
+        for column, kind, count in shape:
+            column_sql = _quote_column(table, column)
+            if kind == "null":
+                clauses.append(f"{column_sql} IS NULL")
+            elif kind in ("ge", "lt", "gelt"):
+                if kind.startswith("ge"):
+                    clauses.append(f"{column_sql} >= %s")
+                if kind.endswith("lt"):
+                    clauses.append(f"{column_sql} < %s")
+            elif kind == "any":
+                continue
+            elif kind == "in":
+                # 빈 IN 목록은 MySQL 문법 오류이므로 항상 거짓인 조건으로 대체
+                clauses.append(f"{column_sql} IN ({', '.join(['%s'] * count)})" if count else "1 = 0")
+            else:
+                clauses.append(f"{column_sql} = %s")
+        where_sql = " AND ".join(clauses) if clauses else "1 = 1"
+        sql = f"SELECT {columns_sql} FROM {table_sql} WHERE {where_sql}"
+        if order_by:
+            sql += " ORDER BY " + ", ".join(
+                f"{_quote_column(table, column.lstrip('-'))} {'DESC' if column.startswith('-') else 'ASC'}"
+                for column in order_by
+            )
+        return sql
+
+    sql = statement_cache.get(("select", table, columns, shape, order_by), build)
+    return sql, _where_params(where)
+
+
+def build_insert(table: str, columns: Sequence[str]) -> str:
+    """INSERT ... VALUES (%s, ...) 문장을 만듭니다. (executemany로 여러 행 기록 가능)"""
+    columns = tuple(columns)
+
+    def build() -> str:
+        if not columns:
+            raise QueryError("기록할 컬럼이 없습니다.")
+        table_sql = _quote_table(table)
+        columns_sql = ", ".join(_quote_column(table, column) for column in columns)
+        return f"INSERT INTO {table_sql} ({columns_sql}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    return statement_cache.get(("insert", table, columns), build)
+
+
 
 def insert_log_sync(equipment_id: str, source: str, description: str) -> bool:
     """
     동기(Blocking) 방식으로 데이터베이스에 로그를 삽입하는 함수.
     이 함수는 asyncio.to_thread로 감싸져 메인 루프를 블록하지 않도록 호출됩니다.
+    연결은 db_pool에서 빌려 쓰고 돌려놓습니다.
     """
-    conn = None
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
     try:
-        current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-        
-        # 1. DB 연결
-        conn = pymysql.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            db=DB_NAME,
-            port=DB_PORT,
-            charset='utf8'
-        )
-        cursor = conn.cursor()
-
-        # 2. INSERT 쿼리 (current_timestamp(6) 사용)
-        sql = """
-            INSERT INTO synchrobots.mission_plc_logs
-            (
-                equipment_id,
-                source,
-                description,
-                created_at
-            )
-            VALUES (%s, %s, %s, current_timestamp(6))
-        """
-        
-        # 3. 쿼리에 전달할 값
-        data_to_insert = (equipment_id, "PLC", description)
+        # 1. 풀에서 DB 연결 가져오기
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
 
-        # 4. 쿼리 실행
-        cursor.execute(sql, data_to_insert)
+            # 2. INSERT 쿼리 (current_timestamp(6) 사용)
+            sql = """
+                INSERT INTO synchrobots.mission_plc_logs
+                (
+                    equipment_id,
+                    source,
+                    description,
+                    created_at
+                )
+                VALUES (%s, %s, %s, current_timestamp(6))
+            """
 
-        # 5. 변경사항 커밋
-        conn.commit()
-        # print(f"[{current_time}] [DB LOG] ✅ 성공 - EQ: {equipment_id}, Desc: {description}\n")
-        return True
+            # 3. 쿼리에 전달할 값
+            data_to_insert = (equipment_id, "PLC", description)
+
+            # 4. 쿼리 실행
+            cursor.execute(sql, data_to_insert)
+
+            # 5. 변경사항 커밋
+            conn.commit()
+            # print(f"[{current_time}] [DB LOG] ✅ 성공 - EQ: {equipment_id}, Desc: {description}\n")
+            return True
 
     except pymysql.err.MySQLError as e:
         print(f"[{current_time}] [DB LOG] ❌ MySQL 오류 발생: {e}")
-        if conn:
-            conn.rollback()
         return False
     except Exception as e:
         print(f"[{current_time}] [DB LOG] ❌ 예기치 않은 오류 발생: {e}")
-        if conn:
-            conn.rollback()
         return False
-            
-    finally:
-        # 6. DB 연결 종료
-        if conn:
-            conn.close()
 
-def select_data_sync(table_name: str, columns: List[str], condition: str = "1=1") -> Tuple[bool, List[Tuple[Any, ...]]]:
+def insert_logs_sync(rows: List[Tuple[str, str, str, Any]]) -> bool:
+    """
+    여러 로그 행을 한 트랜잭션에서 executemany로 삽입합니다. (PLC_LogWriter의 일괄 기록용)
+
+    Args:
+        rows: (equipment_id, source, description, created_at) 튜플 리스트.
+              created_at은 클라이언트가 이벤트를 잡은 시각(마이크로초 포함 datetime)입니다.
+
+    Returns:
+        성공 여부. 실패 시 트랜잭션 전체를 롤백하므로 일부만 기록되는 경우는 없습니다.
+        (실패 원인을 구분하려면 insert_logs_status_sync 사용)
+    """
+    return insert_logs_status_sync(rows) == INSERT_OK
+
+
+def insert_logs_status_sync(rows: List[Tuple[str, str, str, Any]]) -> str:
+    """
+    insert_logs_sync와 같지만 결과를 구분해 반환합니다.
+
+    Returns:
+        INSERT_OK, INSERT_REJECTED(DataError / IntegrityError),
+        INSERT_UNAVAILABLE(그 외 모든 오류. 연결/풀 장애, 테이블 없음(ProgrammingError) 등) 중 하나.
+        행을 버려도 되는 경우는 INSERT_REJECTED뿐이므로, 원인이 불분명한 오류는 다시 시도하도록 INSERT_UNAVAILABLE로 봅니다.
+    """
+    if not rows:
+        return INSERT_OK
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            sql = build_insert("synchrobots.mission_plc_logs", ("equipment_id", "source", "description", "created_at"))
+            # pymysql은 VALUES 형태의 INSERT를 executemany에서 다중 행 INSERT 하나로 묶어 보냄
+            conn.begin()
+            try:
+                cursor.executemany(sql, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return INSERT_OK
+
+    except (pymysql.err.OperationalError, pymysql.err.InterfaceError, PoolTimeoutError) as e:
+        print(f"[{current_time}] [DB LOG] ❌ DB 연결 오류 ({len(rows)}행 일괄 기록): {e}")
+        return INSERT_UNAVAILABLE
+    except (pymysql.err.DataError, pymysql.err.IntegrityError) as e:
+        print(f"[{current_time}] [DB LOG] ❌ MySQL이 행을 거부함 ({len(rows)}행 일괄 기록): {e}")
+        return INSERT_REJECTED
+    except pymysql.err.MySQLError as e:
+        print(f"[{current_time}] [DB LOG] ❌ MySQL 오류 발생 ({len(rows)}행 일괄 기록): {e}")
+        return INSERT_UNAVAILABLE
+    except Exception as e:
+        print(f"[{current_time}] [DB LOG] ❌ 예기치 않은 오류 발생 ({len(rows)}행 일괄 기록): {e}")
+        return INSERT_UNAVAILABLE
+
+
+def insert_rows_sync(table_name: str, columns: Sequence[str], rows: List[Tuple[Any, ...]]) -> bool:
+    """
+    허용 목록의 테이블에 여러 행을 한 트랜잭션에서 다중 행 INSERT로 기록합니다. (텔레메트리 등 일괄 기록용)
+
+    Args:
+        table_name: 허용 목록의 테이블 이름.
+        columns: 기록할 컬럼 이름 리스트.
+        rows: columns 순서의 값 튜플 리스트.
+
+    Returns:
+        성공 여부. 실패 시 트랜잭션 전체를 롤백합니다.
+    """
+    if not rows:
+        return True
+    current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        sql = build_insert(table_name, columns)
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            conn.begin()
+            try:
+                cursor.executemany(sql, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return True
+
+    except QueryError as e:
+        print(f"[{current_time}] [DB INSERT] ❌ 잘못된 쿼리: {e}")
+        return False
+    except pymysql.err.MySQLError as e:
+        print(f"[{current_time}] [DB INSERT] ❌ MySQL 오류 발생 ({table_name} {len(rows)}행 일괄 기록): {e}")
+        return False
+    except Exception as e:
+        print(f"[{current_time}] [DB INSERT] ❌ 예기치 않은 오류 발생 ({table_name} {len(rows)}행 일괄 기록): {e}")
+        return False
+
+
+def select_data_sync(table_name: str, columns: List[str], where: Optional[Dict[str, Any]] = None,
+                     order_by: Sequence[str] = ()) -> Tuple[bool, List[Tuple[Any, ...]]]:
     """
     동기(Blocking) 방식으로 데이터베이스에서 데이터를 조회하는 함수.
-    
+    테이블/컬럼 이름은 허용 목록(ALLOWED_TABLES)으로 검증하고, 조건 값은 바인딩 값으로 전달합니다.
+
     Args:
         table_name: 조회할 테이블 이름. (예: 'plc_control_state')
         columns: 조회할 컬럼 이름 리스트. (예: ['run_mode', 'frequency'])
-        condition: WHERE 절에 들어갈 조건 문자열. (예: "equipment_id = 'EQ_01'")
+        where: {컬럼: 값} 조건. (예: {'equipment_id': 'EQ_01'}, {'equipment_id': ['EQ_01', 'EQ_02']})
+        order_by: 정렬 컬럼 이름 리스트. ('-컬럼'은 내림차순)
 
     Returns:
         (성공 여부, 조회된 레코드 리스트). 레코드는 튜플의 리스트 형태입니다.
     """
-    conn = None
     results = []
     success = False
     current_time = time.strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        # 1. DB 연결
-        conn = pymysql.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            db=DB_NAME,
-            port=DB_PORT,
-            charset='utf8'
-        )
-        cursor = conn.cursor()
-
-        # 2. SELECT 쿼리 생성
-        columns_str = ", ".join(columns)
-        # DB_NAME을 붙이는 것은 이미 connect 시점에 정의했으므로, 테이블 이름만 사용합니다.
-        sql = f"""
-            SELECT {columns_str}
-            FROM {table_name}
-            WHERE {condition}
-        """
-        
-        # 3. 쿼리 실행
-        cursor.execute(sql)
+        # 1. SELECT 쿼리 생성 (같은 모양의 쿼리는 문장 캐시 사용)
+        sql, params = build_select(table_name, columns, where, order_by)
 
-        # 4. 결과 가져오기
-        results = cursor.fetchall()
-        
+        # 2. 풀에서 DB 연결 가져오기
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # 3. 쿼리 실행
+            cursor.execute(sql, params)
+
+            # 4. 결과 가져오기
+            results = cursor.fetchall()
 
-        
         success = True
-        # print(f"[{current_time}] [DB SELECT] ✅ 성공 - Table: {table_name}, {len(results)}개 레코드 조회. 조건: {condition}")
-        
+        # print(f"[{current_time}] [DB SELECT] ✅ 성공 - Table: {table_name}, {len(results)}개 레코드 조회. 조건: {where}")
+
+    except QueryError as e:
+        print(f"[{current_time}] [DB SELECT] ❌ 잘못된 쿼리: {e}")
     except pymysql.err.MySQLError as e:
         print(f"[{current_time}] [DB SELECT] ❌ MySQL 오류 발생: {e}")
     except Exception as e:
         print(f"[{current_time}] [DB SELECT] ❌ 예기치 않은 오류 발생: {e}")
-            
-    finally:
-        # 5. DB 연결 종료
-        if conn:
-            conn.close()
-            
+
     return success, results
 
 
+# --- mission_plc_logs 롤업 조회 (롤업 갱신은 PLC_LogRollup.LogRollupJob) ---
+LOG_ROLLUP_TABLES = {
+    "minute": "mission_plc_log_rollup_minute",
+    "hour": "mission_plc_log_rollup_hour",
+}
+
+
+def select_log_counts_sync(equipment_ids: Sequence[str], start: Any, end: Any, resolution: str = "hour",
+                           descriptions: Optional[Sequence[str]] = None) -> Tuple[bool, List[Tuple[Any, ...]]]:
+    """
+    mission_plc_logs 원본 대신 분/시간 롤업 테이블에서 구간별 로그 건수를 조회합니다. (대시보드용)
+
+    Args:
+        equipment_ids: 조회할 설비 ID 리스트.
+        start, end: 조회 구간 start <= bucket < end (datetime). 구간 경계는 resolution 단위로 맞추는 것을 권장합니다.
+        resolution: 'minute' 또는 'hour'.
+        descriptions: 특정 설명(예: ['Conveyor STOP'])만 조회할 때 지정. None이면 전체.
+
+    Returns:
+        (성공 여부, (equipment_id, bucket, description, event_count) 리스트). 설비, bucket 순으로 정렬됩니다.
+        롤업은 LogRollupJob 주기만큼 늦게 반영됩니다.
+    """
+    table = LOG_ROLLUP_TABLES.get(resolution)
+    if table is None:
+        print(f"[DB SELECT] ❌ 지원하지 않는 롤업 단위: {resolution!r} (minute/hour)")
+        return False, []
+    where: Dict[str, Any] = {"equipment_id": tuple(equipment_ids), "bucket": Between(start, end)}
+    if descriptions is not None:
+        where["description"] = tuple(descriptions)
+    return select_data_sync(table, ["equipment_id", "bucket", "description", "event_count"], where,
+                            order_by=("equipment_id", "bucket"))
+
 
 if __name__ == "__main__":
     # ... (기존 insert 테스트는 그대로 유지) ...
@@ -147,7 +657,7 @@ if __name__ == "__main__":
     select_success, control_state = select_data_sync(
         table_name='plc_control_state',
         columns=target_columns,
-        condition="equipment_id = 'CONVEYOR01'" 
+        where={'equipment_id': 'CONVEYOR01'},
     )
     
     print(f"제어 상태 조회 테스트 결과: {'성공' if select_success else '실패'}")
@@ -161,4 +671,7 @@ if __name__ == "__main__":
         # 패널 제어 로직에 이 데이터를 활용할 수 있습니다.
         
     elif select_success:
-        print("조회 조건에 맞는 장비 제어 상태가 없습니다.")
\ No newline at end of file
+        print("조회 조건에 맞는 장비 제어 상태가 없습니다.")
+
+    print(db_pool.format_metrics())
+    print(statement_cache.format_metrics())
\ No newline at end of file
@@ -0,0 +1,343 @@
+# PLC_DataBaseAsync.py
+"""
+asyncio 네이티브 MySQL 백엔드 (aiomysql).
+
+PLC_DataBase의 함수들은 동기 pymysql이라 asyncio.to_thread로 감싸 호출하며, 그동안 기본 실행기(스레드 풀)의
+스레드 하나를 점유합니다. 센서 이벤트가 몰리면 DB 호출이 스레드 풀을 채워 같은 실행기를 쓰는 다른 작업이
+기다리게 됩니다. AsyncDatabase는 같은 의미의 조회/기록을 이벤트 루프 위에서 바로 수행합니다.
+
+    - 자체 aiomysql 연결 풀 (PLC_DataBase.db_pool과 별개, autocommit)
+    - insert_log / insert_logs / insert_logs_status / insert_rows / select_data : PLC_DataBase의 같은 이름
+      *_sync 함수와 같은 인자와 반환값. SQL은 PLC_DataBase의 쿼리 빌더(허용 목록 + 바인딩 + 문장 캐시)를 그대로 사용
+    - 쿼리 중 연결 오류나 타임아웃이 난 연결은 풀에 돌려놓지 않고 닫음
+
+동기 코드(스레드, 스크립트)를 위한 얇은 shim 함수 insert_log_sync / insert_logs_sync / insert_rows_sync / select_data_sync도
+제공합니다.
+async_db가 시작된 이벤트 루프가 있으면 그 루프에서 실행하고 결과를 기다리며, 없으면 PLC_DataBase의 pymysql 구현을 사용합니다.
+
+aiomysql이 설치되어 있지 않으면 ASYNC_DB_AVAILABLE이 False이며, 클라이언트는 기존 pymysql + 스레드 방식으로 동작합니다.
+    pip install aiomysql
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import pymysql
+
+import PLC_DataBase
+from PLC_DataBase import (
+    DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, DB_PORT, DB_CONNECT_TIMEOUT,
+    POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_CHECKOUT_TIMEOUT, POOL_IDLE_TIMEOUT, POOL_WAIT_SAMPLE_WINDOW,
+    INSERT_OK, INSERT_REJECTED, INSERT_UNAVAILABLE, QueryError, build_insert, build_select,
+)
+
+try:
+    import aiomysql
+    ASYNC_DB_AVAILABLE = True
+except ImportError:
+    aiomysql = None
+    ASYNC_DB_AVAILABLE = False
+
+DEFAULT_QUERY_TIMEOUT = 5.0     # 연결 대기 + 쿼리 실행 전체 제한 시간 (초)
+
+LOG_TABLE = "synchrobots.mission_plc_logs"
+LOG_COLUMNS = ("equipment_id", "source", "description", "created_at")
+
+
+class AsyncDatabase:
+    """aiomysql 연결 풀 위에서 PLC_DataBase와 같은 의미의 조회/기록을 수행합니다."""
+
+    def __init__(self, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 checkout_timeout: float = POOL_CHECKOUT_TIMEOUT, query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+                 idle_timeout: float = POOL_IDLE_TIMEOUT, name: str = "DB ASYNC"):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.query_timeout = query_timeout
+        self.idle_timeout = idle_timeout
+        self.name = name
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+        # 지표
+        self.queries = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.recent_latency: Deque[float] = deque(maxlen=POOL_WAIT_SAMPLE_WINDOW)
+
+    # --- 풀 관리 ---
+    async def start(self):
+        """연결 풀을 만듭니다. (실행 중인 이벤트 루프 안에서 호출, 여러 번 호출해도 한 번만 생성)"""
+        if aiomysql is None:
+            raise RuntimeError("aiomysql이 설치되어 있지 않습니다. (pip install aiomysql)")
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._pool is not None:
+                return
+            self._pool = await aiomysql.create_pool(
+                host=DB_HOST,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                db=DB_NAME,
+                port=DB_PORT,
+                charset='utf8',
+                autocommit=True,
+                connect_timeout=DB_CONNECT_TIMEOUT,
+                minsize=self.min_size,
+                maxsize=self.max_size,
+                # MySQL wait_timeout보다 먼저 오래된 연결을 다시 열도록 함
+                pool_recycle=int(self.idle_timeout),
+            )
+            self.loop = asyncio.get_running_loop()
+            print(f"[{self.name}] ✅ aiomysql 연결 풀 생성 ({self.min_size}~{self.max_size}개)")
+
+    async def close(self):
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        self.loop = None
+        pool.close()
+        await pool.wait_closed()
+
+    async def _run(self, operation: Callable[[Any], Awaitable[Any]]) -> Any:
+        """풀에서 연결을 빌려 operation(conn)을 실행합니다. 연결 오류/타임아웃이 난 연결은 닫고 버립니다."""
+        if self._pool is None:
+            await self.start()
+        started = time.perf_counter()
+        conn = await asyncio.wait_for(self._pool.acquire(), timeout=self.checkout_timeout)
+        broken = False
+        try:
+            return await asyncio.wait_for(operation(conn), timeout=self.query_timeout)
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError, asyncio.TimeoutError,
+                asyncio.CancelledError):
+            # 응답을 다 읽지 못한 연결은 다음 쿼리에서 어긋나므로 재사용하지 않음
+            broken = True
+            raise
+        finally:
+            if broken:
+                self.discarded += 1
+                conn.close()
+            self._pool.release(conn)
+            self.queries += 1
+            self.recent_latency.append(time.perf_counter() - started)
+
+    # --- 조회/기록 ---
+    async def insert_log(self, equipment_id: str, source: str, description: str) -> bool:
+        """insert_log_sync와 같은 의미의 한 행 기록. (created_at은 DB의 current_timestamp(6))"""
+        current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        async def operation(conn):
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    INSERT INTO synchrobots.mission_plc_logs
+                    (
+                        equipment_id,
+                        source,
+                        description,
+                        created_at
+                    )
+                    VALUES (%s, %s, %s, current_timestamp(6))
+                    """,
+                    (equipment_id, "PLC", description),
+                )
+            return True
+
+        try:
+            return await self._run(operation)
+        except asyncio.TimeoutError:
+            self._timeout(current_time, "DB LOG")
+        except pymysql.err.MySQLError as e:
+            self._error(current_time, "DB LOG", f"MySQL 오류 발생: {e}")
+        except Exception as e:
+            self._error(current_time, "DB LOG", f"예기치 않은 오류 발생: {e}")
+        return False
+
+    async def insert_logs(self, rows: List[Tuple[str, str, str, Any]]) -> bool:
+        """insert_logs_sync와 같은 의미의 일괄 기록. (한 트랜잭션, 실패 시 전체 롤백)"""
+        return await self.insert_logs_status(rows) == INSERT_OK
+
+    async def insert_logs_status(self, rows: List[Tuple[str, str, str, Any]]) -> str:
+        """insert_logs_status_sync와 같은 의미의 일괄 기록. (INSERT_OK / INSERT_UNAVAILABLE / INSERT_REJECTED)"""
+        if not rows:
+            return INSERT_OK
+        current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        sql = build_insert(LOG_TABLE, LOG_COLUMNS)
+
+        async def operation(conn):
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(sql, rows)
+                await conn.commit()
+            except pymysql.err.MySQLError:
+                # 취소/타임아웃 때는 멈춘 연결에서 롤백을 기다리지 않음 (_run이 연결을 닫으면 서버가 롤백)
+                await conn.rollback()
+                raise
+            return INSERT_OK
+
+        try:
+            return await self._run(operation)
+        except asyncio.TimeoutError:
+            self._timeout(current_time, "DB LOG")
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+            self._error(current_time, "DB LOG", f"DB 연결 오류 ({len(rows)}행 일괄 기록): {e}")
+        except (pymysql.err.DataError, pymysql.err.IntegrityError) as e:
+            self._error(current_time, "DB LOG", f"MySQL이 행을 거부함 ({len(rows)}행 일괄 기록): {e}")
+            return INSERT_REJECTED
+        except pymysql.err.MySQLError as e:
+            self._error(current_time, "DB LOG", f"MySQL 오류 발생 ({len(rows)}행 일괄 기록): {e}")
+        except Exception as e:
+            self._error(current_time, "DB LOG", f"예기치 않은 오류 발생 ({len(rows)}행 일괄 기록): {e}")
+        # 데이터 오류가 아니면 다시 시도할 수 있도록 장애로 봄 (insert_logs_status_sync와 같은 분류)
+        return INSERT_UNAVAILABLE
+
+    async def insert_rows(self, table_name: str, columns: Sequence[str], rows: List[Tuple[Any, ...]]) -> bool:
+        """insert_rows_sync와 같은 의미의 일괄 기록. (한 트랜잭션, 실패 시 전체 롤백)"""
+        if not rows:
+            return True
+        current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            sql = build_insert(table_name, columns)
+
+            async def operation(conn):
+                await conn.begin()
+                try:
+                    async with conn.cursor() as cursor:
+                        await cursor.executemany(sql, rows)
+                    await conn.commit()
+                except pymysql.err.MySQLError:
+                    await conn.rollback()
+                    raise
+                return True
+
+            return await self._run(operation)
+        except QueryError as e:
+            self._error(current_time, "DB INSERT", f"잘못된 쿼리: {e}")
+        except asyncio.TimeoutError:
+            self._timeout(current_time, "DB INSERT")
+        except pymysql.err.MySQLError as e:
+            self._error(current_time, "DB INSERT", f"MySQL 오류 발생 ({table_name} {len(rows)}행 일괄 기록): {e}")
+        except Exception as e:
+            self._error(current_time, "DB INSERT", f"예기치 않은 오류 발생 ({table_name} {len(rows)}행 일괄 기록): {e}")
+        return False
+
+    async def select_data(self, table_name: str, columns: List[str], where: Optional[Dict[str, Any]] = None,
+                          order_by: Sequence[str] = ()) -> Tuple[bool, List[Tuple[Any, ...]]]:
+        """select_data_sync와 같은 의미의 조회. (성공 여부, 레코드 리스트)"""
+        current_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            sql, params = build_select(table_name, columns, where, order_by)
+
+            async def operation(conn):
+                async with conn.cursor() as cursor:
+                    await cursor.execute(sql, params)
+                    return await cursor.fetchall()
+
+            return True, list(await self._run(operation))
+        except QueryError as e:
+            self._error(current_time, "DB SELECT", f"잘못된 쿼리: {e}")
+        except asyncio.TimeoutError:
+            self._timeout(current_time, "DB SELECT")
+        except pymysql.err.MySQLError as e:
+            self._error(current_time, "DB SELECT", f"MySQL 오류 발생: {e}")
+        except Exception as e:
+            self._error(current_time, "DB SELECT", f"예기치 않은 오류 발생: {e}")
+        return False, []
+
+    def _error(self, current_time: str, tag: str, message: str):
+        self.errors += 1
+        print(f"[{current_time}] [{tag}] ❌ {message}")
+
+    def _timeout(self, current_time: str, tag: str):
+        self.timeouts += 1
+        self._error(current_time, tag, f"{self.query_timeout}초 안에 DB 응답이 없습니다.")
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_latency)
+        p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+        pool = self._pool
+        return {
+            "size": pool.size if pool is not None else 0,
+            "free": pool.freesize if pool is not None else 0,
+            "queries": self.queries,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "discarded": self.discarded,
+            "latency_p95_ms": p95 * 1000,
+            "latency_max_ms": (recent[-1] * 1000) if recent else 0.0,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 연결={m['size']}/{self.max_size} (유휴 {m['free']}) | queries={m['queries']} "
+                f"errors={m['errors']} timeouts={m['timeouts']} discarded={m['discarded']} | "
+                f"latency(p95/max)={m['latency_p95_ms']:.1f}/{m['latency_max_ms']:.1f}ms")
+
+
+# 모듈 공용 비동기 DB (클라이언트 main에서 start())
+async_db = AsyncDatabase()
+
+
+# --- 동기 shim ---
+def _run_sync(call: Callable[[], Awaitable[Any]], fallback: Callable[[], Any]) -> Any:
+    """async_db 루프가 돌고 있으면 그 루프에서 call()을 실행하고 기다리며, 아니면 fallback()을 호출합니다."""
+    loop = async_db.loop
+    if loop is None or not loop.is_running():
+        return fallback()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # 루프 스레드에서 결과를 기다리면 루프가 멈추므로 async 함수를 직접 await 해야 함
+        raise RuntimeError("이벤트 루프 스레드에서는 async_db의 async 함수를 await 하세요.")
+    return asyncio.run_coroutine_threadsafe(call(), loop).result()
+
+
+def insert_log_sync(equipment_id: str, source: str, description: str) -> bool:
+    return _run_sync(lambda: async_db.insert_log(equipment_id, source, description),
+                     lambda: PLC_DataBase.insert_log_sync(equipment_id, source, description))
+
+
+def insert_logs_sync(rows: List[Tuple[str, str, str, Any]]) -> bool:
+    return _run_sync(lambda: async_db.insert_logs(rows),
+                     lambda: PLC_DataBase.insert_logs_sync(rows))
+
+
+def insert_rows_sync(table_name: str, columns: Sequence[str], rows: List[Tuple[Any, ...]]) -> bool:
+    return _run_sync(lambda: async_db.insert_rows(table_name, columns, rows),
+                     lambda: PLC_DataBase.insert_rows_sync(table_name, columns, rows))
+
+
+def select_data_sync(table_name: str, columns: List[str], where: Optional[Dict[str, Any]] = None,
+                     order_by: Sequence[str] = ()) -> Tuple[bool, List[Tuple[Any, ...]]]:
+    return _run_sync(lambda: async_db.select_data(table_name, columns, where, order_by),
+                     lambda: PLC_DataBase.select_data_sync(table_name, columns, where, order_by))
+
+
+if __name__ == "__main__":
+    async def _main():
+        if not ASYNC_DB_AVAILABLE:
+            print("aiomysql이 설치되어 있지 않습니다. (pip install aiomysql)", file=sys.stderr)
+            return
+        await async_db.start()
+        try:
+            ok, rows = await async_db.select_data(
+                'plc_control_state',
+                ['run_mode', 'direction', 'frequency', 'acceleration', 'deceleration'],
+                {'equipment_id': 'CONVEYOR01'},
+            )
+            print(f"제어 상태 조회 테스트 결과: {'성공' if ok else '실패'} {rows}")
+            print(async_db.format_metrics())
+        finally:
+            await async_db.close()
+
+    asyncio.run(_main())
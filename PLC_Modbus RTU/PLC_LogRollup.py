@@ -0,0 +1,263 @@
+# PLC_LogRollup.py
+"""
+mission_plc_logs 분/시간 롤업 (최고 수위(high-water mark) 기반 증분 갱신) + 조회용 인덱스 생성/확인.
+
+컨베이어 정지 횟수, 센서 감지 수, OK/NG 수를 시간대별로 세는 대시보드가 원본 mission_plc_logs를 매번
+훑지 않도록, LogRollupJob이 (equipment_id, 분/시간 bucket, description)별 건수를 롤업 테이블에 유지합니다.
+조회는 PLC_DataBase.select_log_counts_sync로 합니다.
+
+    mission_plc_log_rollup_minute / _hour
+        PRIMARY KEY (equipment_id, bucket, description) + event_count, first_at, last_at
+    mission_plc_log_rollup_state
+        롤업 이름 -> 마지막으로 반영한 mission_plc_logs.id (최고 수위)
+
+증분 갱신
+    - 매 주기 id가 (최고 수위, 상한] 인 행만 GROUP BY 하여 INSERT ... ON DUPLICATE KEY UPDATE 로 건수를 더함
+      (늦게 도착한 행(스풀 재전송 등)도 id가 새로 붙으므로 원래 created_at의 bucket에 더해짐)
+    - 상한은 "직전 주기에 본 MAX(id)"를 사용: AUTO_INCREMENT id는 커밋 순서와 다를 수 있어,
+      한 주기 동안 진행 중이던 트랜잭션이 모두 커밋된 뒤에 그 구간을 반영함 (롤업은 한 주기 늦게 반영)
+    - 롤업 갱신과 최고 수위 갱신은 한 트랜잭션 (SELECT ... FOR UPDATE로 여러 프로세스가 돌아도 중복 반영 없음)
+    - 한 트랜잭션은 최대 max_rows개 id 구간만 처리하고, 밀린 구간은 나누어 따라잡음
+
+인덱스
+    ensure_rollup_schema()가 롤업 테이블을 만들고, mission_plc_logs에 (equipment_id, created_at) 복합 인덱스가
+    있는지 information_schema로 확인하여 없으면 만든 뒤 다시 확인합니다. (원본 구간 조회용)
+"""
+import asyncio
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from PLC_DataBase import LOG_ROLLUP_TABLES, db_pool
+
+LOG_TABLE = "synchrobots.mission_plc_logs"
+ROLLUP_STATE_TABLE = "mission_plc_log_rollup_state"
+ROLLUP_NAME = "mission_plc_logs"
+
+# (테이블, 인덱스 이름, 컬럼) : ensure_rollup_schema가 만들고 확인하는 인덱스
+REQUIRED_INDEXES = (
+    (LOG_TABLE, "idx_mission_plc_logs_eq_created", ("equipment_id", "created_at")),
+)
+
+# 롤업 단위 -> bucket 계산식 (pymysql 바인딩 때문에 %는 %%로 씀)
+BUCKET_EXPRESSIONS = {
+    "minute": "DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:%%i:00')",
+    "hour": "DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:00:00')",
+}
+
+DEFAULT_ROLLUP_INTERVAL = 60.0
+DEFAULT_MAX_ROWS = 50000
+
+ROLLUP_DDL = tuple(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        equipment_id VARCHAR(64) NOT NULL,
+        bucket DATETIME NOT NULL,
+        description VARCHAR(255) NOT NULL,
+        event_count INT UNSIGNED NOT NULL,
+        first_at DATETIME(6) NOT NULL,
+        last_at DATETIME(6) NOT NULL,
+        PRIMARY KEY (equipment_id, bucket, description)
+    ) ENGINE=InnoDB
+    """
+    for table in LOG_ROLLUP_TABLES.values()
+) + (
+    f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_STATE_TABLE} (
+        name VARCHAR(64) NOT NULL PRIMARY KEY,
+        last_id BIGINT UNSIGNED NOT NULL,
+        updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+    ) ENGINE=InnoDB
+    """,
+)
+
+
+def _split_table(table: str) -> Tuple[Optional[str], str]:
+    schema, _, name = table.rpartition(".")
+    return (schema or None), name
+
+
+def _index_columns(cursor, table: str) -> Dict[str, Tuple[str, ...]]:
+    """테이블의 인덱스 이름 -> 컬럼 순서 튜플."""
+    schema, name = _split_table(table)
+    cursor.execute(
+        """
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE LOWER(TABLE_SCHEMA) = LOWER(COALESCE(%s, DATABASE())) AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """,
+        (schema, name),
+    )
+    indexes: Dict[str, Tuple[str, ...]] = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes[index_name] = indexes.get(index_name, ()) + (column_name,)
+    return indexes
+
+
+def ensure_index(cursor, table: str, index_name: str, columns: Sequence[str]) -> bool:
+    """columns로 시작하는 인덱스가 없으면 만들고, 만든 뒤 다시 확인합니다. 인덱스가 있으면 True."""
+    columns = tuple(columns)
+
+    def covered() -> bool:
+        return any(existing[:len(columns)] == columns for existing in _index_columns(cursor, table).values())
+
+    if covered():
+        return True
+    print(f"[LOG ROLLUP] 🔧 {table}에 인덱스 {index_name}({', '.join(columns)}) 생성 중...")
+    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})")
+    if covered():
+        return True
+    print(f"[LOG ROLLUP] ❌ 인덱스 {index_name} 생성 후에도 확인되지 않습니다.", file=sys.stderr)
+    return False
+
+
+def ensure_rollup_schema() -> bool:
+    """롤업 테이블과 필수 인덱스를 만들고 확인합니다. (스레드에서 호출)"""
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            for ddl in ROLLUP_DDL:
+                cursor.execute(ddl)
+            cursor.execute(
+                f"INSERT IGNORE INTO {ROLLUP_STATE_TABLE} (name, last_id) VALUES (%s, 0)", (ROLLUP_NAME,)
+            )
+            return all(ensure_index(cursor, *spec) for spec in REQUIRED_INDEXES)
+    except Exception as e:
+        print(f"[LOG ROLLUP] ❌ 롤업 테이블/인덱스 준비 실패: {e}", file=sys.stderr)
+        return False
+
+
+class LogRollupJob:
+    """mission_plc_logs를 최고 수위부터 증분으로 분/시간 롤업에 반영하는 주기 작업."""
+
+    def __init__(self, interval: float = DEFAULT_ROLLUP_INTERVAL, max_rows: int = DEFAULT_MAX_ROWS,
+                 name: str = "LOG ROLLUP"):
+        self.interval = interval
+        self.max_rows = max_rows
+        self.name = name
+        self._upper: Optional[int] = None      # 직전 주기에 본 MAX(id) (이번 주기의 상한)
+        self._schema_ready = False
+        self._task: Optional[asyncio.Task] = None
+
+        # 지표
+        self.runs = 0
+        self.transactions = 0
+        self.rolled_ids = 0
+        self.failures = 0
+        self.last_id = 0
+        self.last_duration = 0.0
+
+    def run_once(self) -> int:
+        """상한까지 롤업을 반영하고 반영한 id 구간 크기를 반환합니다. (스레드에서 호출)"""
+        if not self._schema_ready:
+            self._schema_ready = ensure_rollup_schema()
+            if not self._schema_ready:
+                self.failures += 1
+                return 0
+        started = time.monotonic()
+        rolled = 0
+        try:
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {LOG_TABLE}")
+                current_max = cursor.fetchone()[0]
+                upper, self._upper = self._upper, current_max
+                while upper is not None:
+                    moved = self._roll_chunk(conn, cursor, upper)
+                    if not moved:
+                        break
+                    rolled += moved
+        except Exception as e:
+            self.failures += 1
+            print(f"[{self.name}] ❌ 롤업 갱신 실패: {e}", file=sys.stderr)
+        self.runs += 1
+        self.rolled_ids += rolled
+        self.last_duration = time.monotonic() - started
+        return rolled
+
+    def _roll_chunk(self, conn, cursor, upper: int) -> int:
+        """(최고 수위, min(upper, 최고 수위 + max_rows)] 구간을 한 트랜잭션으로 반영합니다."""
+        conn.begin()
+        try:
+            cursor.execute(f"SELECT last_id FROM {ROLLUP_STATE_TABLE} WHERE name = %s FOR UPDATE", (ROLLUP_NAME,))
+            row = cursor.fetchone()
+            low = row[0] if row else 0
+            high = min(upper, low + self.max_rows)
+            if high <= low:
+                conn.rollback()
+                self.last_id = low
+                return 0
+            for resolution, table in LOG_ROLLUP_TABLES.items():
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (equipment_id, bucket, description, event_count, first_at, last_at)
+                    SELECT equipment_id, {BUCKET_EXPRESSIONS[resolution]}, LEFT(description, 255),
+                           COUNT(*), MIN(created_at), MAX(created_at)
+                    FROM {LOG_TABLE}
+                    WHERE id > %s AND id <= %s
+                    GROUP BY 1, 2, 3
+                    ON DUPLICATE KEY UPDATE
+                        event_count = event_count + VALUES(event_count),
+                        first_at = LEAST(first_at, VALUES(first_at)),
+                        last_at = GREATEST(last_at, VALUES(last_at))
+                    """,
+                    (low, high),
+                )
+            cursor.execute(f"UPDATE {ROLLUP_STATE_TABLE} SET last_id = %s WHERE name = %s", (high, ROLLUP_NAME))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.transactions += 1
+        self.last_id = high
+        return high - low
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """백그라운드 롤업 태스크를 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "transactions": self.transactions,
+            "rolled_ids": self.rolled_ids,
+            "last_id": self.last_id,
+            "failures": self.failures,
+            "last_duration_ms": self.last_duration * 1000,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 최고 수위 id={m['last_id']} | runs={m['runs']} transactions={m['transactions']} "
+                f"rolled={m['rolled_ids']} failures={m['failures']} | 마지막 {m['last_duration_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    # 롤업을 한 번 따라잡고 최근 24시간 시간별 건수를 출력
+    from datetime import datetime, timedelta
+
+    from PLC_DataBase import select_log_counts_sync
+
+    job = LogRollupJob()
+    job.run_once()      # 상한 확보
+    job.run_once()
+    print(job.format_metrics())
+    end = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    ok, rows = select_log_counts_sync(['CONVEYOR01', 'SENSER01', 'SENSER02'], end - timedelta(hours=24), end)
+    for equipment_id, bucket, description, count in rows:
+        print(f"{equipment_id} {bucket} {description}: {count}")
+    print(db_pool.format_metrics())
@@ -0,0 +1,385 @@
+# PLC_LogSpool.py
+"""
+MySQL 장애 대비 로컬 로그 스풀 (SQLite) + 재전송기 + 서킷 브레이커.
+
+DB_HOST의 MySQL이 죽었거나 느릴 때 insert가 실패하면 행이 사라지고, 매 시도마다 연결
+타임아웃을 기다리게 됩니다. SpooledDatabaseWriter는 PLC_LogWriter의 writer로 쓰이며
+
+    - 브레이커가 닫혀 있고(정상) 스풀이 비어 있으면 MySQL에 바로 기록
+    - MySQL 기록이 실패하거나, 브레이커가 열려 있거나, 스풀에 밀린 행이 있으면
+      로컬 SQLite 스풀(추가 전용)에 즉시 기록 -> 호출자는 DB를 기다리지 않음
+    - 백그라운드 재전송기가 브레이커가 허용할 때 스풀을 오래된 행부터 묶음 단위로 MySQL에 옮김
+
+연결 장애와 데이터 오류 구분
+    - 데이터 오류(DataError / IntegrityError)가 아닌 실패(연결/풀 장애, 타임아웃, 테이블 없음 등)는 모두
+      장애로 보고 브레이커 실패로 셈 (행은 스풀에 남아 재전송됨)
+    - 데이터 오류로 묶음이 거부되면 한 행씩 다시 기록하여 문제 행만 골라내고,
+      그 행은 스풀 파일의 log_dead_letter 테이블로 옮김 (나머지 행은 정상 기록, 재전송은 계속 진행)
+
+서킷 브레이커
+    CLOSED    : 정상. 연속 실패가 failure_threshold회가 되면 OPEN
+    OPEN      : reset_timeout초 동안 MySQL 시도 자체를 하지 않음 (연결 타임아웃 대기 없음)
+    HALF_OPEN : reset_timeout 후 한 번만 시도 허용. 성공하면 CLOSED, 실패하면 다시 OPEN
+
+스풀 파일은 프로그램 재시작 후에도 남으므로, 종료 시 옮기지 못한 행은 다음 실행에서 재전송됩니다.
+"""
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from PLC_DataBase import INSERT_OK, INSERT_REJECTED, INSERT_UNAVAILABLE, insert_logs_status_sync
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 10.0
+DEFAULT_REPLAY_BATCH = 500
+DEFAULT_REPLAY_INTERVAL = 2.0
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 서킷 브레이커. (스레드 안전)"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, name: str = "DB BREAKER"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == BREAKER_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return BREAKER_HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """지금 MySQL 시도를 해도 되는지 반환합니다. (HALF_OPEN에서는 한 번만 허용)"""
+        with self._lock:
+            if self._state == BREAKER_CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probe_in_flight:
+                return False
+            self._state = BREAKER_HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != BREAKER_CLOSED:
+                print(f"[{self.name}] ✅ MySQL 복구 확인. 브레이커 닫힘.")
+            self._state = BREAKER_CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == BREAKER_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != BREAKER_OPEN:
+                    self.opened_count += 1
+                    print(f"[{self.name}] ⚠️ MySQL 연속 실패 {self._failures}회. {self.reset_timeout}초 동안 시도 중단.",
+                          file=sys.stderr)
+                self._state = BREAKER_OPEN
+                self._opened_at = time.monotonic()
+
+
+class LogSpool:
+    """로그 행을 저장하는 추가 전용 SQLite 스풀. (여러 스레드에서 사용 가능)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL: 전원 차단 시 마지막 트랜잭션 일부만 잃을 수 있는 대신 append가 빠름
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS log_spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                equipment_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                description TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        # MySQL이 데이터 오류로 거부한 행 (재전송하지 않음, 확인 후 수동 처리)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS log_dead_letter (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                equipment_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                description TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                failed_at TEXT NOT NULL
+            )
+        """)
+
+    def append(self, rows: List[Tuple[str, str, str, Any]]):
+        """(equipment_id, source, description, created_at) 행들을 한 트랜잭션으로 추가합니다."""
+        params = [(eq, src, desc, str(created_at)) for eq, src, desc, created_at in rows]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO log_spool (equipment_id, source, description, created_at) VALUES (?, ?, ?, ?)",
+                    params,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def peek(self, limit: int) -> Tuple[List[int], List[Tuple[str, str, str, str]]]:
+        """가장 오래된 limit개 행의 id 리스트와 행 리스트를 반환합니다. (비어 있으면 ([], []))"""
+        with self._lock:
+            records = self._conn.execute(
+                "SELECT id, equipment_id, source, description, created_at FROM log_spool ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [record[0] for record in records], [record[1:] for record in records]
+
+    def delete_upto(self, last_id: int, dead_rows: List[tuple] = ()):
+        """last_id까지의 행을 지웁니다. dead_rows는 같은 트랜잭션에서 log_dead_letter로 옮깁니다."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._insert_dead_letter(dead_rows)
+                self._conn.execute("DELETE FROM log_spool WHERE id <= ?", (last_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def dead_letter(self, rows: List[tuple]):
+        """MySQL이 거부한 행들을 log_dead_letter에 추가합니다."""
+        with self._lock:
+            self._insert_dead_letter(rows)
+
+    def _insert_dead_letter(self, rows: List[tuple]):
+        failed_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._conn.executemany(
+            "INSERT INTO log_dead_letter (equipment_id, source, description, created_at, failed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(eq, src, desc, str(created_at), failed_at) for eq, src, desc, created_at in rows],
+        )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM log_spool").fetchone()[0]
+
+    def dead_letter_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM log_dead_letter").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SpooledDatabaseWriter:
+    """
+    MySQL 기록 + 실패 시 로컬 스풀 + 백그라운드 재전송. write() 또는 write_async()를 LogWriter의 writer로 사용합니다.
+    insert(rows) 는 MySQL 일괄 기록 함수이며 INSERT_OK / INSERT_UNAVAILABLE / INSERT_REJECTED 를 반환합니다.
+    (기본: PLC_DataBase.insert_logs_status_sync. bool을 반환하는 함수도 쓸 수 있으며, 이때 False는 연결 장애로 봄)
+    insert_async(rows) 를 주면 write_async()의 MySQL 기록은 스레드 없이 이벤트 루프에서 수행합니다.
+    (재전송과 거부된 묶음의 한 행씩 재시도는 계속 insert를 스레드에서 사용)
+    """
+
+    def __init__(self, spool: LogSpool, breaker: Optional[CircuitBreaker] = None,
+                 insert: Optional[Callable[[List[tuple]], Any]] = None,
+                 replay_batch: int = DEFAULT_REPLAY_BATCH, replay_interval: float = DEFAULT_REPLAY_INTERVAL,
+                 insert_async: Optional[Callable[[List[tuple]], Awaitable[Any]]] = None,
+                 name: str = "LOG SPOOL"):
+        self.spool = spool
+        self.breaker = breaker or CircuitBreaker()
+        self.insert = insert or insert_logs_status_sync
+        self.insert_async = insert_async
+        self.replay_batch = replay_batch
+        self.replay_interval = replay_interval
+        self.name = name
+        self._replay_lock = threading.Lock()
+        self._backlog_lock = threading.Lock()     # 스풀 추가와 대기 행 수 갱신을 함께 묶음
+        self._task: Optional[asyncio.Task] = None
+        self._backlog = spool.count()
+
+        # 지표
+        self.direct_rows = 0
+        self.spooled_rows = 0
+        self.replayed_rows = 0
+        self.dead_rows = 0
+
+    @staticmethod
+    def _status(result: Any) -> str:
+        # bool을 반환하는 insert 함수와의 호환
+        if result is True:
+            return INSERT_OK
+        if result is False:
+            return INSERT_UNAVAILABLE
+        return result
+
+    def _record(self, status: str):
+        """장애만 브레이커 실패로 셉니다. (데이터 오류는 MySQL이 응답했다는 뜻이므로 성공으로 셈)"""
+        if status == INSERT_UNAVAILABLE:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _insert_each(self, rows: List[tuple]) -> Tuple[int, List[tuple]]:
+        """
+        거부된 묶음을 한 행씩 다시 기록합니다. (처리한 행 수, 거부된 행 리스트)를 반환하며,
+        장애(INSERT_UNAVAILABLE)가 나면 그 행부터는 처리하지 않고 멈춥니다.
+        """
+        rejected = []
+        for index, row in enumerate(rows):
+            status = self._status(self.insert([row]))
+            self._record(status)
+            if status == INSERT_UNAVAILABLE:
+                return index, rejected
+            if status == INSERT_REJECTED:
+                rejected.append(row)
+        return len(rows), rejected
+
+    def _salvage(self, rows: List[tuple]) -> bool:
+        """거부된 묶음에서 문제 행만 dead letter로 옮기고, 장애로 남은 행은 스풀에 기록합니다."""
+        done, rejected = self._insert_each(rows)
+        self.direct_rows += done - len(rejected)
+        if rejected:
+            try:
+                self.spool.dead_letter(rejected)
+            except sqlite3.Error as e:
+                print(f"[{self.name}] ❌ dead letter 기록 실패 ({len(rejected)}행 유실): {e}", file=sys.stderr)
+            else:
+                self._dead(len(rejected))
+        if done < len(rows):
+            return self._spool(rows[done:])
+        return True
+
+    def _dead(self, count: int):
+        self.dead_rows += count
+        print(f"[{self.name}] ⚠️ MySQL이 거부한 로그 {count}행을 dead letter로 옮겼습니다. "
+              f"({self.spool.path} log_dead_letter)", file=sys.stderr)
+
+    def write(self, rows: List[tuple]) -> bool:
+        """행들을 MySQL 또는 스풀에 기록합니다. (스레드에서 호출, 스풀 기록까지 실패하지 않으면 True)"""
+        # 스풀에 밀린 행이 있으면 순서를 지키기 위해 새 행도 스풀 뒤에 붙임
+        if self._backlog == 0 and self.breaker.allow():
+            status = self._status(self.insert(rows))
+            self._record(status)
+            if status == INSERT_OK:
+                self.direct_rows += len(rows)
+                return True
+            if status == INSERT_REJECTED:
+                return self._salvage(rows)
+        return self._spool(rows)
+
+    async def write_async(self, rows: List[tuple]) -> bool:
+        """write()의 비동기 버전. insert_async가 없으면 write()를 스레드에서 실행합니다."""
+        if self.insert_async is None:
+            return await asyncio.to_thread(self.write, rows)
+        if self._backlog == 0 and self.breaker.allow():
+            status = self._status(await self.insert_async(rows))
+            self._record(status)
+            if status == INSERT_OK:
+                self.direct_rows += len(rows)
+                return True
+            if status == INSERT_REJECTED:
+                return await asyncio.to_thread(self._salvage, rows)
+        return await asyncio.to_thread(self._spool, rows)
+
+    def _spool(self, rows: List[tuple]) -> bool:
+        try:
+            with self._backlog_lock:
+                self.spool.append(rows)
+                self._backlog += len(rows)
+        except sqlite3.Error as e:
+            print(f"[{self.name}] ❌ 로컬 스풀 기록 실패: {e}", file=sys.stderr)
+            return False
+        self.spooled_rows += len(rows)
+        return True
+
+    def replay_once(self) -> int:
+        """스풀을 비울 때까지(또는 실패할 때까지) MySQL로 옮기고 옮긴 행 수를 반환합니다. (스레드에서 호출)"""
+        moved = 0
+        with self._replay_lock:
+            while True:
+                ids, rows = self.spool.peek(self.replay_batch)
+                if not rows or not self.breaker.allow():
+                    break
+                status = self._status(self.insert(rows))
+                self._record(status)
+                if status == INSERT_UNAVAILABLE:
+                    break
+                if status == INSERT_OK:
+                    self.spool.delete_upto(ids[-1])
+                    moved += len(rows)
+                    continue
+                # 데이터 오류: 한 행씩 골라내어 문제 행은 dead letter로, 나머지는 기록하고 스풀에서 제거
+                done, rejected = self._insert_each(rows)
+                if done:
+                    self.spool.delete_upto(ids[done - 1], rejected)
+                    moved += done - len(rejected)
+                if rejected:
+                    self._dead(len(rejected))
+                if done < len(rows):
+                    break
+            with self._backlog_lock:
+                self._backlog = self.spool.count()
+        self.replayed_rows += moved
+        if moved:
+            print(f"[{self.name}] 🔄 스풀 로그 {moved}행 MySQL로 재전송 (남은 행 {self._backlog})")
+        return moved
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.replay_interval)
+            if not self._backlog:
+                continue
+            # 일시적인 오류(예: database is locked)로 재전송 태스크가 끝나면 스풀이 영영 비워지지 않으므로 계속 반복
+            try:
+                await asyncio.to_thread(self.replay_once)
+            except sqlite3.Error as e:
+                print(f"[{self.name}] ❌ 로컬 스풀 재전송 실패 (다음 주기에 재시도): {e}", file=sys.stderr)
+            except Exception as e:
+                print(f"[{self.name}] ❌ 재전송 중 예기치 않은 오류 (다음 주기에 재시도): {e}", file=sys.stderr)
+
+    def start(self):
+        """백그라운드 재전송 태스크를 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "breaker": self.breaker.state,
+            "breaker_opened": self.breaker.opened_count,
+            "backlog": self._backlog,
+            "direct_rows": self.direct_rows,
+            "spooled_rows": self.spooled_rows,
+            "replayed_rows": self.replayed_rows,
+            "dead_rows": self.dead_rows,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 브레이커={m['breaker']} (열림 {m['breaker_opened']}회) 스풀 대기={m['backlog']}행 | "
+                f"direct={m['direct_rows']} spooled={m['spooled_rows']} replayed={m['replayed_rows']} "
+                f"dead={m['dead_rows']}")
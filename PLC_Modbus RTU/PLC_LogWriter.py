@@ -0,0 +1,159 @@
+# PLC_LogWriter.py
+"""
+mission_plc_logs 일괄 기록기.
+
+이벤트마다 asyncio.to_thread(insert_log_sync, ...)로 한 행씩 INSERT + COMMIT 하는 대신,
+log()가 행을 메모리 버퍼에 넣기만 하고(기다리지 않음) 백그라운드 태스크가 모아서 씁니다.
+
+    - 행마다 클라이언트 측 일련번호(seq)와 포착 시각(created_at, 마이크로초)을 붙임
+      포착 시각은 seq 순서대로 항상 증가하도록 보정하므로, 같은 순간의 두 이벤트도 DB에서
+      created_at 순서가 기록 순서와 같음 (순서를 위해 time.sleep을 넣을 필요 없음)
+    - 버퍼가 flush_rows행 이상이 되거나 마지막 기록 후 flush_interval초가 지나면
+      insert_logs_sync(executemany, 한 트랜잭션)로 기록
+    - 기록 실패 시 행을 버퍼 앞쪽에 되돌려 다음 주기에 재시도 (max_buffer 초과분은 오래된 행부터 버림)
+    - stop() 시 남은 행을 모두 기록하고 종료
+"""
+import asyncio
+import sys
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
+
+from PLC_DataBase import insert_logs_sync
+
+DEFAULT_FLUSH_ROWS = 100
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MAX_BUFFER = 10000
+
+
+class LogRow(NamedTuple):
+    seq: int
+    created_at: datetime
+    equipment_id: str
+    source: str
+    description: str
+
+    def as_params(self):
+        return (self.equipment_id, self.source, self.description, self.created_at)
+
+
+class LogWriter:
+    """
+    로그 행을 버퍼에 모아 크기/시간 기준으로 일괄 기록하는 비동기 기록기.
+    writer(rows) -> bool 은 스레드에서 실행됩니다. (기본: PLC_DataBase.insert_logs_sync)
+    writer가 async 함수이면 스레드를 쓰지 않고 이벤트 루프에서 바로 await 합니다.
+    """
+
+    def __init__(self, flush_rows: int = DEFAULT_FLUSH_ROWS, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_buffer: int = DEFAULT_MAX_BUFFER, writer: Optional[Callable[[List[tuple]], bool]] = None,
+                 name: str = "DB LOG"):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.writer = writer or insert_logs_sync
+        self.name = name
+
+        self._buffer: Deque[LogRow] = deque()
+        self._seq = 0
+        self._last_at: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        # 지표
+        self.logged = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self.max_batch = 0
+
+    # --- 기록 요청 ---
+    def log(self, equipment_id: str, source: str, description: str) -> int:
+        """행을 버퍼에 넣고 일련번호를 반환합니다. (기다리지 않음, 이벤트 루프 스레드에서 호출)"""
+        now = datetime.now()
+        if self._last_at is not None and now <= self._last_at:
+            now = self._last_at + timedelta(microseconds=1)
+        self._last_at = now
+        self._seq += 1
+        self._buffer.append(LogRow(self._seq, now, equipment_id, source, description))
+        self.logged += 1
+        self._trim()
+        if len(self._buffer) >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+        return self._seq
+
+    def _trim(self):
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+
+    # --- 백그라운드 기록 ---
+    def start(self):
+        """백그라운드 기록 태스크를 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """버퍼의 행을 flush_rows개씩 기록합니다. 모두 기록했으면 True."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.flush_rows, len(self._buffer)))]
+                params = [row.as_params() for row in batch]
+                if asyncio.iscoroutinefunction(self.writer):
+                    ok = await self.writer(params)
+                else:
+                    ok = await asyncio.to_thread(self.writer, params)
+                if not ok:
+                    # 실패한 행은 순서를 유지한 채 버퍼 앞쪽으로 되돌리고 다음 주기에 재시도
+                    self.failures += 1
+                    self._buffer.extendleft(reversed(batch))
+                    self._trim()
+                    return False
+                self.batches += 1
+                self.written += len(batch)
+                self.max_batch = max(self.max_batch, len(batch))
+        return True
+
+    async def stop(self):
+        """새 주기를 멈추고 남은 행을 모두 기록한 뒤 종료합니다."""
+        self._closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._buffer and not await self.flush():
+            print(f"[{self.name}] ⚠️ 종료 시 기록하지 못한 로그 {len(self._buffer)}행을 버립니다.", file=sys.stderr)
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "logged": self.logged,
+            "written": self.written,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 버퍼={m['buffered']} | logged={m['logged']} written={m['written']} "
+                f"batches={m['batches']} (최대 {m['max_batch']}행) failures={m['failures']} dropped={m['dropped']}")
@@ -0,0 +1,110 @@
+# PLC_MessageDecoder.py
+"""
+OPC UA 구독 알림 값(문자열/딕셔너리) 디코더.
+
+서버가 보내는 값은 '{"Anomaly": "NG", ...}' 같은 JSON 문자열, 앞뒤에 다른 문자가 붙은 JSON,
+또는 "Ready"/"OK"/"NG" 같은 단순 문자열입니다. 노드마다 MessageSchema를 한 번 만들어 두고
+decode()로 필요한 값 하나(대문자로 정규화된 상태/명령 문자열)만 꺼냅니다.
+
+    - 빠른 경로 : 스키마에 등록한 단순 문자열("Ready", "OK", "NG")은 미리 계산한 결과를 바로 반환
+    - 결과 캐시 : 같은 원본 문자열이 다시 오면 파싱 없이 이전 결과를 반환 (최대 MEMO_SIZE개)
+    - JSON 백엔드: orjson이 설치되어 있으면 사용하고, 없으면 표준 json 사용
+    - 키 조회   : 스키마의 후보 키를 우선순위 순서로 확인 (예: "state" -> "move_command")
+"""
+import json
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _json_loads = json.loads
+    JSON_BACKEND = "json"
+
+# 스키마별로 기억할 원본 문자열 -> 결과 수 (가득 차면 비우고 다시 채움)
+MEMO_SIZE = 256
+
+
+class MessageSchema:
+    """
+    노드 하나의 알림 값 형식.
+        keys          : JSON에서 값을 꺼낼 후보 키 (앞쪽이 우선)
+        plain_fallback: JSON이 아니거나 JSON 파싱에 실패한 문자열 자체를 값으로 볼지 여부
+        fast_values   : 결과를 미리 계산해 둘 단순 문자열 (예: "Ready", "OK", "NG")
+    """
+
+    def __init__(self, name: str, keys: Iterable[str], plain_fallback: bool = False,
+                 fast_values: Iterable[str] = ()):
+        self.name = name
+        self.keys = tuple(keys)
+        self.plain_fallback = plain_fallback
+        self._memo: Dict[str, Optional[str]] = {}
+        self._fast: Dict[str, Optional[str]] = {}
+        for value in fast_values:
+            for variant in (value, value.upper(), value.lower()):
+                self._fast[variant] = self._decode_str(variant)
+
+    @staticmethod
+    def _normalize(value: Any) -> Optional[str]:
+        return None if value is None else str(value).upper()
+
+    def _from_dict(self, data: Dict) -> Optional[str]:
+        for key in self.keys:
+            if key in data:
+                return self._normalize(data[key])
+        return None
+
+    def _decode_str(self, text: str) -> Optional[str]:
+        stripped = text.strip()
+        start = stripped.find('{')
+        end = stripped.rfind('}')
+        if start == -1 or end <= start:
+            return self._normalize(stripped) if self.plain_fallback else None
+        try:
+            data = _json_loads(stripped[start:end + 1])
+        except ValueError:
+            return self._normalize(stripped) if self.plain_fallback else None
+        if not isinstance(data, dict):
+            return None
+        return self._from_dict(data)
+
+    def decode(self, value: Any) -> Optional[str]:
+        """알림 값에서 대문자로 정규화한 상태/명령 문자열을 꺼냅니다. 없으면 None."""
+        if isinstance(value, str):
+            if value in self._fast:
+                return self._fast[value]
+            if value in self._memo:
+                return self._memo[value]
+            result = self._decode_str(value)
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[value] = result
+            return result
+        if isinstance(value, dict):
+            return self._from_dict(value)
+        return None
+
+
+# Anomaly 결과 노드 (read_ok_ng_value): {"Anomaly": "OK"/"NG"} 또는 단순 문자열
+ANOMALY_SCHEMA = MessageSchema("Anomaly", keys=("Anomaly",), plain_fallback=True,
+                               fast_values=("Ready", "OK", "NG"))
+# HMI 명령 노드 (read_ready_state): {"state": ...} 또는 {"move_command": ...}, 단순 문자열은 무시
+COMMAND_SCHEMA = MessageSchema("command", keys=("state", "move_command"), plain_fallback=False,
+                               fast_values=("Ready",))
+
+
+class MessageDecoder:
+    """노드 ID -> MessageSchema 레지스트리. 핸들러는 decode(node_id, val)만 호출합니다."""
+
+    def __init__(self, schemas: Optional[Dict[str, MessageSchema]] = None):
+        self.schemas: Dict[str, MessageSchema] = dict(schemas or {})
+
+    def register(self, node_id: str, schema: MessageSchema):
+        self.schemas[node_id] = schema
+
+    def decode(self, node_id: str, value: Any) -> Optional[str]:
+        schema = self.schemas.get(node_id)
+        if schema is None:
+            raise KeyError(f"등록되지 않은 노드의 스키마: {node_id}")
+        return schema.decode(value)
@@ -0,0 +1,132 @@
+# PLC_MethodBatcher.py
+"""
+OPC UA Method 호출 일괄 전송기 (Call 서비스 multi-call).
+
+OPC UA Call 서비스는 요청 하나에 여러 Method 호출(CallMethodRequest)을 담을 수 있습니다.
+같은 스캔 주기에서 나온 Method 호출(예: M0040/M0041 동시 변화 -> write_conveyor_sensor_check,
+write_robotarm_sensor_check)을 짧은 수집 창(window) 동안 모아 Call 요청 하나로 보내고,
+결과(CallMethodResult)는 호출별로 나누어 돌려줍니다.
+
+call()의 반환값/예외는 asyncua의 Node.call_method와 같습니다.
+    출력 인자 0개 -> None, 1개 -> 값, 2개 이상 -> 값 리스트
+    호출별 StatusCode가 Bad이면 해당 호출에만 UaStatusCodeError 발생
+"""
+import asyncio
+from typing import Any, Dict, List
+
+from asyncua import Client, ua
+
+# 첫 호출 후 같은 요청에 담을 호출을 기다리는 시간 (초)
+DEFAULT_BATCH_WINDOW = 0.005
+# 요청 하나에 담을 최대 호출 수 (서버의 MaxMethodCallsPerCall 제한 고려)
+DEFAULT_MAX_BATCH = 32
+
+
+def _unpack_outputs(result: ua.CallMethodResult):
+    """Node.call_method와 같은 방식으로 출력 인자를 꺼냅니다."""
+    result.StatusCode.check()
+    outputs = [variant.Value for variant in result.OutputArguments]
+    if not outputs:
+        return None
+    if len(outputs) == 1:
+        return outputs[0]
+    return outputs
+
+
+class MethodCallBatcher:
+    """
+    클라이언트(세션)별로 Method 호출을 모아 Call 서비스 요청 하나로 보내는 일괄 전송기.
+    """
+
+    def __init__(self, window: float = DEFAULT_BATCH_WINDOW, max_batch: int = DEFAULT_MAX_BATCH,
+                 name: str = "METHOD BATCH"):
+        if max_batch < 1:
+            raise ValueError(f"max_batch는 1 이상이어야 합니다: {max_batch}")
+        self.window = window
+        self.max_batch = max_batch
+        self.name = name
+        # 클라이언트 -> [(CallMethodRequest, Future)] 대기 호출
+        self._pending: Dict[Client, List] = {}
+        self._flushers: Dict[Client, asyncio.Task] = {}
+
+        # 지표
+        self.calls = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+        self.errors = 0
+
+    async def call(self, client: Client, obj_node, method_node, *args) -> Any:
+        """obj_node의 method_node를 args로 호출합니다. (같은 수집 창의 다른 호출과 함께 전송)"""
+        request = ua.CallMethodRequest()
+        request.ObjectId = obj_node.nodeid
+        request.MethodId = method_node.nodeid
+        request.InputArguments = [arg if isinstance(arg, ua.Variant) else ua.Variant(arg) for arg in args]
+
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(client, [])
+        batch.append((request, future))
+        self.calls += 1
+
+        if len(batch) >= self.max_batch:
+            # 가득 찬 배치는 바로 전송하고, 수집 중이던 플러셔는 빈 배치를 보게 됨
+            self._take_and_send(client)
+        elif client not in self._flushers:
+            self._flushers[client] = asyncio.create_task(self._flush_later(client))
+        return await future
+
+    async def _flush_later(self, client: Client):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._flushers.pop(client, None)
+        self._take_and_send(client)
+
+    def _take_and_send(self, client: Client):
+        batch = self._pending.pop(client, None)
+        if batch:
+            asyncio.create_task(self._send(client, batch))
+
+    async def _send(self, client: Client, batch: List):
+        self.requests += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        try:
+            results = await client.uaclient.call([request for request, _ in batch])
+        except Exception as e:
+            # 요청 전체 실패 (연결 끊김, ServiceResult Bad 등): 모든 호출에 같은 예외 전달
+            self.errors += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            self.errors += len(batch)
+            error = ua.UaError(f"Call 결과 개수 불일치: 요청 {len(batch)}개, 결과 {len(results)}개")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            try:
+                future.set_result(_unpack_outputs(result))
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "requests": self.requests,
+            "calls_per_request": (self.calls / self.requests) if self.requests else 0.0,
+            "max_batch": self.max_batch_seen,
+            "errors": self.errors,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] calls={m['calls']} requests={m['requests']} "
+                f"(평균 {m['calls_per_request']:.2f}개/요청, 최대 {m['max_batch']}) errors={m['errors']}")
@@ -0,0 +1,264 @@
+# PLC_MultiLine.py
+"""
+다중 PLC / 다중 슬레이브 동시 폴링.
+
+구성 단위
+    PlcLine      : 물리 버스 하나 (RTU 시리얼 포트 하나 또는 TCP 엔드포인트 하나).
+                   전송 객체와 우선순위 버스 스케줄러를 하나씩 소유합니다.
+    SlaveScanner : 슬레이브(PLC) 하나의 독립 스캔 루프. 태그 맵(TagPlan)의 스캔 클래스 하나를
+                   블록 읽기로 스캔하고, 적응형 폴링 주기를 가지며, 태그 값이 바뀌면
+                   on_change 콜백을 호출합니다.
+    PlcFleet     : 설정(PLC_LINES)으로부터 라인/스캐너를 만들고 한꺼번에 실행합니다.
+
+라인마다 버스가 따로이므로 처리량은 물리 버스 수에 비례해 늘어납니다. 같은 RTU 라인의
+슬레이브끼리는 버스를 공유하지만, 응답 없는 슬레이브는 연속 실패 시 재시도 간격을
+늘려(offline backoff) 다른 슬레이브의 버스 시간을 빼앗지 않도록 합니다.
+
+설정 예:
+    PLC_LINES = [
+        {"name": "RTU-COM6", "type": "rtu", "port": "COM6", "baudrate": 115200,
+         "slaves": [{"name": "CONVEYOR01", "slave_id": 3, "tag_plan": tag_plan, "scan_class": "fast"}]},
+        {"name": "TCP-CELL2", "type": "tcp", "host": "192.168.1.3", "port": 502,
+         "slaves": [{"name": "CONVEYOR02", "slave_id": 1, "tags": [ScanTag("M0040", 64)]}]},
+    ]
+슬레이브는 tag_plan(+ scan_class) 또는 기존 ScanTag 코일 목록(tags) 중 하나로 스캔 대상을 지정합니다.
+"""
+import asyncio
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from PLC_AsyncTransport import AsyncModbusTransport, DEFAULT_REQUEST_TIMEOUT
+from PLC_BusScheduler import BusScheduler, PRIORITY_POLL
+from PLC_TagMap import DEFAULT_SCAN_CLASS, TagPlan, TagScanEngine, plan_from_scan_tags
+from PLC_AdaptivePoll import AdaptivePoller
+
+# 슬레이브 스캔 루프 기본값
+DEFAULT_POLL_MIN_INTERVAL = 0.05
+DEFAULT_POLL_MAX_INTERVAL = 1.0
+DEFAULT_POLL_BACKOFF = 2.0
+DEFAULT_POLL_FAST_HOLD = 1.0
+DEFAULT_SCAN_MAX_GAP = 8
+# 연속 실패가 이 횟수를 넘으면 offline으로 보고 재시도 간격을 늘림
+OFFLINE_FAIL_THRESHOLD = 3
+OFFLINE_RETRY_MAX = 10.0
+
+# on_change(scanner, 태그 이름, 새 값) 콜백
+ChangeCallback = Callable[["SlaveScanner", str, Any], Awaitable[None]]
+
+# 아직 한 번도 읽지 않은 태그의 이전 값 (첫 값도 변화로 취급하기 위함)
+_UNSET = object()
+
+
+class PlcLine:
+    """물리 버스 하나와 그 버스를 소유하는 우선순위 스케줄러."""
+
+    def __init__(self, name: str, transport: AsyncModbusTransport,
+                 default_deadlines: Optional[Dict[int, float]] = None):
+        self.name = name
+        self.transport = transport
+        self.bus = BusScheduler(transport, name=name, default_deadlines=default_deadlines)
+        self.scanners: List["SlaveScanner"] = []
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], default_deadlines: Optional[Dict[int, float]] = None):
+        """PLC_LINES 항목 하나로부터 라인을 만듭니다. (슬레이브 ID 기본값은 첫 번째 슬레이브)"""
+        name = config["name"]
+        slaves = config.get("slaves", [])
+        default_slave = slaves[0]["slave_id"] if slaves else 1
+        timeout = config.get("timeout", DEFAULT_REQUEST_TIMEOUT)
+
+        if config["type"] == "rtu":
+            transport = AsyncModbusTransport.serial(
+                port=config["port"],
+                baudrate=config.get("baudrate", 115200),
+                parity=config.get("parity", 'N'),
+                stopbits=config.get("stopbits", 1),
+                slave=default_slave,
+                timeout=timeout,
+                name=name,
+            )
+        elif config["type"] == "tcp":
+            transport = AsyncModbusTransport.tcp(
+                config["host"],
+                port=config.get("port", 502),
+                slave=default_slave,
+                timeout=timeout,
+                name=name,
+            )
+        else:
+            raise ValueError(f"[{name}] 알 수 없는 라인 종류: {config['type']}")
+        return cls(name, transport, default_deadlines=default_deadlines)
+
+    async def connect(self) -> bool:
+        return await self.transport.connect()
+
+    async def close(self):
+        await self.bus.stop()
+        self.transport.close()
+
+
+class SlaveScanner:
+    """
+    슬레이브 하나의 독립 스캔 루프.
+
+    태그 값이 None(읽기 실패)이 아니면서 이전 값과 다르면 on_change를 호출합니다.
+    처음 읽은 값도 변화로 취급합니다. (기존 last_value = -1 초기화와 동일)
+    bool 태그의 값은 기존과 같이 1/0입니다.
+    """
+
+    def __init__(self, line: PlcLine, name: str, slave_id: int, plan: TagPlan,
+                 scan_class: str = DEFAULT_SCAN_CLASS,
+                 poll_min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+                 poll_max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+                 poll_backoff: float = DEFAULT_POLL_BACKOFF,
+                 poll_fast_hold: float = DEFAULT_POLL_FAST_HOLD,
+                 timeout: Optional[float] = None,
+                 is_active: Optional[Callable[[], bool]] = None):
+        self.line = line
+        self.name = name
+        self.slave_id = slave_id
+        self.timeout = timeout
+        self.is_active = is_active or (lambda: False)
+        self.engine = TagScanEngine(plan, scan_class, self._read_coils, self._read_holding_registers)
+        self.poller = AdaptivePoller(poll_min_interval, poll_max_interval,
+                                     backoff=poll_backoff, fast_hold=poll_fast_hold)
+        self.last_values: Dict[str, Any] = {tag_name: _UNSET for tag_name in self.engine.tag_names}
+        self.consecutive_failures = 0
+        self.online = True
+        self.scan_count = 0
+        self.last_scan_duration = 0.0
+
+    async def _read_coils(self, address: int, count: int):
+        return await self.line.bus.read_coils(address, count, priority=PRIORITY_POLL,
+                                              slave=self.slave_id, timeout=self.timeout)
+
+    async def _read_holding_registers(self, address: int, count: int):
+        return await self.line.bus.read_holding_registers(address, count, priority=PRIORITY_POLL,
+                                                          slave=self.slave_id, timeout=self.timeout)
+
+    def _offline_delay(self) -> float:
+        extra = self.consecutive_failures - OFFLINE_FAIL_THRESHOLD
+        return min(OFFLINE_RETRY_MAX, self.poller.max_interval * (2 ** max(0, extra)))
+
+    async def scan_once(self) -> Dict[str, Any]:
+        """한 번 스캔하고 (태그 -> 값) 딕셔너리를 반환합니다."""
+        started = time.perf_counter()
+        values = await self.engine.scan()
+        self.last_scan_duration = time.perf_counter() - started
+        self.scan_count += 1
+        return values
+
+    async def run(self, on_change: ChangeCallback,
+                  on_failure: Optional[Callable[["SlaveScanner"], None]] = None):
+        """스캔 루프. 취소될 때까지 계속 실행됩니다."""
+        label = f"{self.line.name}/{self.name}(S{self.slave_id})"
+        while True:
+            values = await self.scan_once()
+
+            if any(value is None for value in values.values()):
+                self.consecutive_failures += 1
+                if on_failure is not None:
+                    on_failure(self)
+                if self.online and self.consecutive_failures >= OFFLINE_FAIL_THRESHOLD:
+                    self.online = False
+                    print(f"[MULTI] ⚠️ {label} 응답 없음 ({self.consecutive_failures}회 연속 실패). 재시도 간격을 늘립니다.", file=sys.stderr)
+            else:
+                if not self.online:
+                    print(f"[MULTI] ✅ {label} 통신 복구.")
+                self.online = True
+                self.consecutive_failures = 0
+
+            changed = False
+            for tag_name, value in values.items():
+                if value is not None and value != self.last_values[tag_name]:
+                    self.last_values[tag_name] = value
+                    changed = True
+                    try:
+                        await on_change(self, tag_name, value)
+                    except Exception as e:
+                        print(f"[MULTI] ❌ {label} {tag_name} 변화 처리 중 오류: {e}", file=sys.stderr)
+
+            if self.online:
+                self.poller.record(changed=changed, active=self.is_active())
+                await self.poller.sleep()
+            else:
+                await asyncio.sleep(self._offline_delay())
+
+
+class PlcFleet:
+    """여러 라인/슬레이브를 한 프로세스에서 동시에 구동합니다."""
+
+    def __init__(self, lines: List[PlcLine]):
+        self.lines = lines
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_config(cls, line_configs: List[Dict[str, Any]],
+                    default_deadlines: Optional[Dict[int, float]] = None,
+                    is_active: Optional[Callable[[], bool]] = None):
+        """PLC_LINES 설정으로부터 라인과 슬레이브 스캐너를 만듭니다."""
+        lines = []
+        for line_config in line_configs:
+            line = PlcLine.from_config(line_config, default_deadlines=default_deadlines)
+            for slave in line_config.get("slaves", []):
+                plan = slave.get("tag_plan")
+                if plan is None:
+                    plan = plan_from_scan_tags(slave["tags"], max_gap=slave.get("scan_max_gap", DEFAULT_SCAN_MAX_GAP))
+                line.scanners.append(SlaveScanner(
+                    line,
+                    slave["name"],
+                    slave["slave_id"],
+                    plan,
+                    scan_class=slave.get("scan_class", DEFAULT_SCAN_CLASS),
+                    poll_min_interval=slave.get("poll_min_interval", DEFAULT_POLL_MIN_INTERVAL),
+                    poll_max_interval=slave.get("poll_max_interval", DEFAULT_POLL_MAX_INTERVAL),
+                    poll_backoff=slave.get("poll_backoff", DEFAULT_POLL_BACKOFF),
+                    poll_fast_hold=slave.get("poll_fast_hold", DEFAULT_POLL_FAST_HOLD),
+                    timeout=slave.get("timeout"),
+                    is_active=is_active,
+                ))
+            lines.append(line)
+        return cls(lines)
+
+    @property
+    def scanners(self) -> List[SlaveScanner]:
+        return [scanner for line in self.lines for scanner in line.scanners]
+
+    def scanner(self, name: str) -> SlaveScanner:
+        for scanner in self.scanners:
+            if scanner.name == name:
+                return scanner
+        raise KeyError(name)
+
+    async def connect(self) -> bool:
+        """모든 라인에 연결합니다. 하나라도 실패하면 False (연결된 라인은 그대로 사용 가능)."""
+        results = await asyncio.gather(*(line.connect() for line in self.lines))
+        for line, ok in zip(self.lines, results):
+            print(f"[MULTI] {'✅' if ok else '❌'} 라인 연결 {'성공' if ok else '실패'}: {line.name}")
+        return all(results)
+
+    def start(self, on_change: ChangeCallback,
+              on_failure: Optional[Callable[[SlaveScanner], None]] = None) -> List[asyncio.Task]:
+        """슬레이브마다 독립 스캔 태스크를 시작합니다."""
+        self._tasks = [
+            asyncio.create_task(scanner.run(on_change, on_failure), name=f"scan-{scanner.name}")
+            for scanner in self.scanners
+        ]
+        return self._tasks
+
+    def kick(self):
+        """모든 스캐너를 즉시 빠른 폴링으로 전환합니다."""
+        for scanner in self.scanners:
+            scanner.poller.kick()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for line in self.lines:
+            await line.close()
+
+    def format_metrics(self) -> str:
+        return "\n".join(line.bus.format_metrics() for line in self.lines)
@@ -0,0 +1,164 @@
+# PLC_NodeCache.py
+"""
+OPC UA 노드 핸들 캐시 (미리 해석 + RegisterNodes + 로컬 파일 저장).
+
+클라이언트가 사용하는 Object/Method/Variable 노드를 연결 직후 한 번에 해석합니다.
+    1. 캐시 파일에 같은 Endpoint로 해석해 둔 NodeId가 있으면 Read 요청 하나로 유효성만 확인
+    2. 없거나 유효하지 않으면 모든 브라우즈 경로를 TranslateBrowsePathsToNodeIds 요청 하나로 해석
+    3. RegisterNodes로 등록하여 세션 동안 반복 접근에 최적화된 핸들을 받음
+    4. 해석 결과를 캐시 파일에 저장 (재연결/재시작 시 브라우징 생략)
+
+키는 기존 설정의 NodeId 문자열(예: SENSOR1_METHOD_NODE_ID)을 그대로 사용하며, 해석에 실패한
+키는 설정된 NodeId로 대체(fallback)합니다. 따라서 기존 호출부는 client.get_node(node_id) 대신
+node_cache.get(client, node_id)로 바꾸기만 하면 됩니다.
+"""
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from asyncua import Client, ua
+
+
+def _browse_path(start: ua.NodeId, path: List[str]) -> ua.BrowsePath:
+    """["0:Objects", "2:PLC", ...] 형태의 경로를 BrowsePath로 변환합니다."""
+    browse_path = ua.BrowsePath()
+    browse_path.StartingNode = start
+    for element in path:
+        rel = ua.RelativePathElement()
+        rel.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+        rel.IsInverse = False
+        rel.IncludeSubtypes = True
+        rel.TargetName = ua.QualifiedName.from_string(element)
+        browse_path.RelativePath.Elements.append(rel)
+    return browse_path
+
+
+class NodeCache:
+    """
+    {설정 NodeId 문자열: 루트 기준 브라우즈 경로} 설정으로부터 노드 핸들을 해석/등록/저장하는 캐시.
+    """
+
+    def __init__(self, browse_paths: Dict[str, List[str]], cache_file: Optional[str] = None,
+                 register: bool = True, name: str = "NODE CACHE"):
+        self.browse_paths = dict(browse_paths)
+        self.cache_file = cache_file
+        self.register = register
+        self.name = name
+        self._nodes = {}
+        self._registered = []
+        self.source = None      # "file" / "browse" / "fallback"
+
+    # --- 캐시 파일 ---
+    def _load_file(self, endpoint: str) -> Optional[Dict[str, ua.NodeId]]:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("endpoint") != endpoint:
+                return None
+            saved = data.get("nodes", {})
+            if set(saved) != set(self.browse_paths):
+                return None
+            return {key: ua.NodeId.from_string(value) for key, value in saved.items()}
+        except (OSError, ValueError) as e:
+            print(f"[{self.name}] ⚠️ 캐시 파일 읽기 실패: {e}", file=sys.stderr)
+            return None
+
+    def _save_file(self, endpoint: str, node_ids: Dict[str, ua.NodeId]):
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump({"endpoint": endpoint,
+                           "nodes": {key: node_id.to_string() for key, node_id in node_ids.items()}},
+                          f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"[{self.name}] ⚠️ 캐시 파일 저장 실패: {e}", file=sys.stderr)
+
+    # --- 해석 ---
+    async def _verify(self, client: Client, node_ids: Dict[str, ua.NodeId]) -> bool:
+        """저장된 NodeId들이 서버에 모두 존재하는지 Read 요청 하나(NodeClass 속성)로 확인합니다."""
+        params = ua.ReadParameters()
+        for node_id in node_ids.values():
+            read_id = ua.ReadValueId()
+            read_id.NodeId = node_id
+            read_id.AttributeId = ua.AttributeIds.NodeClass
+            params.NodesToRead.append(read_id)
+        results = await client.uaclient.read(params)
+        return all(result.StatusCode.is_good() for result in results)
+
+    async def _translate(self, client: Client) -> Dict[str, ua.NodeId]:
+        """모든 브라우즈 경로를 TranslateBrowsePathsToNodeIds 요청 하나로 해석합니다."""
+        keys = list(self.browse_paths)
+        root = client.nodes.root.nodeid
+        results = await client.uaclient.translate_browsepaths_to_nodeids(
+            [_browse_path(root, self.browse_paths[key]) for key in keys]
+        )
+        node_ids = {}
+        for key, result in zip(keys, results):
+            if result.StatusCode.is_good() and result.Targets:
+                target = result.Targets[0].TargetId
+                node_ids[key] = ua.NodeId(target.Identifier, target.NamespaceIndex, target.NodeIdType)
+            else:
+                print(f"[{self.name}] ⚠️ 경로 해석 실패: {'/'.join(self.browse_paths[key])} "
+                      f"({result.StatusCode.name}). 설정 NodeId 사용: {key}", file=sys.stderr)
+        return node_ids
+
+    async def resolve(self, client: Client) -> Dict[str, object]:
+        """
+        모든 노드를 해석하고(필요 시 등록) {키: Node} 딕셔너리를 반환합니다.
+        연결(재연결) 직후마다 호출합니다. 등록 핸들은 세션 단위이므로 매번 다시 등록합니다.
+        """
+        endpoint = client.server_url.geturl()
+        self._nodes = {}
+        self._registered = []
+
+        node_ids = self._load_file(endpoint)
+        self.source = "file"
+        try:
+            if node_ids is None or not await self._verify(client, node_ids):
+                node_ids = await self._translate(client)
+                self.source = "browse"
+                if len(node_ids) == len(self.browse_paths):
+                    self._save_file(endpoint, node_ids)
+        except Exception as e:
+            print(f"[{self.name}] ❌ 노드 해석 실패: {e.__class__.__name__} - {e}. 설정 NodeId를 사용합니다.", file=sys.stderr)
+            node_ids = {}
+            self.source = "fallback"
+
+        for key in self.browse_paths:
+            self._nodes[key] = client.get_node(node_ids.get(key, key))
+
+        if self.register:
+            try:
+                keys = list(self._nodes)
+                registered = await client.register_nodes([self._nodes[key] for key in keys])
+                self._nodes.update(zip(keys, registered))
+                self._registered = registered
+            except Exception as e:
+                print(f"[{self.name}] ⚠️ RegisterNodes 실패 ({e.__class__.__name__}). 해석된 NodeId를 그대로 사용합니다.", file=sys.stderr)
+
+        print(f"[{self.name}] ✅ 노드 {len(self._nodes)}개 준비 완료 (출처: {self.source}, 등록: {len(self._registered)}개)")
+        return dict(self._nodes)
+
+    def get(self, client: Client, node_id: str):
+        """설정 NodeId 문자열에 해당하는 캐시된 Node를 반환합니다. (캐시에 없으면 client.get_node)"""
+        node = self._nodes.get(node_id)
+        return node if node is not None else client.get_node(node_id)
+
+    def invalidate(self):
+        """캐시 파일을 지워 다음 resolve()에서 다시 브라우징하도록 합니다. (노드 구성이 바뀐 경우)"""
+        self._nodes = {}
+        if self.cache_file and os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    async def release(self, client: Client):
+        """등록한 노드를 해제합니다. (연결 종료 전에 호출)"""
+        if self._registered:
+            try:
+                await client.unregister_nodes(self._registered)
+            except Exception:
+                pass
+            self._registered = []
@@ -0,0 +1,214 @@
+# PLC_OutboundQueue.py
+"""
+스캔 루프와 OPC UA 보고를 분리하는 유한(bounded) 송신 큐.
+
+스캐너는 센서 변화를 put()으로 큐에 넣고 바로 다음 스캔으로 넘어가며, 별도의 송신 워커들이
+큐를 비우면서 실제 OPC UA Method 호출을 수행합니다. OPC UA 왕복이 느려져도 Modbus 스캔
+주기는 영향을 받지 않습니다.
+
+키(예: (스캐너, 태그)) 단위로 순서를 보장합니다. 같은 키의 항목은 한 번에 하나의 워커만
+처리하므로 넣은 순서대로 전송되고, 서로 다른 키는 여러 워커가 동시에 처리할 수 있습니다.
+
+큐가 가득 찼을 때의 동작(overflow)
+    OVERFLOW_COALESCE : 같은 키의 대기 항목이 있으면 마지막 항목을 최신 값으로 교체하고,
+                        없으면 가장 오래된 대기 항목 하나를 버리고 넣습니다. (put은 절대 기다리지 않음)
+    OVERFLOW_BLOCK    : 자리가 날 때까지 put()이 기다립니다. (항목 손실 없음)
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_BLOCK = "block"
+
+# 대기 시간 통계에 사용할 최근 샘플 수
+WAIT_SAMPLE_WINDOW = 500
+
+
+class OutboundQueue:
+    """
+    sender((키, 항목) -> coroutine)를 워커 태스크들로 실행하는 키별 순서 보장 송신 큐.
+    """
+
+    def __init__(self, sender: Callable[[Hashable, Any], Awaitable[Any]], maxsize: int = 64,
+                 workers: int = 2, overflow: str = OVERFLOW_COALESCE, name: str = "OUTBOUND"):
+        if maxsize < 1:
+            raise ValueError(f"maxsize는 1 이상이어야 합니다: {maxsize}")
+        if workers < 1:
+            raise ValueError(f"workers는 1 이상이어야 합니다: {workers}")
+        if overflow not in (OVERFLOW_COALESCE, OVERFLOW_BLOCK):
+            raise ValueError(f"알 수 없는 overflow 모드: {overflow}")
+
+        self.sender = sender
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.overflow = overflow
+        self.name = name
+
+        # 키 -> (항목, 넣은 시각) 대기열. 키가 _busy에 있으면 워커가 처리 중
+        self._pending: Dict[Hashable, Deque[Tuple[Any, float]]] = {}
+        # 처리 가능한(대기 항목이 있고 처리 중이 아닌) 키 순서
+        self._ready: Deque[Hashable] = deque()
+        self._busy = set()
+        self._size = 0
+        self._changed: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._closed = False
+
+        # 지표
+        self.enqueued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.recent_waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_WINDOW)
+
+    # --- 워커 관리 ---
+    def start(self):
+        """송신 워커들을 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        self._closed = False
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.create_task(self._run()))
+
+    async def stop(self, drain_timeout: Optional[float] = 5.0):
+        """
+        새 항목을 받지 않고, drain_timeout초 동안 남은 항목을 보낸 뒤 워커를 종료합니다.
+        drain_timeout=0이면 남은 항목을 버립니다.
+        """
+        self._closed = True
+        if self._changed is None:
+            return
+        async with self._changed:
+            # BLOCK 모드에서 기다리던 put()을 깨워 False로 반환시킴
+            self._changed.notify_all()
+        if drain_timeout:
+            try:
+                await asyncio.wait_for(self.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"[{self.name}] ⚠️ 종료 시 미전송 항목 {self._size}개를 버립니다.", file=sys.stderr)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self):
+        """대기 항목과 처리 중인 항목이 모두 끝날 때까지 기다립니다."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._size == 0 and not self._busy)
+
+    # --- 넣기 ---
+    def _append(self, key: Hashable, item: Any):
+        queue = self._pending.setdefault(key, deque())
+        if not queue and key not in self._busy:
+            self._ready.append(key)
+        queue.append((item, time.monotonic()))
+        self._size += 1
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self._size)
+
+    def _drop_oldest(self) -> bool:
+        """가장 오래 기다린 대기 항목 하나를 버립니다."""
+        oldest_key, oldest_at = None, None
+        for key, queue in self._pending.items():
+            if queue and (oldest_at is None or queue[0][1] < oldest_at):
+                oldest_key, oldest_at = key, queue[0][1]
+        if oldest_key is None:
+            return False
+        queue = self._pending[oldest_key]
+        queue.popleft()
+        self._size -= 1
+        self.dropped += 1
+        if not queue:
+            del self._pending[oldest_key]
+            if oldest_key in self._ready:
+                self._ready.remove(oldest_key)
+        return True
+
+    async def put(self, key: Hashable, item: Any) -> bool:
+        """
+        항목을 넣습니다. 종료된 큐이거나 넣지 못하면 False를 반환합니다.
+        (COALESCE 모드에서는 기다리지 않고, BLOCK 모드에서는 자리가 날 때까지 기다립니다.)
+        """
+        if self._closed:
+            return False
+        self.start()
+
+        async with self._changed:
+            if self._size >= self.maxsize:
+                if self.overflow == OVERFLOW_BLOCK:
+                    await self._changed.wait_for(lambda: self._size < self.maxsize or self._closed)
+                    if self._closed:
+                        return False
+                else:
+                    queue = self._pending.get(key)
+                    if queue:
+                        # 같은 키의 마지막 대기 항목을 최신 값으로 교체 (대기 시각은 유지)
+                        queue[-1] = (item, queue[-1][1])
+                        self.coalesced += 1
+                        return True
+                    if not self._drop_oldest():
+                        return False
+            self._append(key, item)
+            self._changed.notify_all()
+        return True
+
+    # --- 워커 ---
+    async def _run(self):
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: bool(self._ready))
+                key = self._ready.popleft()
+                item, queued_at = self._pending[key].popleft()
+                if not self._pending[key]:
+                    del self._pending[key]
+                self._size -= 1
+                self._busy.add(key)
+                self._changed.notify_all()
+
+            self.recent_waits.append(time.monotonic() - queued_at)
+            try:
+                await self.sender(key, item)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"[{self.name}] ❌ 전송 중 오류 ({key}): {e.__class__.__name__} - {e}", file=sys.stderr)
+            finally:
+                async with self._changed:
+                    self._busy.discard(key)
+                    if self._pending.get(key):
+                        self._ready.append(key)
+                    self._changed.notify_all()
+
+    # --- 지표 ---
+    def depth(self) -> int:
+        return self._size
+
+    def metrics(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_waits)
+        p95 = recent[min(len(recent) - 1, int(0.95 * len(recent)))] if recent else 0.0
+        return {
+            "depth": self._size,
+            "max_depth": self.max_depth,
+            "in_flight": len(self._busy),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "wait_p95_ms": p95 * 1000,
+            "wait_max_ms": (recent[-1] * 1000) if recent else 0.0,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 큐={m['depth']}/{self.maxsize} (최대 {m['max_depth']}) 처리중={m['in_flight']} | "
+                f"sent={m['sent']} coalesced={m['coalesced']} dropped={m['dropped']} errors={m['errors']} | "
+                f"wait(p95/max)={m['wait_p95_ms']:.1f}/{m['wait_max_ms']:.1f}ms")
@@ -0,0 +1,182 @@
+# PLC_PulseEngine.py
+"""
+이벤트 루프 위에서 동작하는 논블로킹 코일 펄스 엔진.
+
+코일 ON은 즉시 쓰고, OFF 엣지는 힙(heap)에 예약해 두었다가 드라이버 태스크 하나가
+시간이 되면 씁니다. time.sleep이나 스레드 풀을 쓰지 않으므로 펄스가 여러 개 동시에
+걸려 있어도 이벤트 루프(OPC UA 구독 등)를 막지 않고, 추가 스레드도 필요 없습니다.
+
+같은 코일에 펄스가 이미 걸려 있을 때의 동작(retrigger)
+    RETRIGGER_EXTEND  : OFF 시각만 '지금 + duration'으로 연장 (버스 트래픽 없음)
+    RETRIGGER_RESTART : 즉시 OFF 후 다시 ON 하여 새 상승 엣지를 만들고 새로 예약
+    RETRIGGER_IGNORE  : 기존 펄스를 그대로 두고 새 요청은 무시
+"""
+import asyncio
+import heapq
+import itertools
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+RETRIGGER_EXTEND = "extend"
+RETRIGGER_RESTART = "restart"
+RETRIGGER_IGNORE = "ignore"
+
+
+class _ActivePulse:
+    """현재 ON 상태인 펄스 하나."""
+
+    def __init__(self, seq: int, off_at: float, done: asyncio.Future, write_kwargs: Dict[str, Any]):
+        self.seq = seq
+        self.off_at = off_at
+        self.done = done
+        self.write_kwargs = write_kwargs
+
+
+class PulseEngine:
+    """
+    write_coil 콜백((주소, 값, **kwargs) -> 0/-1 coroutine)을 사용하는 펄스 엔진.
+
+    pulse()에 넘긴 추가 키워드(예: priority)는 ON/OFF 쓰기에 그대로 전달됩니다.
+    """
+
+    def __init__(self, write_coil: Callable[..., Awaitable[int]], name: str = "PULSE"):
+        self.write_coil = write_coil
+        self.name = name
+        self._seq = itertools.count()
+        # (OFF 시각, seq, 주소) 힙. 연장/취소된 항목은 seq가 맞지 않아 꺼낼 때 버려짐
+        self._heap: List[Tuple[float, int, int]] = []
+        self._active: Dict[int, _ActivePulse] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._driver: Optional[asyncio.Task] = None
+        # 진행 중인 OFF 쓰기 태스크 (GC로 사라지지 않도록 참조 유지)
+        self._off_tasks = set()
+
+    # --- 드라이버 태스크 ---
+    def _ensure_driver(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._run())
+
+    def _schedule(self, address: int, pulse: _ActivePulse):
+        heapq.heappush(self._heap, (pulse.off_at, pulse.seq, address))
+        self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # 연장/취소로 무효가 된 항목 정리
+            while self._heap:
+                off_at, seq, address = self._heap[0]
+                pulse = self._active.get(address)
+                if pulse is None or pulse.seq != seq or pulse.off_at != off_at:
+                    heapq.heappop(self._heap)
+                    continue
+                break
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, address = heapq.heappop(self._heap)
+            pulse = self._active.pop(address)
+            # OFF 쓰기는 별도 태스크로 실행하여 다른 펄스의 OFF 시각을 지연시키지 않음
+            task = asyncio.create_task(self._write_off(address, pulse))
+            self._off_tasks.add(task)
+            task.add_done_callback(self._off_tasks.discard)
+
+    async def _write_off(self, address: int, pulse: _ActivePulse):
+        result = await self.write_coil(address, 0, **pulse.write_kwargs)
+        if result != 0:
+            print(f"[{self.name}] ❌ M{address} OFF 쓰기 실패.", file=sys.stderr)
+        if not pulse.done.done():
+            pulse.done.set_result(result)
+
+    # --- 공개 API ---
+    def is_active(self, address: int) -> bool:
+        return address in self._active
+
+    async def pulse(self, address: int, duration: float, retrigger: str = RETRIGGER_EXTEND,
+                    wait: bool = True, **write_kwargs) -> int:
+        """
+        address 코일을 duration초 동안 ON 합니다.
+
+        Args:
+            retrigger: 이미 펄스가 걸려 있을 때의 동작 (RETRIGGER_*).
+            wait: True면 OFF까지 완료된 뒤 반환, False면 ON 직후 반환.
+
+        Returns:
+            0: 성공, -1: ON 또는 OFF 쓰기 실패
+        """
+        self._ensure_driver()
+        loop = asyncio.get_running_loop()
+        current = self._active.get(address)
+
+        if current is not None:
+            if retrigger == RETRIGGER_IGNORE:
+                return await asyncio.shield(current.done) if wait else 0
+            if retrigger == RETRIGGER_EXTEND:
+                current.off_at = max(current.off_at, loop.time() + duration)
+                current.seq = next(self._seq)
+                self._schedule(address, current)
+                return await asyncio.shield(current.done) if wait else 0
+            if retrigger == RETRIGGER_RESTART:
+                await self.cancel(address, write_off=True)
+            else:
+                raise ValueError(f"알 수 없는 retrigger 모드: {retrigger}")
+
+        done = loop.create_future()
+        if await self.write_coil(address, 1, **write_kwargs) != 0:
+            print(f"[{self.name}] ❌ M{address} ON 쓰기 실패.", file=sys.stderr)
+            return -1
+
+        # ON을 쓰는 사이 다른 요청이 같은 코일에 펄스를 걸었다면 그 펄스에 합류
+        current = self._active.get(address)
+        if current is not None:
+            current.off_at = max(current.off_at, loop.time() + duration)
+            current.seq = next(self._seq)
+            self._schedule(address, current)
+            return await asyncio.shield(current.done) if wait else 0
+
+        pulse = _ActivePulse(next(self._seq), loop.time() + duration, done, write_kwargs)
+        self._active[address] = pulse
+        self._schedule(address, pulse)
+        return await asyncio.shield(done) if wait else 0
+
+    async def cancel(self, address: int, write_off: bool = True) -> int:
+        """
+        address에 걸린 펄스를 취소합니다. write_off=True면 즉시 OFF를 씁니다.
+        펄스가 없으면 아무것도 하지 않고 0을 반환합니다.
+        """
+        pulse = self._active.pop(address, None)
+        if pulse is None:
+            return 0
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if write_off:
+            await self._write_off(address, pulse)
+            return pulse.done.result()
+        if not pulse.done.done():
+            pulse.done.set_result(0)
+        return 0
+
+    async def stop(self, write_off: bool = True):
+        """모든 펄스를 취소(기본: OFF 쓰기)하고 드라이버 태스크를 종료합니다."""
+        for address in list(self._active):
+            await self.cancel(address, write_off=write_off)
+        if self._driver is not None:
+            self._driver.cancel()
+            try:
+                await self._driver
+            except asyncio.CancelledError:
+                pass
+            self._driver = None
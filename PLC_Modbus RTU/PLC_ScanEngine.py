@@ -0,0 +1,68 @@
+# PLC_ScanEngine.py
+"""
+Modbus 코일 블록 읽기 계획.
+
+태그 목록을 받아 인접한(또는 gap 허용 범위 안의) 코일 주소를 하나의 read_coils
+요청(블록)으로 묶습니다. (PLC_TagMap이 스캔 클래스별 코일 블록 계획에 사용)
+센서가 늘어나도 주소가 모여 있으면 스캔 주기당 Modbus 프레임 수는 늘지 않습니다.
+"""
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+# Modbus 규격상 FC01 한 프레임으로 읽을 수 있는 최대 코일 수
+MAX_COILS_PER_READ = 2000
+
+
+@dataclass(frozen=True)
+class ScanTag:
+    """스캔 대상 코일 하나 (이름, Modbus 코일 주소)."""
+    name: str
+    address: int
+
+
+@dataclass
+class ReadBlock:
+    """한 번의 read_coils 요청으로 읽는 연속 주소 구간."""
+    start: int
+    count: int
+    tags: List[ScanTag] = field(default_factory=list)
+
+    @property
+    def end(self) -> int:
+        """블록의 마지막 주소 (포함)."""
+        return self.start + self.count - 1
+
+
+def plan_coil_blocks(tags: Sequence[ScanTag], max_gap: int = 0,
+                     max_count: int = MAX_COILS_PER_READ) -> List[ReadBlock]:
+    """
+    태그 목록으로부터 최소 개수의 연속 블록 읽기 계획을 만듭니다.
+
+    Args:
+        tags: 스캔할 태그 목록. 주소 순서는 상관없습니다.
+        max_gap: 두 태그 사이에 끼어 있어도 같은 블록으로 묶을 수 있는 미사용 주소 수.
+                 (예: 64, 66 은 max_gap=1 이상이면 한 블록)
+        max_count: 블록 하나의 최대 코일 수.
+
+    Returns:
+        시작 주소 순으로 정렬된 ReadBlock 리스트.
+    """
+    if max_gap < 0:
+        raise ValueError(f"max_gap은 0 이상이어야 합니다: {max_gap}")
+    if max_count < 1:
+        raise ValueError(f"max_count는 1 이상이어야 합니다: {max_count}")
+
+    blocks: List[ReadBlock] = []
+    for tag in sorted(tags, key=lambda t: t.address):
+        if blocks:
+            last = blocks[-1]
+            gap = tag.address - last.end - 1
+            new_count = tag.address - last.start + 1
+            if gap <= max_gap and new_count <= max_count:
+                # 같은 주소를 가리키는 태그(gap < 0)도 블록 크기를 줄이지 않고 합류
+                last.count = max(last.count, new_count)
+                last.tags.append(tag)
+                continue
+        blocks.append(ReadBlock(start=tag.address, count=1, tags=[tag]))
+    return blocks
+
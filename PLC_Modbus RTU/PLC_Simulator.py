@@ -0,0 +1,407 @@
+# PLC_Simulator.py
+"""
+로컬 PLC 시뮬레이터 (Modbus TCP + 가상 터미널(pty) 위의 Modbus RTU).
+
+실제 XG5000 PLC(COM6 / 192.168.1.2) 없이 클라이언트의 스캔 주기나 종단 간 지연을 측정하기 위한
+시뮬레이터입니다. 표준 라이브러리(asyncio)만 사용하며, 클라이언트가 쓰는 M 코일/D 레지스터
+메모리를 흉내 냅니다. 태그 맵 파일(PLC_TagMap_*.json)을 주면 태그 이름으로 값을 바꿀 수 있습니다.
+
+지원 기능 코드
+    FC01 Read Coils, FC03 Read Holding Registers, FC05 Write Single Coil,
+    FC06 Write Single Register, FC15 Write Multiple Coils, FC16 Write Multiple Registers
+
+타이밍 설정
+    latency   : 요청을 받은 뒤 응답을 보내기까지의 처리 지연 (초, PLC 스캔 타임 흉내)
+    byte_time : RTU 바이트 하나의 전송 시간 (초). 요청/응답 길이만큼 지연을 더합니다.
+                None이면 baudrate 기준 (10비트 / baudrate)
+
+사용 예:
+    python PLC_Simulator.py --tcp-port 5020 --rtu --latency 0.002 --tag-map PLC_TagMap_RS232C.json
+    python PLC_Simulator.py --rtu --slave 3 --tag-map PLC_TagMap_RS232C.json --toggle M0040:0.5
+    -> "[SIM] RTU 포트: /dev/pts/5" 로 출력된 경로를 클라이언트 SERIAL_PORT로 사용
+"""
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+import tty
+from typing import Callable, List, Optional, Set
+
+from PLC_TagMap import AREA_COIL, TagPlan, load_tag_map
+
+# 시뮬레이터 메모리 크기 (주소 0 ~ 크기-1)
+COIL_COUNT = 65536
+REGISTER_COUNT = 65536
+
+# Modbus 예외 코드
+EXC_ILLEGAL_FUNCTION = 0x01
+EXC_ILLEGAL_DATA_ADDRESS = 0x02
+EXC_ILLEGAL_DATA_VALUE = 0x03
+
+# RTU: 미완성 프레임 뒤로 이 시간(초) 이상 수신이 없으면 버퍼를 버림 (프레임 동기화)
+RTU_FRAME_RESET = 0.05
+
+# 요청 하나에 허용하는 최대 개수 (Modbus 규격)
+MAX_READ_COILS = 2000
+MAX_READ_REGISTERS = 125
+MAX_WRITE_COILS = 1968
+MAX_WRITE_REGISTERS = 123
+
+# 메모리 변경 콜백: (영역, 주소, 새 값)
+ChangeListener = Callable[[str, int, int], None]
+
+
+def crc16(data: bytes) -> int:
+    """Modbus RTU CRC16 (다항식 0xA001, 초기값 0xFFFF)."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return crc
+
+
+def with_crc(frame: bytes) -> bytes:
+    return frame + struct.pack("<H", crc16(frame))
+
+
+class PlcMemory:
+    """코일(M)과 Holding Register(D) 메모리. 값이 바뀌면 리스너를 호출합니다."""
+
+    def __init__(self, plan: Optional[TagPlan] = None):
+        self.coils = bytearray(COIL_COUNT)
+        self.registers: List[int] = [0] * REGISTER_COUNT
+        self.plan = plan
+        self._listeners: List[ChangeListener] = []
+
+    def add_listener(self, listener: ChangeListener):
+        self._listeners.append(listener)
+
+    def _notify(self, area: str, address: int, value: int):
+        for listener in self._listeners:
+            listener(area, address, value)
+
+    # --- 코일 ---
+    def read_coils(self, address: int, count: int) -> List[int]:
+        return list(self.coils[address:address + count])
+
+    def write_coil(self, address: int, value: int):
+        value = 1 if value else 0
+        if self.coils[address] != value:
+            self.coils[address] = value
+            self._notify(AREA_COIL, address, value)
+
+    # --- 레지스터 ---
+    def read_registers(self, address: int, count: int) -> List[int]:
+        return self.registers[address:address + count]
+
+    def write_register(self, address: int, value: int):
+        value &= 0xFFFF
+        if self.registers[address] != value:
+            self.registers[address] = value
+            self._notify("holding", address, value)
+
+    # --- 태그 이름 접근 (태그 맵이 있을 때) ---
+    def set_tag(self, name: str, value):
+        tag = self.plan.tag(name)
+        if tag.area == AREA_COIL:
+            self.write_coil(tag.address, value)
+        else:
+            for offset, word in enumerate(self.plan.encode_registers(tag, value)):
+                self.write_register(tag.address + offset, word)
+
+    def get_tag(self, name: str):
+        tag = self.plan.tag(name)
+        if tag.area == AREA_COIL:
+            return self.coils[tag.address]
+        return self.plan.decode_registers(tag, self.read_registers(tag.address, tag.width))
+
+
+def _exception(function_code: int, code: int) -> bytes:
+    return bytes([function_code | 0x80, code])
+
+
+def handle_pdu(memory: PlcMemory, pdu: bytes) -> bytes:
+    """요청 PDU(기능 코드 + 데이터)를 처리하고 응답 PDU를 반환합니다."""
+    if not pdu:
+        return _exception(0, EXC_ILLEGAL_FUNCTION)
+    fc = pdu[0]
+    try:
+        if fc in (0x01, 0x03):
+            address, count = struct.unpack(">HH", pdu[1:5])
+            limit, size = (MAX_READ_COILS, COIL_COUNT) if fc == 0x01 else (MAX_READ_REGISTERS, REGISTER_COUNT)
+            if not 1 <= count <= limit:
+                return _exception(fc, EXC_ILLEGAL_DATA_VALUE)
+            if address + count > size:
+                return _exception(fc, EXC_ILLEGAL_DATA_ADDRESS)
+            if fc == 0x01:
+                bits = memory.read_coils(address, count)
+                packed = bytearray((count + 7) // 8)
+                for i, bit in enumerate(bits):
+                    if bit:
+                        packed[i // 8] |= 1 << (i % 8)
+                return bytes([fc, len(packed)]) + bytes(packed)
+            words = memory.read_registers(address, count)
+            return bytes([fc, count * 2]) + struct.pack(f">{count}H", *words)
+
+        if fc == 0x05:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if value not in (0x0000, 0xFF00):
+                return _exception(fc, EXC_ILLEGAL_DATA_VALUE)
+            if address >= COIL_COUNT:
+                return _exception(fc, EXC_ILLEGAL_DATA_ADDRESS)
+            memory.write_coil(address, value == 0xFF00)
+            return pdu[:5]
+
+        if fc == 0x06:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if address >= REGISTER_COUNT:
+                return _exception(fc, EXC_ILLEGAL_DATA_ADDRESS)
+            memory.write_register(address, value)
+            return pdu[:5]
+
+        if fc == 0x0F:
+            address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+            data = pdu[6:6 + byte_count]
+            if not 1 <= count <= MAX_WRITE_COILS or byte_count != (count + 7) // 8 or len(data) != byte_count:
+                return _exception(fc, EXC_ILLEGAL_DATA_VALUE)
+            if address + count > COIL_COUNT:
+                return _exception(fc, EXC_ILLEGAL_DATA_ADDRESS)
+            for i in range(count):
+                memory.write_coil(address + i, (data[i // 8] >> (i % 8)) & 1)
+            return pdu[:5]
+
+        if fc == 0x10:
+            address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+            data = pdu[6:6 + byte_count]
+            if not 1 <= count <= MAX_WRITE_REGISTERS or byte_count != count * 2 or len(data) != byte_count:
+                return _exception(fc, EXC_ILLEGAL_DATA_VALUE)
+            if address + count > REGISTER_COUNT:
+                return _exception(fc, EXC_ILLEGAL_DATA_ADDRESS)
+            for i, word in enumerate(struct.unpack(f">{count}H", data)):
+                memory.write_register(address + i, word)
+            return pdu[:5]
+    except struct.error:
+        return _exception(fc, EXC_ILLEGAL_DATA_VALUE)
+
+    return _exception(fc, EXC_ILLEGAL_FUNCTION)
+
+
+def rtu_request_length(buffer: bytes) -> Optional[int]:
+    """버퍼 앞의 RTU 요청 프레임 전체 길이(CRC 포함). 아직 알 수 없으면 None."""
+    if len(buffer) < 2:
+        return None
+    fc = buffer[1]
+    if fc in (0x01, 0x03, 0x05, 0x06):
+        return 8
+    if fc in (0x0F, 0x10):
+        if len(buffer) < 7:
+            return None
+        return 9 + buffer[6]
+    # 알 수 없는 기능 코드: 주소 + 기능 코드 + CRC만 있다고 보고 예외 응답
+    return 4
+
+
+class PlcSimulator:
+    """
+    PlcMemory 하나를 Modbus TCP 서버와 pty 기반 Modbus RTU 슬레이브로 동시에 노출합니다.
+
+    slave_id를 지정하면 RTU에서는 그 주소로 온 프레임에만 응답합니다. (다른 주소는 무응답,
+    0은 브로드캐스트로 쓰기만 실행) TCP에서는 Unit ID와 관계없이 응답합니다.
+    """
+
+    def __init__(self, memory: Optional[PlcMemory] = None, slave_id: Optional[int] = None,
+                 latency: float = 0.0, byte_time: Optional[float] = None, baudrate: int = 115200):
+        self.memory = memory or PlcMemory()
+        self.slave_id = slave_id
+        self.latency = latency
+        self.byte_time = byte_time if byte_time is not None else 10.0 / baudrate
+        self.request_count = 0
+        self.crc_errors = 0
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._tcp_handlers: Set[asyncio.Task] = set()
+        self._rtu_fds = None
+        self._rtu_task: Optional[asyncio.Task] = None
+        self.tcp_port: Optional[int] = None
+        self.rtu_port: Optional[str] = None
+
+    async def _respond_delay(self, request_len: int, response_len: int, serial: bool):
+        delay = self.latency
+        if serial:
+            delay += (request_len + response_len) * self.byte_time
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # --- Modbus TCP ---
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 5020) -> int:
+        """TCP 서버를 시작하고 실제 포트를 반환합니다. (port=0이면 임의 포트)"""
+        self._tcp_server = await asyncio.start_server(self._handle_tcp, host, port)
+        self.tcp_port = self._tcp_server.sockets[0].getsockname()[1]
+        return self.tcp_port
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._tcp_handlers.add(task)
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, protocol_id, length, unit_id = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                self.request_count += 1
+                response = handle_pdu(self.memory, pdu)
+                await self._respond_delay(len(pdu), len(response), serial=False)
+                writer.write(struct.pack(">HHHB", transaction_id, protocol_id, len(response) + 1, unit_id) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._tcp_handlers.discard(task)
+            writer.close()
+
+    # --- Modbus RTU (pty) ---
+    def start_rtu(self) -> str:
+        """가상 터미널 쌍을 열고 RTU 슬레이브 루프를 시작합니다. 클라이언트가 열 장치 경로를 반환합니다."""
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        tty.setraw(master_fd)
+        os.set_blocking(master_fd, False)
+        self._rtu_fds = (master_fd, slave_fd)
+        self.rtu_port = os.ttyname(slave_fd)
+        self._rtu_task = asyncio.create_task(self._run_rtu(master_fd))
+        return self.rtu_port
+
+    async def _run_rtu(self, master_fd: int):
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        loop.add_reader(master_fd, readable.set)
+        buffer = bytearray()
+        last_rx = time.monotonic()
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                try:
+                    chunk = os.read(master_fd, 4096)
+                except BlockingIOError:
+                    continue
+                now = time.monotonic()
+                if buffer and now - last_rx > RTU_FRAME_RESET:
+                    buffer.clear()
+                last_rx = now
+                buffer.extend(chunk)
+
+                while True:
+                    length = rtu_request_length(buffer)
+                    if length is None or len(buffer) < length:
+                        break
+                    frame, buffer = bytes(buffer[:length]), buffer[length:]
+                    if crc16(frame[:-2]) != struct.unpack("<H", frame[-2:])[0]:
+                        # CRC 오류: 실제 슬레이브처럼 무응답, 버퍼 동기화를 위해 비움
+                        self.crc_errors += 1
+                        buffer.clear()
+                        break
+                    await self._handle_rtu_frame(master_fd, frame)
+        finally:
+            loop.remove_reader(master_fd)
+
+    async def _handle_rtu_frame(self, master_fd: int, frame: bytes):
+        unit_id, pdu = frame[0], frame[1:-2]
+        if self.slave_id is not None and unit_id not in (self.slave_id, 0):
+            return
+        self.request_count += 1
+        response = handle_pdu(self.memory, pdu)
+        if unit_id == 0:
+            return  # 브로드캐스트는 응답하지 않음
+        reply = with_crc(bytes([unit_id]) + response)
+        await self._respond_delay(len(frame), len(reply), serial=True)
+        os.write(master_fd, reply)
+
+    # --- 종료 ---
+    async def stop(self):
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            handlers = list(self._tcp_handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+        if self._rtu_task is not None:
+            self._rtu_task.cancel()
+            try:
+                await self._rtu_task
+            except asyncio.CancelledError:
+                pass
+            self._rtu_task = None
+        if self._rtu_fds is not None:
+            for fd in self._rtu_fds:
+                os.close(fd)
+            self._rtu_fds = None
+
+
+async def toggle_tag(memory: PlcMemory, name: str, period: float):
+    """태그(bool)를 period초마다 반전합니다. (센서 에지 주입용)"""
+    while True:
+        await asyncio.sleep(period)
+        memory.set_tag(name, 0 if memory.get_tag(name) else 1)
+
+
+async def run(args):
+    plan = load_tag_map(args.tag_map) if args.tag_map else None
+    memory = PlcMemory(plan)
+    simulator = PlcSimulator(memory, slave_id=args.slave, latency=args.latency,
+                             byte_time=args.byte_time, baudrate=args.baudrate)
+
+    if args.verbose:
+        memory.add_listener(lambda area, address, value: print(f"[SIM] {area}[{address}] = {value}"))
+
+    if args.tcp_port is not None:
+        port = await simulator.start_tcp(args.host, args.tcp_port)
+        print(f"[SIM] ✅ Modbus TCP: {args.host}:{port}")
+    if args.rtu:
+        print(f"[SIM] ✅ RTU 포트: {simulator.start_rtu()} (slave={args.slave}, byte_time={simulator.byte_time * 1e6:.1f}us)")
+
+    togglers = []
+    for spec in args.toggle:
+        name, period = spec.split(":")
+        if plan is None:
+            raise SystemExit("[SIM] ❌ --toggle에는 --tag-map이 필요합니다.")
+        togglers.append(asyncio.create_task(toggle_tag(memory, name, float(period))))
+        print(f"[SIM] 🔁 {name}: {period}초마다 반전")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for task in togglers:
+            task.cancel()
+        await simulator.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="로컬 PLC 시뮬레이터 (Modbus TCP / RTU over pty)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp-port", type=int, default=None, help="Modbus TCP 포트 (지정 시 TCP 서버 시작)")
+    parser.add_argument("--rtu", action="store_true", help="pty 기반 Modbus RTU 슬레이브 시작")
+    parser.add_argument("--slave", type=int, default=None, help="RTU 슬레이브 주소 (미지정 시 모든 주소에 응답)")
+    parser.add_argument("--baudrate", type=int, default=115200, help="RTU byte_time 기본값 계산용")
+    parser.add_argument("--byte-time", type=float, default=None, help="RTU 바이트당 전송 시간 (초)")
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 처리 지연 (초)")
+    parser.add_argument("--tag-map", default=None, help="태그 맵 JSON (태그 이름으로 값 조작)")
+    parser.add_argument("--toggle", action="append", default=[], help="태그:주기(초) - bool 태그 주기적 반전")
+    parser.add_argument("--verbose", action="store_true", help="메모리 변경 출력")
+    args = parser.parse_args()
+    if args.tcp_port is None and not args.rtu:
+        parser.error("--tcp-port 또는 --rtu 중 하나 이상을 지정하세요.")
+    return args
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run(parse_args()))
+    except KeyboardInterrupt:
+        print("\n[SIM] 시뮬레이터를 종료합니다.", file=sys.stderr)
@@ -0,0 +1,197 @@
+# PLC_SubscriptionManager.py
+"""
+OPC UA 구독 관리자: 모든 Monitored Item을 하나의 Subscription에 담습니다.
+
+노드마다 Subscription을 따로 만들면 서버는 Subscription마다 Publish 주기를 돌리고 클라이언트는
+Publish 요청을 그만큼 더 보내야 합니다. 이 모듈은 Subscription 하나에 모든 항목을 한 번의
+CreateMonitoredItems 요청으로 등록하고, 항목별로 다음을 지정합니다.
+    sampling_interval : 서버 샘플링 주기 (ms)
+    queue_size        : 서버 측 알림 큐 크기 (Publish 사이에 여러 번 바뀌어도 값을 잃지 않도록)
+    discard_oldest    : 큐가 가득 찼을 때 가장 오래된 값(True) 또는 새 값(False)을 버림
+    deadband          : 숫자 노드의 절대/백분율 Deadband (DataChangeFilter)
+    trigger           : DataChangeFilter Trigger (Status / StatusValue / StatusValueTimestamp)
+
+알림은 항목에 등록한 기존 핸들러의 datachange_notification(node, val, data)로 그대로 전달하며,
+항목별 알림 수, 지연(lag: 서버 타임스탬프 -> 수신), 큐 넘침(Overflow 비트)으로 버려진 알림,
+핸들러 오류를 집계합니다.
+"""
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from asyncua import Client, ua
+
+# DataValue StatusCode의 InfoType(DataValue) + Overflow 비트: 서버 큐가 넘쳐 알림이 버려졌음을 뜻함
+STATUS_INFOTYPE_DATAVALUE = 0x00000400
+STATUS_OVERFLOW = 0x00000080
+
+# 지연 통계에 사용할 최근 샘플 수
+LAG_SAMPLE_WINDOW = 500
+
+DEADBAND_ABSOLUTE = "absolute"
+DEADBAND_PERCENT = "percent"
+
+
+@dataclass
+class MonitoredItemSpec:
+    """구독 항목 하나의 설정."""
+    node_id: str
+    handler: Any                            # datachange_notification(node, val, data)를 가진 객체
+    name: Optional[str] = None
+    sampling_interval: float = 100.0        # ms
+    queue_size: int = 1
+    discard_oldest: bool = True
+    deadband: Optional[float] = None
+    deadband_type: str = DEADBAND_ABSOLUTE
+    trigger: ua.DataChangeTrigger = ua.DataChangeTrigger.StatusValue
+
+    # 집계
+    notifications: int = 0
+    overflows: int = 0
+    handler_errors: int = 0
+    recent_lags: Deque[float] = field(default_factory=lambda: deque(maxlen=LAG_SAMPLE_WINDOW))
+    revised: Optional[str] = None           # 생성 실패 시 StatusCode 이름
+
+    @property
+    def label(self) -> str:
+        return self.name or self.node_id
+
+
+def _data_change_filter(spec: MonitoredItemSpec) -> Optional[ua.DataChangeFilter]:
+    """Deadband나 기본값이 아닌 Trigger가 있을 때만 DataChangeFilter를 만듭니다."""
+    if spec.deadband is None and spec.trigger == ua.DataChangeTrigger.StatusValue:
+        return None
+    mfilter = ua.DataChangeFilter()
+    mfilter.Trigger = spec.trigger
+    if spec.deadband is None:
+        mfilter.DeadbandType = ua.DeadbandType.None_
+    elif spec.deadband_type == DEADBAND_PERCENT:
+        mfilter.DeadbandType = ua.DeadbandType.Percent
+        mfilter.DeadbandValue = float(spec.deadband)
+    elif spec.deadband_type == DEADBAND_ABSOLUTE:
+        mfilter.DeadbandType = ua.DeadbandType.Absolute
+        mfilter.DeadbandValue = float(spec.deadband)
+    else:
+        raise ValueError(f"알 수 없는 deadband_type: {spec.deadband_type}")
+    return mfilter
+
+
+class SubscriptionManager:
+    """
+    모든 Monitored Item을 Subscription 하나로 관리하고 항목별 핸들러로 알림을 나눠 주는 관리자.
+    node_resolver(client, node_id)를 주면 노드 핸들을 그것으로 얻습니다. (예: NodeCache.get)
+    """
+
+    def __init__(self, client: Client, publishing_interval: float = 100.0,
+                 node_resolver: Optional[Callable[[Client, str], Any]] = None, name: str = "OPC UA SUB"):
+        self.client = client
+        self.publishing_interval = publishing_interval
+        self.node_resolver = node_resolver or (lambda c, node_id: c.get_node(node_id))
+        self.name = name
+        self.items: List[MonitoredItemSpec] = []
+        self._by_handle: Dict[int, MonitoredItemSpec] = {}
+        self.subscription = None
+        self.status_changes = 0
+
+    def add(self, node_id: str, handler, **options) -> MonitoredItemSpec:
+        """구독 항목을 추가합니다. (start() 전에 호출)"""
+        spec = MonitoredItemSpec(node_id=node_id, handler=handler, **options)
+        self.items.append(spec)
+        return spec
+
+    def _request(self, spec: MonitoredItemSpec, client_handle: int) -> ua.MonitoredItemCreateRequest:
+        read_id = ua.ReadValueId()
+        read_id.NodeId = self.node_resolver(self.client, spec.node_id).nodeid
+        read_id.AttributeId = ua.AttributeIds.Value
+
+        params = ua.MonitoringParameters()
+        params.ClientHandle = client_handle
+        params.SamplingInterval = spec.sampling_interval
+        params.QueueSize = spec.queue_size
+        params.DiscardOldest = spec.discard_oldest
+        params.Filter = _data_change_filter(spec)
+
+        request = ua.MonitoredItemCreateRequest()
+        request.ItemToMonitor = read_id
+        request.MonitoringMode = ua.MonitoringMode.Reporting
+        request.RequestedParameters = params
+        return request
+
+    async def start(self) -> int:
+        """Subscription 하나를 만들고 모든 항목을 한 번의 요청으로 등록합니다. 등록된 항목 수를 반환합니다."""
+        self.subscription = await self.client.create_subscription(self.publishing_interval, self)
+        self._by_handle = {}
+        requests = []
+        for index, spec in enumerate(self.items, start=1):
+            self._by_handle[index] = spec
+            requests.append(self._request(spec, index))
+
+        results = await self.subscription.create_monitored_items(requests)
+        created = 0
+        for spec, result in zip(self.items, results):
+            if isinstance(result, ua.StatusCode):
+                spec.revised = result.name
+                print(f"[{self.name}] ❌ 구독 항목 생성 실패: {spec.label} ({result.name})", file=sys.stderr)
+            else:
+                created += 1
+                print(f"[{self.name}] ✅ 구독 시작: {spec.label} (sampling {spec.sampling_interval:.0f}ms, "
+                      f"queue {spec.queue_size})")
+        return created
+
+    async def stop(self):
+        if self.subscription is not None:
+            try:
+                await self.subscription.delete()
+            finally:
+                self.subscription = None
+
+    # --- asyncua Subscription 핸들러 ---
+    def datachange_notification(self, node, val, data):
+        spec = self._by_handle.get(data.subscription_data.client_handle)
+        if spec is None:
+            return
+        spec.notifications += 1
+
+        data_value = data.monitored_item.Value
+        status = data_value.StatusCode
+        if status is not None and (status.value & STATUS_INFOTYPE_DATAVALUE) and (status.value & STATUS_OVERFLOW):
+            spec.overflows += 1
+
+        stamp = data_value.ServerTimestamp or data_value.SourceTimestamp
+        if stamp is not None:
+            if stamp.tzinfo is None:
+                stamp = stamp.replace(tzinfo=timezone.utc)
+            spec.recent_lags.append(max(0.0, (datetime.now(timezone.utc) - stamp).total_seconds()))
+
+        try:
+            spec.handler.datachange_notification(node, val, data)
+        except Exception as e:
+            spec.handler_errors += 1
+            print(f"[{self.name}] ❌ {spec.label} 핸들러 오류: {e.__class__.__name__} - {e}", file=sys.stderr)
+
+    def status_change_notification(self, status):
+        self.status_changes += 1
+        print(f"[{self.name}] ⚠️ Subscription 상태 변경: {status}", file=sys.stderr)
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for spec in self.items:
+            lags = sorted(spec.recent_lags)
+            result[spec.label] = {
+                "notifications": spec.notifications,
+                "dropped": spec.overflows,
+                "handler_errors": spec.handler_errors,
+                "lag_p95_ms": (lags[min(len(lags) - 1, int(0.95 * len(lags)))] * 1000) if lags else 0.0,
+                "lag_max_ms": (lags[-1] * 1000) if lags else 0.0,
+            }
+        return result
+
+    def format_metrics(self) -> str:
+        lines = [f"[{self.name}] publishing {self.publishing_interval:.0f}ms, 상태 변경 {self.status_changes}회"]
+        for label, m in self.metrics().items():
+            lines.append(f"  - {label}: 알림={m['notifications']} dropped={m['dropped']} "
+                         f"errors={m['handler_errors']} lag(p95/max)={m['lag_p95_ms']:.1f}/{m['lag_max_ms']:.1f}ms")
+        return "\n".join(lines)
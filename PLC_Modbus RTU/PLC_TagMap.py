@@ -0,0 +1,305 @@
+# PLC_TagMap.py
+"""
+선언형 태그 맵과 컴파일된 읽기/쓰기 계획.
+
+태그 맵 파일(JSON)에 태그별 이름, 영역(coil/holding), 주소, 타입, 스캔 클래스, 방향을 적어 두면
+시작 시 한 번 읽어 다음과 같은 요청 계획(TagPlan)으로 컴파일합니다.
+    - 스캔 클래스별 블록 읽기 계획: 인접 주소는 한 번의 read_coils / read_holding_registers로 묶음
+    - 타입별 디코더/인코더: bool, uint16, int16, uint32, int32, float32 (32비트는 워드 2개)
+    - 쓰기 인코딩: 쓰기 가능한 레지스터 태그 값을 (주소 -> 워드)로 변환 (RegisterWriteCache.commit이 FC16 프레임으로 묶음)
+
+센서를 추가할 때는 태그 맵에 한 줄을 추가하면 되고, 같은 스캔 클래스의 다른 태그와
+주소가 가까우면 새 Modbus 요청 없이 기존 블록 읽기에 합류합니다.
+
+register_gap_values({"주소": 값})는 선택 항목이며 기본값이 없습니다. PLC 프로그램에서 쓰지 않는 것이
+확인된 주소만 넣으면 그 주소를 채워 떨어진 쓰기 태그를 한 FC16 프레임으로 합치고, 없으면 실제로
+연속된 주소끼리만 한 프레임으로 씁니다.
+
+태그 맵 파일 예:
+    {
+        "word_order": "little",
+        "tags": [
+            {"name": "M0040", "area": "coil", "address": 64, "type": "bool",
+             "scan_class": "fast", "direction": "read", "description": "컨베이어 센서"},
+            {"name": "D102", "area": "holding", "address": 0, "type": "uint16", "direction": "write"}
+        ]
+    }
+"""
+import json
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from PLC_ScanEngine import MAX_COILS_PER_READ, ScanTag, plan_coil_blocks
+
+AREA_COIL = "coil"
+AREA_HOLDING = "holding"
+
+DIRECTION_READ = "read"
+DIRECTION_WRITE = "write"
+DIRECTION_READWRITE = "readwrite"
+
+# 타입 -> 차지하는 주소 수 (coil은 bool만 허용)
+TYPE_WIDTHS = {
+    "bool": 1,
+    "uint16": 1,
+    "int16": 1,
+    "uint32": 2,
+    "int32": 2,
+    "float32": 2,
+}
+
+# 32비트 값을 레지스터 2개로 나눌 때의 struct 형식
+_WIDE_FORMATS = {"uint32": ">I", "int32": ">i", "float32": ">f"}
+
+# Modbus 규격상 FC03 한 프레임으로 읽을 수 있는 최대 레지스터 수
+MAX_REGISTERS_PER_READ = 125
+
+DEFAULT_SCAN_CLASS = "fast"
+
+
+@dataclass(frozen=True)
+class TagDef:
+    """태그 맵의 태그 하나."""
+    name: str
+    area: str
+    address: int
+    type: str = "bool"
+    scan_class: Optional[str] = None      # None이면 주기 스캔 대상이 아님
+    direction: str = DIRECTION_READ
+    description: str = ""
+
+    @property
+    def width(self) -> int:
+        return TYPE_WIDTHS[self.type]
+
+    @property
+    def readable(self) -> bool:
+        return self.direction in (DIRECTION_READ, DIRECTION_READWRITE)
+
+    @property
+    def writable(self) -> bool:
+        return self.direction in (DIRECTION_WRITE, DIRECTION_READWRITE)
+
+
+@dataclass
+class RegisterBlock:
+    """한 번의 read_holding_registers 요청으로 읽는 연속 레지스터 구간."""
+    start: int
+    count: int
+    tags: List[TagDef] = field(default_factory=list)
+
+    @property
+    def end(self) -> int:
+        """블록의 마지막 주소 (포함)."""
+        return self.start + self.count - 1
+
+
+def validate_tag(tag: TagDef):
+    """태그 정의가 올바르지 않으면 ValueError를 발생시킵니다."""
+    if tag.area not in (AREA_COIL, AREA_HOLDING):
+        raise ValueError(f"[{tag.name}] 알 수 없는 영역: {tag.area}")
+    if tag.type not in TYPE_WIDTHS:
+        raise ValueError(f"[{tag.name}] 알 수 없는 타입: {tag.type}")
+    if tag.area == AREA_COIL and tag.type != "bool":
+        raise ValueError(f"[{tag.name}] coil 영역은 bool 타입만 허용됩니다: {tag.type}")
+    if tag.direction not in (DIRECTION_READ, DIRECTION_WRITE, DIRECTION_READWRITE):
+        raise ValueError(f"[{tag.name}] 알 수 없는 방향: {tag.direction}")
+    if tag.address < 0:
+        raise ValueError(f"[{tag.name}] 주소는 0 이상이어야 합니다: {tag.address}")
+    if tag.scan_class is not None and not tag.readable:
+        raise ValueError(f"[{tag.name}] 쓰기 전용 태그에는 scan_class를 지정할 수 없습니다.")
+
+
+def plan_register_blocks(tags: Sequence[TagDef], max_gap: int = 0,
+                         max_count: int = MAX_REGISTERS_PER_READ) -> List[RegisterBlock]:
+    """
+    레지스터 태그 목록으로부터 최소 개수의 연속 블록 읽기 계획을 만듭니다.
+    (plan_coil_blocks와 같은 규칙이며, 32비트 태그는 워드 2개를 차지합니다.)
+    """
+    if max_gap < 0:
+        raise ValueError(f"max_gap은 0 이상이어야 합니다: {max_gap}")
+
+    blocks: List[RegisterBlock] = []
+    for tag in sorted(tags, key=lambda t: t.address):
+        tag_end = tag.address + tag.width - 1
+        if blocks:
+            last = blocks[-1]
+            gap = tag.address - last.end - 1
+            new_count = max(last.end, tag_end) - last.start + 1
+            if gap <= max_gap and new_count <= max_count:
+                last.count = new_count
+                last.tags.append(tag)
+                continue
+        blocks.append(RegisterBlock(start=tag.address, count=tag.width, tags=[tag]))
+    return blocks
+
+
+class TagPlan:
+    """
+    태그 맵을 컴파일한 결과. 스캔 클래스별 블록 읽기 계획과 타입별 인코딩/디코딩을 제공합니다.
+    """
+
+    def __init__(self, tags: Sequence[TagDef], max_gap: int = 0,
+                 register_gap_values: Optional[Dict[int, int]] = None,
+                 word_order: str = "little"):
+        if word_order not in ("little", "big"):
+            raise ValueError(f"알 수 없는 word_order: {word_order}")
+        names = [t.name for t in tags]
+        if len(names) != len(set(names)):
+            raise ValueError(f"중복된 태그 이름이 있습니다: {names}")
+        for tag in tags:
+            validate_tag(tag)
+
+        self.tags: Dict[str, TagDef] = {t.name: t for t in tags}
+        self.max_gap = max_gap
+        self.register_gap_values = dict(register_gap_values or {})
+        self.word_order = word_order
+
+        # 스캔 클래스 -> (코일 블록, 레지스터 블록)
+        self.coil_blocks: Dict[str, list] = {}
+        self.register_blocks: Dict[str, List[RegisterBlock]] = {}
+        for scan_class in self.scan_classes:
+            members = [t for t in tags if t.scan_class == scan_class]
+            self.coil_blocks[scan_class] = plan_coil_blocks(
+                [ScanTag(t.name, t.address) for t in members if t.area == AREA_COIL],
+                max_gap=max_gap, max_count=MAX_COILS_PER_READ,
+            )
+            self.register_blocks[scan_class] = plan_register_blocks(
+                [t for t in members if t.area == AREA_HOLDING], max_gap=max_gap,
+            )
+
+    # --- 조회 ---
+    @property
+    def scan_classes(self) -> List[str]:
+        return sorted({t.scan_class for t in self.tags.values() if t.scan_class is not None})
+
+    def tag(self, name: str) -> TagDef:
+        try:
+            return self.tags[name]
+        except KeyError:
+            raise KeyError(f"태그 맵에 없는 태그: {name}") from None
+
+    def address(self, name: str) -> int:
+        return self.tag(name).address
+
+    def scan_tags(self, scan_class: str) -> List[TagDef]:
+        return [t for t in self.tags.values() if t.scan_class == scan_class]
+
+    def request_count(self, scan_class: str) -> int:
+        """스캔 클래스 하나를 읽는 데 필요한 Modbus 요청 수."""
+        return len(self.coil_blocks.get(scan_class, [])) + len(self.register_blocks.get(scan_class, []))
+
+    # --- 타입 변환 ---
+    def decode_registers(self, tag: TagDef, words: Sequence[int]) -> Any:
+        """레지스터 워드(태그 폭만큼)를 태그 타입의 값으로 변환합니다."""
+        if tag.type == "bool":
+            return 1 if words[0] else 0
+        if tag.type == "uint16":
+            return words[0] & 0xFFFF
+        if tag.type == "int16":
+            return struct.unpack(">h", struct.pack(">H", words[0] & 0xFFFF))[0]
+        high, low = (words[1], words[0]) if self.word_order == "little" else (words[0], words[1])
+        return struct.unpack(_WIDE_FORMATS[tag.type], struct.pack(">HH", high & 0xFFFF, low & 0xFFFF))[0]
+
+    def encode_registers(self, tag: TagDef, value: Any) -> List[int]:
+        """태그 타입의 값을 레지스터 워드 리스트로 변환합니다."""
+        if tag.type in ("bool", "uint16"):
+            return [int(value) & 0xFFFF]
+        if tag.type == "int16":
+            return [struct.unpack(">H", struct.pack(">h", int(value)))[0]]
+        packed = struct.pack(_WIDE_FORMATS[tag.type], float(value) if tag.type == "float32" else int(value))
+        high, low = struct.unpack(">HH", packed)
+        return [low, high] if self.word_order == "little" else [high, low]
+
+    def encode_writes(self, values: Dict[str, Any]) -> Dict[int, int]:
+        """(태그 이름 -> 값)을 (레지스터 주소 -> 워드)로 변환합니다. (RegisterWriteCache.commit 입력)"""
+        registers: Dict[int, int] = {}
+        for name, value in values.items():
+            tag = self.tag(name)
+            if tag.area != AREA_HOLDING or not tag.writable:
+                raise ValueError(f"[{name}] 쓰기 가능한 레지스터 태그가 아닙니다.")
+            for offset, word in enumerate(self.encode_registers(tag, value)):
+                registers[tag.address + offset] = word
+        return registers
+
+
+def compile_tag_map(config: Dict[str, Any], max_gap: int = 0) -> TagPlan:
+    """태그 맵 딕셔너리(JSON 내용)를 TagPlan으로 컴파일합니다."""
+    tags = []
+    for entry in config.get("tags", []):
+        tags.append(TagDef(
+            name=entry["name"],
+            area=entry["area"],
+            address=int(entry["address"]),
+            type=entry.get("type", "bool"),
+            scan_class=entry.get("scan_class"),
+            direction=entry.get("direction", DIRECTION_READ),
+            description=entry.get("description", ""),
+        ))
+    gap_values = {int(k): int(v) for k, v in config.get("register_gap_values", {}).items()}
+    return TagPlan(tags, max_gap=config.get("scan_max_gap", max_gap),
+                   register_gap_values=gap_values, word_order=config.get("word_order", "little"))
+
+
+def load_tag_map(path: str, max_gap: int = 0) -> TagPlan:
+    """태그 맵 JSON 파일을 읽어 TagPlan으로 컴파일합니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_tag_map(json.load(f), max_gap=max_gap)
+
+
+def plan_from_scan_tags(tags: Sequence[ScanTag], scan_class: str = DEFAULT_SCAN_CLASS,
+                        max_gap: int = 0) -> TagPlan:
+    """기존 ScanTag(코일) 목록을 bool 코일 태그 맵으로 변환합니다."""
+    return TagPlan([TagDef(t.name, AREA_COIL, t.address, scan_class=scan_class) for t in tags], max_gap=max_gap)
+
+
+class TagScanEngine:
+    """
+    TagPlan의 스캔 클래스 하나를 블록 읽기로 스캔하여 {태그 이름: 값} 딕셔너리를 돌려주는 엔진.
+
+    read_coils / read_holding_registers 콜백은 (시작 주소, 개수)를 받는 coroutine 함수로,
+    비트/워드 리스트를 반환하고 통신 오류 시에는 None을 반환해야 합니다.
+    bool 태그의 값은 1/0이며, 읽기에 실패한 블록의 태그는 타입과 관계없이 None이 됩니다.
+    """
+
+    def __init__(self, plan: TagPlan, scan_class: str,
+                 read_coils: Callable[[int, int], Awaitable[Optional[List[bool]]]],
+                 read_holding_registers: Optional[Callable[[int, int], Awaitable[Optional[List[int]]]]] = None):
+        self.plan = plan
+        self.scan_class = scan_class
+        self.read_coils = read_coils
+        self.read_holding_registers = read_holding_registers
+        self.coil_blocks = plan.coil_blocks.get(scan_class, [])
+        self.register_blocks = plan.register_blocks.get(scan_class, [])
+        if self.register_blocks and read_holding_registers is None:
+            raise ValueError(f"[{scan_class}] 레지스터 태그를 읽으려면 read_holding_registers 콜백이 필요합니다.")
+
+    @property
+    def tag_names(self) -> List[str]:
+        return [t.name for t in self.plan.scan_tags(self.scan_class)]
+
+    def decode_register_block(self, block: RegisterBlock, words: Optional[List[int]]) -> Dict[str, Any]:
+        """레지스터 블록 하나의 읽기 결과를 태그별 값으로 분배합니다."""
+        if words is None or len(words) < block.count:
+            return {tag.name: None for tag in block.tags}
+        values = {}
+        for tag in block.tags:
+            offset = tag.address - block.start
+            values[tag.name] = self.plan.decode_registers(tag, words[offset:offset + tag.width])
+        return values
+
+    async def scan(self) -> Dict[str, Any]:
+        """스캔 클래스의 모든 블록을 순서대로 읽어 태그별 값을 반환합니다."""
+        values: Dict[str, Any] = {}
+        for block in self.coil_blocks:
+            bits = await self.read_coils(block.start, block.count)
+            for tag in block.tags:
+                if bits is None or len(bits) < block.count:
+                    values[tag.name] = None
+                else:
+                    values[tag.name] = 1 if bits[tag.address - block.start] else 0
+        for block in self.register_blocks:
+            words = await self.read_holding_registers(block.start, block.count)
+            values.update(self.decode_register_block(block, words))
+        return values
@@ -0,0 +1,268 @@
+# PLC_Telemetry.py
+"""
+PLC 태그 시계열 텔레메트리 (좁은 시계열 테이블 + 변화 시 기록 + 주기 키프레임 + 다중 행 일괄 INSERT).
+
+mission_plc_logs에는 "Conveyor_Sensor_Check OK" 같은 이벤트 문장만 남고, 센서 상태와 설정값의 시간에 따른
+변화는 남지 않습니다. TelemetryRecorder는 설정된 태그(M0040/M0041, D102/D104/D105, run_mode)의 값을
+좁은 시계열 테이블 plc_telemetry에 기록합니다.
+
+    plc_telemetry      (equipment_id, tag_id, ts) 기본 키 + value(DOUBLE) + keyframe 플래그
+                       행 하나가 약 40바이트 정도라 고빈도 데이터를 몇 달치 보관할 수 있음
+    plc_telemetry_tags tag_id -> 태그 이름과 문자열 값 코드표 (run_mode 'STOP' -> 0 등)
+
+기록 규칙
+    - record()는 값이 마지막으로 기록한 값과 다를 때만(deadband 초과) 행을 버퍼에 넣음 (기다리지 않음)
+    - keyframe_interval초 동안 기록이 없던 (설비, 태그)는 현재 값을 키프레임 행으로 다시 기록
+      -> 어떤 구간을 조회해도 구간 시작 직전 keyframe_interval 안에 기준 값이 있음
+    - 같은 (설비, 태그)의 ts는 항상 증가하도록 보정 (기본 키 충돌 없음)
+    - 버퍼가 flush_rows행 이상이거나 flush_interval초가 지나면 다중 행 INSERT 하나(한 트랜잭션)로 기록
+      샘플마다 DB 왕복을 하지 않음. 실패 시 버퍼 앞쪽에 되돌려 재시도 (max_buffer 초과분은 오래된 행부터 버림)
+
+몇 달 이상 보관할 때는 ts 기준 RANGE 파티션을 추가하면 오래된 구간을 DROP PARTITION으로 바로 정리할 수 있습니다.
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from PLC_DataBase import db_pool, insert_rows_sync, register_table
+
+TELEMETRY_TABLE = "plc_telemetry"
+TELEMETRY_TAG_TABLE = "plc_telemetry_tags"
+TELEMETRY_COLUMNS = ("equipment_id", "tag_id", "ts", "value", "keyframe")
+
+TELEMETRY_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS {TELEMETRY_TABLE} (
+        equipment_id VARCHAR(32) NOT NULL,
+        tag_id SMALLINT UNSIGNED NOT NULL,
+        ts DATETIME(6) NOT NULL,
+        value DOUBLE NOT NULL,
+        keyframe TINYINT(1) NOT NULL DEFAULT 0,
+        PRIMARY KEY (equipment_id, tag_id, ts)
+    ) ENGINE=InnoDB
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {TELEMETRY_TAG_TABLE} (
+        tag_id SMALLINT UNSIGNED NOT NULL PRIMARY KEY,
+        tag_name VARCHAR(32) NOT NULL,
+        value_codes VARCHAR(255) NULL
+    ) ENGINE=InnoDB
+    """,
+)
+
+DEFAULT_KEYFRAME_INTERVAL = 60.0
+DEFAULT_FLUSH_ROWS = 2000
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_MAX_BUFFER = 100000
+
+# run_mode 문자열 -> 숫자 코드 (코드표에 없는 값은 UNKNOWN_CODE)
+RUN_MODE_CODES = {"STOP": 0, "RUN": 1, "MOVE": 2, "READY": 3, "RESTART": 4}
+UNKNOWN_CODE = -1
+
+register_table(TELEMETRY_TABLE, TELEMETRY_COLUMNS)
+register_table(TELEMETRY_TAG_TABLE, ("tag_id", "tag_name", "value_codes"))
+
+
+class TelemetryTag(NamedTuple):
+    tag_id: int
+    name: str
+    codes: Optional[Dict[str, int]] = None  # 문자열 값 태그의 코드표
+    deadband: float = 0.0                   # 마지막 기록 값과의 차이가 이 값 이하이면 기록하지 않음
+
+    def encode(self, value: Any) -> float:
+        if self.codes is not None:
+            return float(self.codes.get(str(value).upper(), UNKNOWN_CODE))
+        return float(value)
+
+
+DEFAULT_TELEMETRY_TAGS = (
+    TelemetryTag(1, "M0040"),       # 컨베이어 센서
+    TelemetryTag(2, "M0041"),       # 로봇팔 센서
+    TelemetryTag(3, "D102"),        # 주파수 (x100)
+    TelemetryTag(4, "D104"),        # 가속
+    TelemetryTag(5, "D105"),        # 감속
+    TelemetryTag(6, "run_mode", RUN_MODE_CODES),
+)
+
+
+def insert_telemetry_sync(rows: List[Tuple[Any, ...]]) -> bool:
+    """텔레메트리 행들을 다중 행 INSERT 하나로 기록합니다. (TelemetryRecorder 기본 writer)"""
+    return insert_rows_sync(TELEMETRY_TABLE, TELEMETRY_COLUMNS, rows)
+
+
+def ensure_telemetry_schema(tags: Iterable[TelemetryTag] = DEFAULT_TELEMETRY_TAGS) -> bool:
+    """텔레메트리 테이블이 없으면 만들고 태그 코드표를 갱신합니다. (스레드에서 호출)"""
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            for ddl in TELEMETRY_DDL:
+                cursor.execute(ddl)
+            cursor.executemany(
+                f"INSERT INTO {TELEMETRY_TAG_TABLE} (tag_id, tag_name, value_codes) VALUES (%s, %s, %s) "
+                f"ON DUPLICATE KEY UPDATE tag_name = VALUES(tag_name), value_codes = VALUES(value_codes)",
+                [(tag.tag_id, tag.name,
+                  ",".join(f"{name}={code}" for name, code in tag.codes.items()) if tag.codes else None)
+                 for tag in tags],
+            )
+        return True
+    except Exception as e:
+        print(f"[TELEMETRY] ❌ 텔레메트리 테이블 준비 실패: {e}", file=sys.stderr)
+        return False
+
+
+class TelemetryRecorder:
+    """
+    태그 값을 변화 시/키프레임 주기로 버퍼에 모아 다중 행 INSERT로 기록하는 비동기 기록기.
+    writer(rows) -> bool 은 스레드에서 실행되며, async 함수이면 이벤트 루프에서 바로 await 합니다.
+    """
+
+    def __init__(self, tags: Iterable[TelemetryTag] = DEFAULT_TELEMETRY_TAGS,
+                 keyframe_interval: float = DEFAULT_KEYFRAME_INTERVAL,
+                 flush_rows: int = DEFAULT_FLUSH_ROWS, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_buffer: int = DEFAULT_MAX_BUFFER,
+                 writer: Optional[Callable[[List[tuple]], Any]] = None, name: str = "TELEMETRY"):
+        self.tags: Dict[str, TelemetryTag] = {tag.name: tag for tag in tags}
+        self.keyframe_interval = keyframe_interval
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.writer = writer or insert_telemetry_sync
+        self.name = name
+
+        self._buffer: Deque[Tuple[Any, ...]] = deque()
+        # (설비, tag_id) -> (마지막 기록 값, 마지막 기록 시각(monotonic), 마지막 ts)
+        self._last: Dict[Tuple[str, int], Tuple[float, float, datetime]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        # 지표
+        self.samples = 0
+        self.changes = 0
+        self.keyframes = 0
+        self.suppressed = 0
+        self.written = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.failures = 0
+        self.dropped = 0
+
+    # --- 샘플 기록 ---
+    def record(self, equipment_id: str, tag_name: str, value: Any) -> bool:
+        """태그 값을 기록 대상으로 넘깁니다. 값이 바뀌어 행을 만들었으면 True. (이벤트 루프 스레드에서 호출)"""
+        tag = self.tags.get(tag_name)
+        if tag is None or value is None:
+            return False
+        self.samples += 1
+        encoded = tag.encode(value)
+        key = (equipment_id, tag.tag_id)
+        last = self._last.get(key)
+        if last is not None and abs(encoded - last[0]) <= tag.deadband:
+            self.suppressed += 1
+            return False
+        self._emit(key, encoded, keyframe=False)
+        self.changes += 1
+        return True
+
+    def _emit(self, key: Tuple[str, int], value: float, keyframe: bool):
+        now = datetime.now()
+        last = self._last.get(key)
+        if last is not None and now <= last[2]:
+            now = last[2] + timedelta(microseconds=1)
+        self._last[key] = (value, time.monotonic(), now)
+        self._buffer.append((key[0], key[1], now, value, int(keyframe)))
+        self._trim()
+        if len(self._buffer) >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+
+    def emit_keyframes(self) -> int:
+        """keyframe_interval 동안 기록이 없던 (설비, 태그)의 현재 값을 키프레임으로 기록하고 그 수를 반환합니다."""
+        now = time.monotonic()
+        due = [(key, last[0]) for key, last in self._last.items() if now - last[1] >= self.keyframe_interval]
+        for key, value in due:
+            self._emit(key, value, keyframe=True)
+        self.keyframes += len(due)
+        return len(due)
+
+    def _trim(self):
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+
+    # --- 백그라운드 기록 ---
+    def start(self):
+        """백그라운드 기록 태스크를 시작합니다. (실행 중인 이벤트 루프 안에서 호출)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self.emit_keyframes()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """버퍼의 행을 flush_rows개씩 기록합니다. 모두 기록했으면 True."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.flush_rows, len(self._buffer)))]
+                if asyncio.iscoroutinefunction(self.writer):
+                    ok = await self.writer(batch)
+                else:
+                    ok = await asyncio.to_thread(self.writer, batch)
+                if not ok:
+                    self.failures += 1
+                    self._buffer.extendleft(reversed(batch))
+                    self._trim()
+                    return False
+                self.batches += 1
+                self.written += len(batch)
+                self.max_batch = max(self.max_batch, len(batch))
+        return True
+
+    async def stop(self):
+        """새 주기를 멈추고 남은 행을 모두 기록한 뒤 종료합니다."""
+        self._closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._buffer and not await self.flush():
+            print(f"[{self.name}] ⚠️ 종료 시 기록하지 못한 텔레메트리 {len(self._buffer)}행을 버립니다.", file=sys.stderr)
+
+    # --- 지표 ---
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "series": len(self._last),
+            "buffered": len(self._buffer),
+            "samples": self.samples,
+            "changes": self.changes,
+            "keyframes": self.keyframes,
+            "suppressed": self.suppressed,
+            "written": self.written,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"[{self.name}] 시계열 {m['series']}개 버퍼={m['buffered']} | samples={m['samples']} "
+                f"changes={m['changes']} keyframes={m['keyframes']} suppressed={m['suppressed']} | "
+                f"written={m['written']} batches={m['batches']} (최대 {m['max_batch']}행) "
+                f"failures={m['failures']} dropped={m['dropped']}")
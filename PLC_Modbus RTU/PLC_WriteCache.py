@@ -0,0 +1,145 @@
+# PLC_WriteCache.py
+"""
+Holding Register 쓰기용 변경 감지(write-through shadow) 캐시.
+
+마지막으로 '성공적으로' 쓴 값을 레지스터별로 기억해 두고, 같은 값을 다시 쓰려는 경우
+Modbus 요청을 보내지 않습니다. 쓰기 오류나 재연결 시에는 캐시를 무효화하여
+다음 주기에 반드시 다시 쓰도록 하고, refresh_interval을 지정하면 값이 같더라도
+그 주기마다 강제로 다시 씁니다. (PLC 재기동 등으로 D 레지스터가 초기화된 경우 대비)
+
+여러 레지스터는 plan_register_writes로 실제로 연속된 주소 구간별 FC16(write_registers) 프레임으로
+묶어 씁니다. 구간 사이의 빈 주소는 기본적으로 쓰지 않으며, PLC 프로그램에서 미사용임을 확인한
+주소만 gap_values로 명시하면 채워서 한 프레임으로 합칩니다. (채운 값은 캐시에 기록하지 않음)
+"""
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Modbus 규격상 FC16 한 프레임으로 쓸 수 있는 최대 레지스터 수
+MAX_REGISTERS_PER_WRITE = 123
+
+
+def plan_register_writes(values: Dict[int, int], gap_values: Optional[Dict[int, int]] = None,
+                         max_count: int = MAX_REGISTERS_PER_WRITE) -> List[Tuple[int, List[int]]]:
+    """
+    (주소 -> 값) 묶음을 최소 개수의 FC16 프레임 (시작 주소, 값 리스트)으로 나눕니다.
+
+    Args:
+        values: 쓸 레지스터 주소와 값.
+        gap_values: 구간 사이의 빈 주소를 채워도 되는 값 (명시한 경우에만 사용, 기본 없음).
+                    PLC 프로그램에서 쓰지 않는 것이 확인된 주소만 넣어야 하며,
+                    빈 주소가 모두 여기에 있으면 두 구간을 한 프레임으로 합칩니다.
+        max_count: 프레임 하나의 최대 레지스터 수.
+
+    Returns:
+        시작 주소 순으로 정렬된 (시작 주소, 값 리스트) 리스트.
+    """
+    gap_values = gap_values or {}
+    groups: List[Tuple[int, List[int]]] = []
+    for address in sorted(values):
+        if groups:
+            start, regs = groups[-1]
+            next_address = start + len(regs)
+            gap = range(next_address, address)
+            if (len(regs) + len(gap) + 1 <= max_count
+                    and all(a in gap_values for a in gap)):
+                regs.extend(gap_values[a] for a in gap)
+                regs.append(int(values[address]))
+                continue
+        groups.append((address, [int(values[address])]))
+    return groups
+
+
+class RegisterWriteCache:
+    """
+    write_register / write_registers 콜백 앞단에 두는 shadow 캐시.
+
+    write_register는 (주소, 값), write_registers는 (시작 주소, 값 리스트)를 받는
+    coroutine 함수로, 성공 시 0, 실패 시 -1을 반환해야 합니다.
+    (기존 _modbus_write_register와 동일한 규칙)
+    """
+
+    def __init__(self, write_register: Callable[[int, int], Awaitable[int]],
+                 refresh_interval: Optional[float] = None,
+                 write_registers: Optional[Callable[[int, List[int]], Awaitable[int]]] = None):
+        self.write_register = write_register
+        self.write_registers = write_registers
+        self.refresh_interval = refresh_interval
+        # 주소 -> (마지막으로 쓴 값, 쓴 시각(monotonic))
+        self._shadow: Dict[int, Tuple[int, float]] = {}
+        self.sent_count = 0
+        self.skipped_count = 0
+        self._split_warned = set()
+
+    def is_current(self, address: int, value: int) -> bool:
+        """캐시에 같은 값이 있고 강제 갱신 주기가 지나지 않았으면 True."""
+        entry = self._shadow.get(address)
+        if entry is None or entry[0] != value:
+            return False
+        if self.refresh_interval is not None and time.monotonic() - entry[1] >= self.refresh_interval:
+            return False
+        return True
+
+    def remember(self, address: int, value: int):
+        """address에 value가 성공적으로 쓰였음을 기록합니다."""
+        self._shadow[address] = (value, time.monotonic())
+
+    async def _send_groups(self, groups: List[Tuple[int, List[int]]], addresses) -> int:
+        """
+        계획된 프레임들을 전송하고 성공한 값만 캐시에 기록합니다.
+        addresses(실제로 쓰려던 주소)에 없는 주소는 빈 주소 채움 값이므로 캐시에 기록하지 않습니다.
+        """
+        result = 0
+        for start, regs in groups:
+            self.sent_count += 1
+            if len(regs) == 1 or self.write_registers is None:
+                # FC16 콜백이 없으면 단일 쓰기(FC06)로 대체
+                for offset, value in enumerate(regs):
+                    if await self.write_register(start + offset, value) == 0:
+                        if start + offset in addresses:
+                            self.remember(start + offset, value)
+                    else:
+                        self.invalidate(start + offset)
+                        result = -1
+                continue
+
+            if await self.write_registers(start, regs) == 0:
+                for offset, value in enumerate(regs):
+                    if start + offset in addresses:
+                        self.remember(start + offset, value)
+            else:
+                for offset in range(len(regs)):
+                    self.invalidate(start + offset)
+                result = -1
+        return result
+
+    async def commit(self, values: Dict[int, int], gap_values: Optional[Dict[int, int]] = None) -> int:
+        """
+        파라미터 세트를 원자적으로 커밋합니다.
+
+        세트 중 하나라도 바뀌었으면 세트 전체를 연속 구간별 FC16 프레임으로 씁니다.
+        세트가 연속 주소이면 한 프레임이라 PLC가 일부만 갱신된 설정값을 보지 않고,
+        주소가 떨어져 있으면 구간마다 별도 프레임으로 전송됩니다.
+        (gap_values를 명시한 빈 주소만 채워서 한 프레임으로 합침)
+
+        Returns:
+            0: 성공 또는 변경 없음, -1: 쓰기 실패
+        """
+        values = {a: int(v) for a, v in values.items()}
+        if all(self.is_current(a, v) for a, v in values.items()):
+            self.skipped_count += len(values)
+            return 0
+
+        groups = plan_register_writes(values, gap_values=gap_values)
+        layout = tuple((start, len(regs)) for start, regs in groups)
+        if len(groups) > 1 and layout not in self._split_warned:
+            # 같은 구성에 대해 한 번만 알림
+            self._split_warned.add(layout)
+            print(f"[MODBUS] ⚠️ 파라미터 세트가 {len(groups)}개 프레임으로 나뉘어 전송됩니다 (원자성 보장 안 됨).")
+        return await self._send_groups(groups, values)
+
+    def invalidate(self, address: Optional[int] = None):
+        """특정 주소 또는 (address=None이면) 전체 캐시를 무효화합니다."""
+        if address is None:
+            self._shadow.clear()
+        else:
+            self._shadow.pop(address, None)